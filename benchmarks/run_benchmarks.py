@@ -0,0 +1,363 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+"""
+Scenario benchmarks for the game loop. Each scenario sets up a SpaceGame in a known state, then drives it for a number
+of ticks on the headless null backend (ASTEROIDS_BACKEND=null) and reports:
+- time per tick (mean, p50, p95, max) and the median time per tick of each phase: spawn (spawn_obstacles_collectibles), player (the rest of
+  update_game: player mechanics and the game timers), collisions (initialize_collision_checks), draw (draw_game, queueing the
+  draw commands of the frame) and render (render_queue.flush(), running them)
+- memory allocated while running, measured with tracemalloc in a second, shorter pass
+- the peak RSS of the process
+
+Every scenario is run --runs times, each in its own process, and the run with the fastest median tick is kept, since a
+busy machine only ever makes a run slower. A slowdown against the baseline only counts as a regression when it's over
+the threshold, and over how much the baseline's tick times of that scenario varied anyway: the spread between its
+p50 and p95 tick times, and between the median ticks of its runs.
+
+Draw calls do nothing on the null backend, so the draw and render phases measure the Python side of drawing only.
+Every run is in its own process, so peak RSS and module state don't leak between scenarios.
+
+Usage:
+python benchmarks/run_benchmarks.py                                   run every scenario and print a table
+python benchmarks/run_benchmarks.py --scenario late_game --ticks 5000 run some scenarios only
+python benchmarks/run_benchmarks.py --output results.json            also write the results as JSON
+python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json
+                                                                      compare against a baseline, exit 1 on regressions
+python benchmarks/run_benchmarks.py --save-baseline benchmarks/baseline.json
+"""
+
+CODE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../code"))
+PHASES = ("spawn", "player", "collisions", "draw", "render")
+SEED = 1234
+DEFAULT_SPEED_RANGE = (200, 250)
+
+
+def setup_main_menu(game):
+    """Main menu with nothing clicked."""
+    game._menu._menu_state_stack.push("main_menu")
+
+
+def setup_leaderboard(game):
+    """
+    Leaderboard screen listing 200 entries, composed again every frame: the menu canvas would otherwise compose it
+    once and only blit it, so the scenario invalidates the canvas before every tick to measure sorting, measuring
+    and drawing the list.
+    """
+    from MenuCanvas import menu_canvas
+
+    rng = random.Random(SEED)
+    game._menu._leaderboard = [
+        ("".join(rng.choices("ABCDEFGHIJKLMNOPQRSTUVWXYZ", k=4)), rng.randint(0, 5000), rng.randint(0, 300)) for i in range(200)
+    ]
+    game._menu._menu_state_stack.push("leaderboard")
+    return menu_canvas.invalidate
+
+
+def setup_early_game(game):
+    """A game that just started: 6 asteroids at the base speed."""
+    set_default_difficulty(game)
+
+
+def setup_late_game(game):
+    """Fully ramped up difficulty: spawning level 7 (20 asteroids) and speed level 6 (+420 speed)."""
+    set_default_difficulty(game)
+    game._asteroid_spawning_level = 7
+    game._asteroid_speed_level = 6
+    game._max_asteroids = game._base_max_asteroids + 2 * 7
+    game._max_speed_range_custom = [speed + 70 * 6 for speed in game._max_speed_range_custom]
+
+
+def setup_stress(asteroid_count):
+    """Returns the setup of a swarm game capped at asteroid_count asteroids."""
+
+    def setup(game):
+        set_default_difficulty(game)
+        game._max_asteroids = asteroid_count
+
+    setup.__doc__ = f"Swarm game with {asteroid_count} asteroids."
+    return setup
+
+
+def set_default_difficulty(game):
+    """Ignores the saved city difficulty so results don't depend on the save file."""
+    game._game_temperature_custom = 65
+    game._max_speed_range_custom = list(DEFAULT_SPEED_RANGE)
+    game._menu._menu_state_stack.push("start_game")
+
+
+# name: (setup function, swarm mode, runs the game simulation). A setup function may return a function called before every tick.
+SCENARIOS = {
+    "main_menu_idle": (setup_main_menu, False, False),
+    "leaderboard": (setup_leaderboard, False, False),
+    "early_game": (setup_early_game, False, True),
+    "late_game": (setup_late_game, False, True),
+    "stress_1k": (setup_stress(1000), True, True),
+    "stress_10k": (setup_stress(10000), True, True),
+}
+
+
+class PhaseTimer:
+    """Wraps game methods so every call adds its duration to the phase's total for the current tick."""
+
+    def __init__(self):
+        self.totals = {}
+
+    def wrap(self, owner, method_name, phase):
+        method = getattr(owner, method_name)
+        totals = self.totals
+        totals[phase] = 0.0
+
+        def timed(*args):
+            start = time.perf_counter()
+            result = method(*args)
+            totals[phase] += time.perf_counter() - start
+            return result
+
+        setattr(owner, method_name, timed)
+
+    def take(self):
+        """Returns the totals since the last take() and resets them."""
+        totals = dict(self.totals)
+        for phase in self.totals:
+            self.totals[phase] = 0.0
+        return totals
+
+
+def make_game(name):
+    """Creates a seeded SpaceGame set up for the scenario. Returns (game, function to call before every tick or None)."""
+    from Game import SpaceGame
+
+    setup, swarm, simulated = SCENARIOS[name]
+    game = SpaceGame(swarm=swarm, seed=SEED)
+    return game, setup(game)
+
+
+def make_tick(game, simulated, input_rng, before_tick=None):
+    """Returns a function running one tick of the scenario: update, draw and render for games, one frame for menus."""
+    from RenderQueue import render_queue
+
+    if not simulated:
+        if before_tick is None:
+            return game.run_current_screen
+
+        def menu_tick():
+            before_tick()
+            game.run_current_screen()
+
+        return menu_tick
+
+    timestep = game._simulation_clock.get_timestep()
+    player = game._player
+
+    def tick():
+        if before_tick is not None:
+            before_tick()
+        # Scripted input: wander around and fire now and then. The player never dies, so death checks are skipped.
+        if input_rng.random() < 0.05:
+            player.set_input_state(input_rng.randint(-1, 1), input_rng.randint(-1, 1), input_rng.random() < 0.3)
+        game.update_game(timestep)
+        game.draw_game(1.0)
+        render_queue.flush()
+
+    return tick
+
+
+def run_scenario(name, ticks, warmup):
+    """Runs one scenario in this process and returns its results as a dict."""
+    from RenderQueue import render_queue
+
+    setup, swarm, simulated = SCENARIOS[name]
+    game, before_tick = make_game(name)
+    phase_timer = PhaseTimer()
+    if simulated:
+        phase_timer.wrap(game, "update_game", "update")
+        phase_timer.wrap(game, "spawn_obstacles_collectibles", "spawn")
+        phase_timer.wrap(game, "initialize_collision_checks", "collisions")
+        phase_timer.wrap(game, "draw_game", "draw")
+        phase_timer.wrap(render_queue, "flush", "render")
+    else:
+        phase_timer.wrap(game, "run_current_screen", "menu")
+    tick = make_tick(game, simulated, random.Random(SEED), before_tick)
+
+    for i in range(warmup):
+        tick()
+    phase_timer.take()
+
+    tick_times = []
+    phase_times = {}
+    for i in range(ticks):
+        start = time.perf_counter()
+        tick()
+        tick_times.append(time.perf_counter() - start)
+        totals = phase_timer.take()
+        if simulated:
+            # update_game covers spawning and collisions too, what's left of it is the player and the clock
+            totals["player"] = totals.pop("update") - totals["spawn"] - totals["collisions"]
+        for phase, total in totals.items():
+            phase_times.setdefault(phase, []).append(total)
+    # Medians are much less sensitive to a busy machine than means
+    phases_ms = {phase: sorted(times)[ticks // 2] * 1000 for phase, times in phase_times.items()}
+
+    # Allocation pass, shorter since tracemalloc slows everything down
+    allocation_ticks = max(1, min(ticks, 200))
+    tracemalloc.start()
+    start_memory = tracemalloc.get_traced_memory()[0]
+    for i in range(allocation_ticks):
+        tick()
+    end_memory, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tick_times.sort()
+    return {
+        "ticks": ticks,
+        "tick_ms": {
+            "mean": sum(tick_times) * 1000 / ticks,
+            "p50": tick_times[ticks // 2] * 1000,
+            "p95": tick_times[min(ticks - 1, int(ticks * 0.95))] * 1000,
+            "max": tick_times[-1] * 1000,
+        },
+        "phases_ms": phases_ms,
+        "asteroids": game._asteroid_field.get_count(),
+        "alloc_peak_kib": (peak_memory - start_memory) / 1024,
+        "alloc_net_kib_per_tick": (end_memory - start_memory) / 1024 / allocation_ticks,
+        "peak_rss_kib": get_peak_rss_kib(),
+    }
+
+
+def get_peak_rss_kib():
+    """Returns the peak resident set size of this process in KiB, or None where it can't be read (Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB on Linux
+    return peak / 1024 if sys.platform == "darwin" else peak
+
+
+def run_in_child(name, ticks, warmup):
+    """Runs a scenario in a fresh Python process on the null backend and returns its results."""
+    env = dict(os.environ, ASTEROIDS_BACKEND="null")
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", name, "--ticks", str(ticks), "--warmup", str(warmup)],
+        env=env,
+        cwd=CODE_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    # The child prints its results as the last line, after whatever the game printed
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run_best_of(name, ticks, warmup, runs):
+    """
+    Runs a scenario runs times, each in its own process, and returns the results of the run with the fastest median
+    tick, with the median tick of every run added as run_p50_ms.
+    """
+    results = [run_in_child(name, ticks, warmup) for i in range(runs)]
+    best = min(results, key=lambda result: result["tick_ms"]["p50"])
+    best["run_p50_ms"] = [result["tick_ms"]["p50"] for result in results]
+    return best
+
+
+def get_noise(result):
+    """
+    Returns how much the tick times of a scenario's results varied, as a fraction of the median tick: the spread between
+    the p50 and p95 tick times, or between the median ticks of its runs if larger. Slowdowns within it are as likely
+    to come from the machine as from the code.
+    """
+    run_p50_ms = result.get("run_p50_ms", [result["tick_ms"]["p50"]])
+    return max(result["tick_ms"]["p95"] / result["tick_ms"]["p50"] - 1, max(run_p50_ms) / min(run_p50_ms) - 1)
+
+
+def compare_to_baseline(results, baseline, threshold, noise_ms):
+    """
+    Returns a list of (scenario, metric, baseline ms, current ms) for every median tick or phase time that got slower
+    than the baseline by more than noise_ms, and by more than threshold (a fraction) or the baseline's relative
+    spread of the scenario's tick times (see get_noise()), whichever is larger.
+    """
+    regressions = []
+    for name, result in results["scenarios"].items():
+        if name not in baseline["scenarios"]:
+            continue
+        old = baseline["scenarios"][name]
+        allowed = max(threshold, get_noise(old))
+        metrics = [("tick", old["tick_ms"]["p50"], result["tick_ms"]["p50"])]
+        metrics += [(phase, old["phases_ms"][phase], ms) for phase, ms in result["phases_ms"].items() if phase in old["phases_ms"]]
+        for metric, old_ms, new_ms in metrics:
+            if new_ms > old_ms * (1 + allowed) and new_ms - old_ms > noise_ms:
+                regressions.append((name, metric, old_ms, new_ms))
+    return regressions
+
+
+def print_results(results):
+    """Prints one line per scenario."""
+    print(f"{'scenario':<16}{'p50 ms':>9}{'p95':>8}" + "".join(f"{phase:>11}" for phase in PHASES + ("menu",)) + f"{'alloc KiB':>11}{'RSS MiB':>9}")
+    for name, result in results["scenarios"].items():
+        phases = "".join(
+            f"{result['phases_ms'][phase]:>11.3f}" if phase in result["phases_ms"] else f"{'-':>11}" for phase in PHASES + ("menu",)
+        )
+        rss = f"{result['peak_rss_kib'] / 1024:>9.1f}" if result["peak_rss_kib"] is not None else f"{'-':>9}"
+        print(f"{name:<16}{result['tick_ms']['p50']:>9.3f}{result['tick_ms']['p95']:>8.3f}{phases}{result['alloc_peak_kib']:>11.1f}{rss}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the game loop in named scenarios.")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="scenario to run (repeatable, default: all)")
+    parser.add_argument("--ticks", type=int, default=1000, help="timed ticks per scenario")
+    parser.add_argument("--warmup", type=int, default=120, help="untimed ticks run first")
+    parser.add_argument("--runs", type=int, default=3, help="runs per scenario, the fastest one is kept")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against this results JSON file")
+    parser.add_argument("--save-baseline", help="write the results as the new baseline to this file")
+    parser.add_argument(
+        "--threshold", type=float, default=0.25, help="slowdown fraction counted as a regression, at least the baseline's p50-p95 spread"
+    )
+    parser.add_argument("--noise-ms", type=float, default=0.05, help="slowdowns smaller than this are ignored")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path.insert(0, CODE_DIR)
+        print(json.dumps(run_scenario(args.child, args.ticks, args.warmup)))
+        return 0
+
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "ticks": args.ticks,
+        "runs": args.runs,
+        "scenarios": {},
+    }
+    for name in args.scenario or SCENARIOS:
+        results["scenarios"][name] = run_best_of(name, args.ticks, args.warmup, args.runs)
+    print_results(results)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as file:
+                json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare_to_baseline(results, baseline, args.threshold, args.noise_ms)
+        for name, metric, old_ms, new_ms in regressions:
+            print(f"REGRESSION {name} {metric}: {old_ms:.3f} ms -> {new_ms:.3f} ms ({new_ms / old_ms - 1:+.0%})")
+        if regressions:
+            return 1
+        print(f"no regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
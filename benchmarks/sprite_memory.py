@@ -0,0 +1,60 @@
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../code")))
+from Sprites import *
+
+"""
+Reports how many bytes each sprite type costs, measured with tracemalloc while creating a batch of sprites.
+LegacySprite2D keeps the layout the sprites had before they used __slots__ (a per-instance __dict__ holding
+cffi Vector2 structs for position, size and direction) so the before and after numbers can be compared.
+
+Usage: python benchmarks/sprite_memory.py [count]
+Set ASTEROIDS_BACKEND=null to run it without opening a window.
+"""
+
+
+class LegacySprite2D:
+    """Reference copy of the old Sprite2D storage: attributes in a __dict__, position/size/direction as Vector2s."""
+
+    def __init__(self, pos, speed, size, direction, texture):
+        self._pos = Vector2(pos[0], pos[1])
+        self._speed = speed
+        self._size = Vector2(size[0], size[1])
+        self._direction = Vector2(direction[0], direction[1])
+        self._sprite_texture = texture
+
+
+def measure_bytes_per_sprite(factory, count):
+    """Returns the average number of bytes allocated per sprite when creating count sprites with factory."""
+    sprites = [None] * count  # allocate the list up front so it isn't counted
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    for i in range(count):
+        sprites[i] = factory(i)
+    used = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return used / count
+
+
+def get_sprite_factories():
+    """Returns (name, factory) pairs for every sprite type worth reporting."""
+    laser_texture = game_assets.get_asset_texture("green_laser.png")
+    star_texture = game_atlas.get_region("star.png")
+    return [
+        ("LegacySprite2D (before)", lambda i: LegacySprite2D((i, i), LASER_SPEED, (9, 54), (0, -1), laser_texture)),
+        ("Laser", lambda i: Laser((i, i))),
+        ("O2_PowerUP", lambda i: O2_PowerUP((i, i), 300, (0, 1))),
+        ("Treasure", lambda i: Treasure((i, i), 200, (0, 1))),
+        ("Star", lambda i: Star(star_texture, (i, i), 0, (15, 15), (0, 0), i % 13)),
+        ("HP", lambda i: HP((i, i))),
+        ("Ammo", lambda i: Ammo((i, i))),
+    ]
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    print(f"bytes per sprite, averaged over {count} sprites")
+    for name, factory in get_sprite_factories():
+        print(f"{name:<26}{measure_bytes_per_sprite(factory, count):>8.1f}")
@@ -0,0 +1,165 @@
+from Settings import *
+from Assets import *
+from AssetManifest import *
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from time import perf_counter
+
+"""
+Loads the assets of a manifest (see AssetManifest.py) into an Assets cache.
+Image and sound files are decoded into CPU-side Image/Wave buffers on worker threads, or read already decoded
+from the asset pack (see AssetPack.py) after the first launch, and the glyphs of font variants (see Fonts.py)
+are rasterized there too; turning them into textures, fonts and sounds needs the window's GL context and the
+audio device, so that upload step runs on the main thread, a few assets per call. Music streams are loaded
+whole in the upload step.
+"""
+
+UPLOADS_PER_FRAME = 4  # assets uploaded by one upload() call, so a loading frame stays short
+# The web build has no threads, there every asset is decoded right before its upload
+DECODE_WORKERS = 0 if WEB_BUILD else 4
+
+
+def decode_asset(asset_type, key, pack):
+    """
+    Decodes an image or sound file into a CPU-side Image or Wave, through the asset pack, or rasterizes a font
+    variant. Safe to call from a worker thread. Returns (asset_type, key, decoded data or None, True if the data is in the pack, decode time in seconds).
+    """
+    start = perf_counter()
+    path = get_asset_path(asset_type, key)
+    if asset_type == "textures":
+        data, from_pack = pack.load_image(key, path)
+    elif asset_type == "sounds":
+        data, from_pack = pack.load_wave(key, path)
+    elif asset_type == "fonts":
+        data, from_pack = decode_font_variant(key, path), False
+    else:
+        # Music streams are loaded on the main thread by upload_asset()
+        data, from_pack = None, False
+    return asset_type, key, data, from_pack, perf_counter() - start
+
+
+def upload_asset(asset_type, key, data, pack, from_pack=False):
+    """
+    Creates the texture, sound, font or music stream from decoded data. Main thread only.
+    Decoded images and sounds are freed through the asset pack they were decoded through afterwards.
+    """
+    if asset_type == "textures":
+        texture = load_texture_from_image(data)
+        pack.free_image(data, from_pack)
+        return texture
+    if asset_type == "sounds":
+        sound = load_sound_from_wave(data)
+        pack.free_wave(data, from_pack)
+        return sound
+    if asset_type == "fonts":
+        return upload_font_variant(key, get_asset_path(asset_type, key), data)
+    return load_music_stream(get_asset_path(asset_type, key))
+
+
+class AssetLoader:
+    """
+    Loads every asset of a manifest that isn't in the cache yet: start() queues the decoding, then upload() is
+    called once per frame on the main thread until is_done(). load_all() does both and blocks until done.
+    The decode and upload time of every asset is kept, see get_timings() and print_timings().
+
+    Attributes:
+    assets: Assets cache the loaded assets are added to
+    manifest: dict of asset type to asset names
+    workers: Number of decoding threads, 0 to decode on the main thread
+    """
+
+    def __init__(self, assets, manifest, workers=DECODE_WORKERS):
+        self._assets = assets
+        self._jobs = [
+            (asset_type, key)
+            for asset_type in ("textures", "sounds", "fonts", "music")
+            for key in manifest.get(asset_type, ())
+            if not assets.is_loaded(key)
+        ]
+        self._workers = workers
+        self._executor = None
+        self._pending = []  # futures of the decoding jobs, or the jobs themselves without workers
+        self._uploaded = 0
+        self._timings = []  # (asset type, key, decode seconds, upload seconds)
+        self._start_time = None
+        self._total_time = 0.0
+
+    def start(self):
+        """Starts decoding the assets on the worker threads."""
+        self._start_time = perf_counter()
+        # Uploading needs the GL context and the audio device
+        self._assets.open_devices()
+        if self._workers > 0 and self._jobs:
+            self._executor = ThreadPoolExecutor(self._workers, thread_name_prefix="asset-decode")
+            self._pending = [self._executor.submit(decode_asset, *job, self._assets.get_pack()) for job in self._jobs]
+        else:
+            self._pending = list(self._jobs)
+
+    def upload(self, max_uploads=UPLOADS_PER_FRAME, block=False):
+        """
+        Uploads up to max_uploads decoded assets and adds them to the cache. Main thread only.
+        Only assets that finished decoding are uploaded, unless block is True, which waits for at least one.
+        Returns True once every asset is loaded.
+        """
+        if self._start_time is None:
+            self.start()
+        uploads = 0
+        while self._pending and uploads < max_uploads:
+            if self._executor is None:
+                decoded = decode_asset(*self._pending.pop(0), self._assets.get_pack())
+            else:
+                done = [future for future in self._pending if future.done()]
+                if not done:
+                    if not block or uploads:
+                        break
+                    done = list(wait(self._pending, return_when=FIRST_COMPLETED).done)
+                future = done[0]
+                self._pending.remove(future)
+                decoded = future.result()
+            asset_type, key, data, from_pack, decode_time = decoded
+            start = perf_counter()
+            self._assets.add_asset(key, upload_asset(asset_type, key, data, self._assets.get_pack(), from_pack), asset_type)
+            self._timings.append((asset_type, key, decode_time, perf_counter() - start))
+            self._uploaded += 1
+            uploads += 1
+        if not self._pending:
+            self.finish()
+        return self.is_done()
+
+    def finish(self):
+        """Stops the worker threads once everything is loaded, and keeps what was decoded in the asset pack."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        self._assets.save_pack()
+        if self._start_time is not None and not self._total_time:
+            self._total_time = perf_counter() - self._start_time
+
+    def load_all(self):
+        """Loads every asset of the manifest, blocking until done."""
+        while not self.upload(len(self._jobs), block=True):
+            pass
+
+    def is_done(self):
+        """Returns True once every asset of the manifest is in the cache."""
+        return self._uploaded == len(self._jobs)
+
+    def get_progress(self):
+        """Returns the fraction of the assets loaded so far, from 0 to 1."""
+        return self._uploaded / len(self._jobs) if self._jobs else 1.0
+
+    def get_timings(self):
+        """Returns (asset type, name, decode seconds, upload seconds) for every loaded asset, in upload order."""
+        return list(self._timings)
+
+    def print_timings(self):
+        """Prints the decode and upload time of every asset, slowest first, and the total loading time."""
+        for asset_type, key, decode_time, upload_time in sorted(self._timings, key=lambda timing: -timing[2] - timing[3]):
+            print(f"{key:<28}{asset_type:<10}decode {decode_time * 1000:7.2f} ms  upload {upload_time * 1000:7.2f} ms")
+        print(f"loaded {len(self._timings)} assets in {self._total_time * 1000:.1f} ms with {self._workers} decoding threads")
+
+
+if __name__ == "__main__":
+    # Cold-start report: python AssetLoader.py (or ASTEROIDS_BACKEND=null python AssetLoader.py without a window)
+    loader = AssetLoader(game_assets, GAME_ASSET_MANIFEST)
+    loader.load_all()
+    loader.print_timings()
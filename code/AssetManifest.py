@@ -0,0 +1,49 @@
+from StateAssetManifest import STATE_ASSET_MANIFESTS
+import os
+import sys
+
+"""
+Lists of the assets the game loads, by asset type. The names are the keys used with game_assets
+(e.g. game_assets.get_asset_texture("meteor.png")), and AssetLoader loads a manifest in one go.
+The manifests are built from the assets every game state used, recorded by AssetProfiler.py into
+StateAssetManifest.py. The menu assets are loaded at startup; the gameplay assets are streamed in by the loading screen.
+"""
+
+# The web build (pygbag) ships its audio as .ogg files
+WEB_BUILD = sys.platform == "emscripten"
+SOUND_EXTENSION = ".ogg" if WEB_BUILD else ".wav"
+MUSIC_EXTENSION = ".ogg" if WEB_BUILD else ".mp3"
+
+# States reachable before the loading screen, including the loading screens themselves
+MENU_STATES = ("startup_loading", "main_menu", "options", "leaderboard", "death_menu", "loading_screen")
+GAMEPLAY_STATES = ("start_game",)
+
+
+def merge_manifests(*manifests):
+    """Returns a manifest with the assets of every given manifest."""
+    merged = {}
+    for manifest in manifests:
+        for asset_type, keys in manifest.items():
+            known = merged.get(asset_type, ())
+            merged[asset_type] = known + tuple(key for key in keys if key not in known)
+    return merged
+
+
+def get_state_manifest(*states):
+    """Returns a manifest with the recorded assets of the given states, with the audio file extensions of this platform."""
+    manifest = merge_manifests(*(STATE_ASSET_MANIFESTS.get(state, {}) for state in states))
+    extensions = {"sounds": SOUND_EXTENSION, "music": MUSIC_EXTENSION}
+    return {
+        asset_type: tuple(
+            os.path.splitext(key)[0] + extensions[asset_type] if asset_type in extensions else key for key in keys
+        )
+        for asset_type, keys in manifest.items()
+    }
+
+
+# Everything the menus and the loading screen draw or play
+MENU_ASSET_MANIFEST = get_state_manifest(*MENU_STATES)
+# Everything a game uses on top of the menu assets
+GAMEPLAY_ASSET_MANIFEST = get_state_manifest(*GAMEPLAY_STATES)
+# Every asset of the game
+GAME_ASSET_MANIFEST = merge_manifests(MENU_ASSET_MANIFEST, GAMEPLAY_ASSET_MANIFEST)
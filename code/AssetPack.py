@@ -0,0 +1,279 @@
+from Settings import *
+from AssetManifest import WEB_BUILD
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+
+"""
+Single-file cache of decoded images and sounds. The first launch decodes the PNG and WAV files as usual and
+stores the raw RGBA pixels and PCM frames in the pack; later launches memory-map the pack and hand raylib
+pointers straight into the mapping, so nothing is decoded (or even copied on the Python side) at startup.
+
+Every entry keeps the modification time, size and hash of the source file it was decoded from. A load only
+stats the source file: while its time and size match, the entry is used without reading the file. When they
+don't, the file is hashed, and an entry whose hash still matches is kept (with the new time and size written by
+the next save()), while a changed file is decoded again and the next save() replaces its entry, so the pack
+never needs to be deleted by hand.
+
+File layout: a PACK_HEADER_SIZE byte header (PACK_MAGIC, then the offset and size of the index as little-endian
+uint64 and uint32), the blobs, each aligned to PACK_ALIGNMENT bytes, then the JSON index. The index maps
+"asset type/name" to the source time, size and hash, the blob's offset and size, and the fields of the raylib
+Image or Wave.
+"""
+
+PACK_MAGIC = b"ASTPACK1"
+PACK_HEADER = struct.Struct("<8sQI")  # magic, index offset, index size
+PACK_HEADER_SIZE = 64
+PACK_ALIGNMENT = 64
+# Next to the asset folders; the web build has no persistent file system to keep it in
+ASSET_PACK_PATH = None if WEB_BUILD else os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "assets.pack"))
+# All packed images are stored in the format textures are uploaded in
+PACKED_IMAGE_FORMAT = PIXELFORMAT_UNCOMPRESSED_R8G8B8A8
+
+
+def hash_file(path):
+    """Returns the hex digest of a file's content."""
+    with open(path, "rb") as file:
+        return hashlib.blake2b(file.read(), digest_size=16).hexdigest()
+
+
+class AssetPack:
+    """
+    Memory-mapped pack of decoded images and sounds, see the module docstring.
+    load_image() and load_wave() return the decoded asset from the pack when it's there and up to date,
+    otherwise decode the source file and keep a copy to write with the next save(). They may be called from
+    worker threads. The Image and Wave returned from the pack are views pointing into the mapping: they must
+    not be unloaded, but given back with free_image() or free_wave() once turned into a texture or sound, and
+    save() doesn't rewrite the pack while any view is still out.
+
+    Attributes:
+    path: Pack file, or None to always decode the source files
+    """
+
+    def __init__(self, path=ASSET_PACK_PATH):
+        self._path = path
+        self._index = {}  # "asset type/name" -> entry dict, see the module docstring
+        self._file = None
+        self._mmap = None
+        self._buffer = None  # cffi char[] over the mapping
+        self._new_entries = {}  # "asset type/name" -> (entry dict, blob bytes) decoded since the last save()
+        self._index_changed = False  # True if source times and sizes of unchanged files were updated
+        self._open_views = 0  # Images and Waves taken from the mapping and not given back yet
+        self._lock = threading.Lock()  # guards the index, the new entries, the view count and the stats, used by decoding threads
+        self._hits = 0
+        self._misses = 0
+        self.open()
+
+    def open(self):
+        """Maps the pack file and reads its index. A missing or unreadable pack is treated as empty."""
+        self.close()
+        if self._path is None or not os.path.exists(self._path):
+            return
+        try:
+            self._file = open(self._path, "rb")
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, index_offset, index_size = PACK_HEADER.unpack_from(self._mmap)
+            if magic != PACK_MAGIC:
+                raise ValueError("not an asset pack")
+            self._index = json.loads(self._mmap[index_offset : index_offset + index_size])
+            self._buffer = ffi.from_buffer(self._mmap)
+        except (OSError, ValueError, struct.error) as error:
+            print(f"ignoring asset pack {self._path}: {error}")
+            self.close()
+
+    def close(self):
+        """Unmaps the pack. Images and Waves taken from it can't be used anymore."""
+        self._buffer = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._index = {}
+
+    def _stat_source(self, path):
+        """Returns the modification time (in nanoseconds) and size of a source file, or (None, None) without a pack."""
+        if self._path is None:
+            return None, None
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _find(self, asset_type, key, path, source_stat):
+        """
+        Returns the pack entry of an asset if its source file is unchanged, otherwise None. The file is only hashed
+        if its time or size differ from the entry's.
+        """
+        name = f"{asset_type}/{key}"
+        entry = self._index.get(name)
+        if entry is None:
+            return None
+        source_mtime, source_size = source_stat
+        if entry.get("source_mtime") == source_mtime and entry.get("source_size") == source_size:
+            return entry
+        if entry["hash"] != hash_file(path):
+            return None
+        # Touched or copied but not changed: keep the entry, and its new time and size from the next save() on
+        with self._lock:
+            self._index[name] = dict(entry, source_mtime=source_mtime, source_size=source_size)
+            self._index_changed = True
+        return entry
+
+    def _open_view(self, entry):
+        """Returns a pointer to the blob of an entry, counted as an open view until it's given back."""
+        with self._lock:
+            self._open_views += 1
+        return ffi.cast("void *", self._buffer + entry["offset"])
+
+    def _close_view(self):
+        """Counts an Image or Wave taken from the pack as given back."""
+        with self._lock:
+            self._open_views -= 1
+
+    def load_image(self, key, path):
+        """
+        Returns (Image, from_pack) for the image file at path, named key. The Image is decoded from the file
+        unless from_pack is True, in which case its pixels are in the pack. Either way, give it to free_image()
+        when done with it.
+        """
+        source_stat = self._stat_source(path)
+        entry = self._find("textures", key, path, source_stat)
+        if entry is not None:
+            with self._lock:
+                self._hits += 1
+            return Image(self._open_view(entry), entry["width"], entry["height"], 1, entry["format"]), True
+
+        with self._lock:
+            self._misses += 1
+        image = load_image(path)
+        if image.format != PACKED_IMAGE_FORMAT:
+            image_format(image, PACKED_IMAGE_FORMAT)
+        # Images without pixels come from the null backend, which only reads the size of a PNG
+        if self._path is not None and image.data != ffi.NULL:
+            size = get_pixel_data_size(image.width, image.height, image.format)
+            entry = self._new_entry(path, source_stat, width=image.width, height=image.height, format=image.format)
+            blob = ffi.buffer(image.data, size)[:]
+            with self._lock:
+                self._new_entries[f"textures/{key}"] = (entry, blob)
+        return image, False
+
+    def load_wave(self, key, path):
+        """
+        Returns (Wave, from_pack) for the sound file at path, named key. The Wave is decoded from the file
+        unless from_pack is True, in which case its frames are in the pack. Either way, give it to free_wave()
+        when done with it.
+        """
+        source_stat = self._stat_source(path)
+        entry = self._find("sounds", key, path, source_stat)
+        if entry is not None:
+            with self._lock:
+                self._hits += 1
+            return Wave(entry["frameCount"], entry["sampleRate"], entry["sampleSize"], entry["channels"], self._open_view(entry)), True
+
+        with self._lock:
+            self._misses += 1
+        wave = load_wave(path)
+        if self._path is not None and wave.data != ffi.NULL:
+            size = wave.frameCount * wave.channels * wave.sampleSize // 8
+            entry = self._new_entry(
+                path, source_stat, frameCount=wave.frameCount, sampleRate=wave.sampleRate, sampleSize=wave.sampleSize, channels=wave.channels
+            )
+            blob = ffi.buffer(wave.data, size)[:]
+            with self._lock:
+                self._new_entries[f"sounds/{key}"] = (entry, blob)
+        return wave, False
+
+    def _new_entry(self, path, source_stat, **fields):
+        """Returns the entry of a freshly decoded source file, with the fields of its Image or Wave."""
+        source_mtime, source_size = source_stat
+        return dict(fields, hash=hash_file(path), source_mtime=source_mtime, source_size=source_size)
+
+    def free_image(self, image, from_pack):
+        """Unloads an Image returned by load_image(), or gives it back to the pack if it came from there."""
+        if from_pack:
+            self._close_view()
+        else:
+            unload_image(image)
+
+    def free_wave(self, wave, from_pack):
+        """Unloads a Wave returned by load_wave(), or gives it back to the pack if it came from there."""
+        if from_pack:
+            self._close_view()
+        else:
+            unload_wave(wave)
+
+    def has_changes(self):
+        """Returns True if assets were decoded (or source files touched) since the last save()."""
+        return bool(self._new_entries) or self._index_changed
+
+    def get_open_views(self):
+        """Returns the number of Images and Waves taken from the pack and not given back yet."""
+        return self._open_views
+
+    def save(self):
+        """
+        Writes the pack again with the assets decoded since the last save, replacing the stale entries of the
+        same assets. Main thread only. Rewriting the pack unmaps it, so nothing is written while Images or Waves
+        taken from it are still out (e.g. decoded by a loader that isn't done): the changes are kept for a later
+        save() instead. Returns True if the pack was written.
+        """
+        if self._path is None or not self.has_changes():
+            return False
+        with self._lock:
+            if self._open_views:
+                return False
+            new_entries = dict(self._new_entries)
+        blobs = {}
+        for name, entry in self._index.items():
+            if name not in new_entries:
+                blobs[name] = (entry, self._mmap[entry["offset"] : entry["offset"] + entry["size"]])
+        blobs.update(new_entries)
+
+        index = {}
+        temporary_path = self._path + ".tmp"
+        with open(temporary_path, "wb") as file:
+            file.write(b"\0" * PACK_HEADER_SIZE)
+            for name, (entry, blob) in sorted(blobs.items()):
+                file.write(b"\0" * (-file.tell() % PACK_ALIGNMENT))
+                index[name] = dict(entry, offset=file.tell(), size=len(blob))
+                file.write(blob)
+            index_bytes = json.dumps(index, indent=1).encode()
+            index_offset = file.tell()
+            file.write(index_bytes)
+            file.seek(0)
+            file.write(PACK_HEADER.pack(PACK_MAGIC, index_offset, len(index_bytes)))
+        # Unmapped before the old file is replaced, which Windows requires
+        self.close()
+        os.replace(temporary_path, self._path)
+        with self._lock:
+            # Keep what a worker thread decoded while the pack was written, for the next save()
+            for name, new_entry in new_entries.items():
+                if self._new_entries.get(name) is new_entry:
+                    del self._new_entries[name]
+            self._index_changed = False
+        self.open()
+        return True
+
+    def get_stats(self):
+        """Returns (assets read from the pack, assets decoded from their files) since the pack was created."""
+        with self._lock:
+            return self._hits, self._misses
+
+
+if __name__ == "__main__":
+    # python AssetPack.py: builds or refreshes the pack with every image and sound of the game, without a window
+    from Assets import get_asset_path
+    from AssetManifest import GAME_ASSET_MANIFEST
+    from TextureAtlas import SPRITE_ATLAS_TEXTURES
+
+    pack = AssetPack()
+    for key in GAME_ASSET_MANIFEST.get("textures", ()) + SPRITE_ATLAS_TEXTURES:
+        pack.free_image(*pack.load_image(key, get_asset_path("textures", key)))
+    for key in GAME_ASSET_MANIFEST.get("sounds", ()):
+        pack.free_wave(*pack.load_wave(key, get_asset_path("sounds", key)))
+    hits, misses = pack.get_stats()
+    pack.save()
+    print(f"{ASSET_PACK_PATH}: {hits} assets up to date, {misses} decoded")
@@ -0,0 +1,239 @@
+from Settings import *
+from Backend import get_backend_name, get_null_backend
+from StateAssetManifest import STATE_ASSET_MANIFESTS
+from time import perf_counter
+import os
+import random
+import sys
+
+"""
+Records which assets every game state (main_menu, options, start_game, ...) uses, and flags the assets loaded
+in the middle of a frame: every one of them is a disk read the player can feel as a hitch. The recorded usage
+is written to StateAssetManifest.py, which AssetManifest.py builds the preload manifests from.
+
+ASTEROIDS_BACKEND=null python AssetProfiler.py plays through every menu and a few games and updates
+StateAssetManifest.py. With --check it does the same without writing, and fails if a state used an asset
+its manifest doesn't list. python Game.py --profile-assets records a normal play session instead.
+"""
+
+# Loads during a frame that take longer than this many seconds are reported as hitches
+ASSET_HITCH_BUDGET = 0.002
+# States that are expected to load assets, their loads are never hitches
+LOADING_STATES = ("loading_screen",)
+ASSET_TYPES = ("textures", "fonts", "sounds", "music")
+PLAY_THROUGH_GAMES = 6  # games played by python AssetProfiler.py
+PLAY_THROUGH_TEMPERATURES = (0, 50, 100)  # in Fahrenheit, one per game in turn
+STATE_MANIFEST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "StateAssetManifest.py")
+STATE_MANIFEST_HEADER = '''"""
+Assets used by every game state, recorded by AssetProfiler.py. Generated file: play through the new
+state or asset with ASTEROIDS_BACKEND=null python AssetProfiler.py (or python Game.py --profile-assets)
+instead of editing it.
+"""
+
+'''
+
+
+class AssetUsageProfiler:
+    """
+    Observer of an Assets cache (see Assets.set_observer()) that sorts every asset use by the game state
+    it happened in, and keeps the loads that happened during a frame and took longer than the hitch budget.
+    Uses outside of begin_frame()/end_frame() (e.g. loading at startup) aren't recorded.
+
+    Attributes:
+    state_source: Function returning the current game state, called on every asset use
+    hitch_budget: Longest load in seconds during a frame that isn't a hitch
+    """
+
+    def __init__(self, state_source, hitch_budget=ASSET_HITCH_BUDGET):
+        self._state_source = state_source
+        self._hitch_budget = hitch_budget
+        self._in_frame = False
+        self._used = {}  # state -> asset type -> set of asset names
+        self._frame_loads = []  # (state, asset type, key, seconds) of every load during a frame
+        self._hitches = []  # the frame loads longer than the hitch budget
+
+    def begin_frame(self):
+        """Starts recording the asset uses of a frame."""
+        self._in_frame = True
+
+    def end_frame(self):
+        """Stops recording until the next frame."""
+        self._in_frame = False
+
+    def on_asset_used(self, asset_type, key):
+        """Called by Assets every time an asset is requested."""
+        if self._in_frame:
+            self._used.setdefault(self._state_source(), {}).setdefault(asset_type, set()).add(key)
+
+    def on_asset_loaded(self, asset_type, key, seconds):
+        """Called by Assets after every load, with the time it took."""
+        if not self._in_frame:
+            return
+        state = self._state_source()
+        load = (state, asset_type, key, seconds)
+        self._frame_loads.append(load)
+        if state not in LOADING_STATES and seconds > self._hitch_budget:
+            self._hitches.append(load)
+            print(f"asset hitch: {key} loaded during a {state} frame in {seconds * 1000:.2f} ms")
+
+    def get_frame_loads(self):
+        """Returns (state, asset type, name, seconds) of every load that happened during a frame."""
+        return list(self._frame_loads)
+
+    def get_hitches(self):
+        """Returns (state, asset type, name, seconds) of every load during a frame that was over the hitch budget."""
+        return list(self._hitches)
+
+    def get_state_manifests(self):
+        """Returns the recorded assets as a manifest (asset type -> sorted names) per state."""
+        return {
+            state: {asset_type: tuple(sorted(used[asset_type])) for asset_type in ASSET_TYPES if asset_type in used}
+            for state, used in sorted(self._used.items())
+        }
+
+    def get_missing_assets(self, state_manifests=STATE_ASSET_MANIFESTS):
+        """Returns (state, asset type, name) of every recorded asset that the given state manifests don't list."""
+        return [
+            (state, asset_type, key)
+            for state, manifest in self.get_state_manifests().items()
+            for asset_type, keys in manifest.items()
+            for key in keys
+            if key not in state_manifests.get(state, {}).get(asset_type, ())
+        ]
+
+    def print_report(self):
+        """Prints the assets used by every state and the loads that happened during a frame."""
+        for state, manifest in self.get_state_manifests().items():
+            print(f"{state}: " + ", ".join(f"{len(keys)} {asset_type}" for asset_type, keys in manifest.items()))
+        for state, asset_type, key, seconds in self._frame_loads:
+            hitch = "  HITCH" if (state, asset_type, key, seconds) in self._hitches else ""
+            print(f"  loaded during a frame: {key:<28}{state:<16}{seconds * 1000:7.2f} ms{hitch}")
+
+    def write_state_manifests(self, path=STATE_MANIFEST_PATH):
+        """
+        Adds the recorded assets to the state manifests in StateAssetManifest.py. Assets recorded by earlier runs
+        are kept, since one session rarely plays through everything (e.g. every power-up sound).
+        """
+        merged = {state: dict(manifest) for state, manifest in STATE_ASSET_MANIFESTS.items()}
+        for state, asset_type, key in self.get_missing_assets():
+            keys = merged.setdefault(state, {}).get(asset_type, ())
+            merged[state][asset_type] = tuple(sorted(keys + (key,)))
+        merged = {
+            state: {asset_type: manifest[asset_type] for asset_type in ASSET_TYPES if asset_type in manifest}
+            for state, manifest in sorted(merged.items())
+        }
+        lines = ["STATE_ASSET_MANIFESTS = {"]
+        for state, manifest in merged.items():
+            lines.append(f'    "{state}": {{')
+            for asset_type, keys in manifest.items():
+                if len(keys) == 1:
+                    lines.append(f'        "{asset_type}": ("{keys[0]}",),')
+                elif sum(len(key) + 4 for key in keys) < 80:
+                    lines.append(f'        "{asset_type}": (' + ", ".join(f'"{key}"' for key in keys) + "),")
+                else:
+                    lines.append(f'        "{asset_type}": (')
+                    lines.extend(f'            "{key}",' for key in keys)
+                    lines.append("        ),")
+            lines.append("    },")
+        lines.append("}")
+        with open(path, "w") as file:
+            file.write(STATE_MANIFEST_HEADER + "\n".join(lines) + "\n")
+
+
+def play_through(game, backend, games=3, seed=0):
+    """
+    Plays through every menu and the given number of games on the null backend: hovers every button, opens
+    the options and the leaderboard, starts games and steers the ship at random until it dies.
+    """
+    menu = game._menu
+    rng = random.Random(seed)
+
+    def run_frame():
+        begin_drawing()
+        clear_background(BG_COLOR)
+        game.run_current_screen()
+        end_drawing()
+
+    def hover_buttons(names):
+        # A frame with the mouse away from the buttons first, so every hover is a new one
+        backend.move_mouse(0, 0)
+        run_frame()
+        for name in names:
+            rectangle = menu._buttons[name].get_rectangle()
+            backend.move_mouse(rectangle.x + rectangle.width / 2, rectangle.y + rectangle.height / 2)
+            run_frame()
+
+    def click_button(name):
+        rectangle = menu._buttons[name].get_rectangle()
+        backend.click_mouse(rectangle.x + rectangle.width / 2, rectangle.y + rectangle.height / 2)
+        run_frame()
+
+    game.seed_random(seed)
+    menu._menu_state_stack.push("main_menu")
+    hover_buttons(("start", "stats", "options", "exit"))
+
+    click_button("options")
+    hover_buttons(("main menu", "difficulty", "erase file"))
+    click_button("difficulty")  # shows the city input box
+    run_frame()
+    click_button("difficulty")
+    click_button("main menu")
+
+    click_button("stats")
+    hover_buttons(("main menu",))
+    click_button("main menu")
+
+    for game_index in range(games):
+        # Cold, mild and hot games, for the icy and fiery asteroids
+        game._game_temperature_custom = PLAY_THROUGH_TEMPERATURES[game_index % len(PLAY_THROUGH_TEMPERATURES)]
+        hover_buttons(("start",))
+        click_button("start")
+        while game.get_current_state() == "loading_screen":
+            run_frame()
+        while game.get_current_state() == "start_game":
+            # Steer towards the nearest power-up or treasure, so collecting them plays their sounds
+            ship = game._player.get_position()
+            collectibles = [sprite.get_position() for sprite in game._power_ups + game._treasure]
+            if collectibles:
+                target = min(collectibles, key=lambda position: abs(position.x - ship.x) + abs(position.y - ship.y))
+                # Waits in the lower half of the screen for what falls from the top
+                target_y = max(target.y, WINDOW_HEIGHT / 2)
+                backend.set_keys_down([KEY_LEFT if target.x < ship.x else KEY_RIGHT, KEY_UP if target_y < ship.y else KEY_DOWN])
+                # Shoots what's lined up above the ship, which opens the caged oxygen
+                shoot = abs(target.x - ship.x) < 40 and 0 < target.y < ship.y
+            else:
+                if rng.random() < 0.05:
+                    backend.set_keys_down(rng.sample((KEY_LEFT, KEY_RIGHT, KEY_UP, KEY_DOWN), rng.randint(0, 2)))
+                shoot = rng.random() < 0.02
+            if shoot:
+                backend.press_key(KEY_SPACE)
+            run_frame()
+        backend.set_keys_down(())
+        hover_buttons(("main menu", "exit"))
+        click_button("main menu")
+
+
+if __name__ == "__main__":
+    if get_backend_name() != "null":
+        # The play-through needs the null backend's input injection
+        sys.exit("usage: ASTEROIDS_BACKEND=null python AssetProfiler.py [--check]")
+    from Game import SpaceGame
+    from AssetLoader import *
+
+    # Like Main.py, which loads the menu assets at startup
+    AssetLoader(game_assets, MENU_ASSET_MANIFEST).load_all()
+    game = SpaceGame()
+    profiler = AssetUsageProfiler(game.get_current_state)
+    game.set_asset_profiler(profiler)
+    start = perf_counter()
+    play_through(game, get_null_backend(), games=PLAY_THROUGH_GAMES)
+    print(f"played through the menus and {PLAY_THROUGH_GAMES} games in {perf_counter() - start:.1f} s")
+    profiler.print_report()
+
+    missing = profiler.get_missing_assets()
+    for state, asset_type, key in missing:
+        print(f"not in the {state} manifest: {key}")
+    if "--check" in sys.argv:
+        sys.exit(1 if missing or profiler.get_hitches() else 0)
+    profiler.write_state_manifests()
+    print(f"wrote {STATE_MANIFEST_PATH}")
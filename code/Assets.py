@@ -1,85 +1,333 @@
 from pyray import *
 from raylib import *
 from Settings import *
+from AssetPack import AssetPack
+from Fonts import *
+from collections import OrderedDict
+from time import perf_counter
 import os
 
+# Folder of each asset type, relative to the repository root
+ASSET_FOLDERS = {"textures": "images", "fonts": "font", "sounds": "audio", "music": "audio"}
+
+# Memory the cached assets may use before unreferenced ones get evicted, in bytes.
+# The web build (pygbag) runs in a WASM heap where this matters most.
+ASSET_MEMORY_BUDGET = 128 * 1024 * 1024
+
+
+def get_asset_path(asset_type, key):
+    """Returns the absolute path of an asset file from its type ("textures", "fonts", "sounds" or "music") and name."""
+    if asset_type == "fonts":
+        # Every variant of a font is loaded from the same file
+        key = get_font_file(key)
+    # Note: all abspath does is get rid of .. (which stands for relative path)
+    return os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ASSET_FOLDERS[asset_type], key))
+
+
+def get_asset_size(asset_type, asset, path):
+    """Returns an estimate of the memory used by a loaded asset, in bytes."""
+    if asset_type == "textures":
+        return get_pixel_data_size(asset.width, asset.height, asset.format)
+    if asset_type == "fonts":
+        # The glyph atlas texture, plus the glyph info and rectangles
+        return get_pixel_data_size(asset.texture.width, asset.texture.height, asset.texture.format) + asset.glyphCount * 64
+    if asset_type == "sounds":
+        # Sounds are fully decoded into PCM frames
+        return asset.frameCount * asset.stream.channels * asset.stream.sampleSize // 8
+    # Music is streamed from its file, which the web build keeps in memory
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+class LazyAsset:
+    """
+    Handle on an asset that is only loaded the first time it's used, so modules can refer to assets
+    (e.g. as default arguments) without loading anything or needing a window when they're imported.
+    get() returns the loaded asset and holds a reference on it, so the cache never evicts it.
+    Texture handles also give the texture's width and height.
+
+    Attributes:
+    assets: Assets cache the asset is loaded from
+    asset_type: "textures", "fonts", "sounds" or "music"
+    key: Name of the asset file
+    """
+
+    __slots__ = ("_assets", "_asset_type", "_key", "_asset")
+
+    def __init__(self, assets, asset_type, key):
+        self._assets = assets
+        self._asset_type = asset_type
+        self._key = key
+        self._asset = None
+
+    def get(self):
+        """Returns the asset, loading it on the first call. Every call counts as a use for the cache's observer."""
+        if self._asset is None:
+            self._asset = self._assets.acquire_asset(self._asset_type, self._key)
+        else:
+            observer = self._assets.get_observer()
+            if observer is not None:
+                observer.on_asset_used(self._asset_type, self._key)
+        return self._asset
+
+    def get_key(self):
+        """Returns the name of the asset file."""
+        return self._key
+
+    def get_asset_type(self):
+        """Returns the type of the asset ("textures", "fonts", "sounds" or "music")."""
+        return self._asset_type
+
+    def is_loaded(self):
+        """Returns True if the asset was loaded already."""
+        return self._asset is not None
+
+    def release(self):
+        """Drops the handle's reference, so the cache may evict the asset. The next get() loads it again if needed."""
+        if self._asset is not None:
+            self._asset = None
+            self._assets.release_asset(self._key)
+
+    def forget(self):
+        """Drops the loaded asset after the cache unloaded it. The next get() loads it again."""
+        self._asset = None
+
+    @property
+    def width(self):
+        return self.get().width
+
+    @property
+    def height(self):
+        return self.get().height
+
 
 class Assets:
-    def __init__(self):
+    """
+    Cache of every loaded texture, font, sound and music stream, by file name.
+
+    Each asset has a reference count and a size estimate. Assets that are kept and reused (the ones behind
+    LazyAsset handles, the game music) hold a reference through acquire_asset(). Assets looked up every time
+    they're used (e.g. sound effects) hold none. When the cached assets use more memory than the budget, the
+    least recently used assets without references are unloaded; they're simply loaded again on their next use.
+
+    Images and sounds are decoded through an AssetPack, which keeps them decoded between launches.
+
+    Attributes:
+    budget: Memory in bytes the cache may use before evicting assets
+    pack: AssetPack the images and sounds are read from, by default the one at ASSET_PACK_PATH
+    """
+
+    def __init__(self, budget=ASSET_MEMORY_BUDGET, pack=None):
         """
-        Initializes the window, audio device, and asset dictionary.
-        This method sets up the game window and the audio system to ensure rendering and sound work correctly.
+        Initializes the asset dictionary. The window and audio device are opened by open_devices(),
+        which happens when the first asset is loaded, so importing the game doesn't open a window.
         """
+        # key -> [asset, asset type, size in bytes, reference count], least recently used first
+        self._assets = OrderedDict()
+        self._handles = {}  # LazyAsset handles by key, one per asset
+        self._budget = budget
+        self._memory_used = 0
+        self._devices_open = False
+        self._observer = None  # e.g. an AssetUsageProfiler, told about every asset use and load
+        self._pack = pack if pack is not None else AssetPack()
 
-        # Init_window is needed for any imported texture to be drawn
-        # Init_audio_device is needed for any imported audio to be used
-        init_window(WINDOW_WIDTH, WINDOW_HEIGHT, "GAME")
-        init_audio_device()
-        self._assets = {}
+    def open_devices(self):
+        """
+        Opens the game window and the audio device, if they aren't open yet.
+        This sets up the game window and the audio system to ensure rendering and sound work correctly.
+        """
+        if not self._devices_open:
+            # Init_window is needed for any imported texture to be drawn
+            # Init_audio_device is needed for any imported audio to be used
+            init_window(WINDOW_WIDTH, WINDOW_HEIGHT, "GAME")
+            init_audio_device()
+            self._devices_open = True
+
+    def get_lazy_texture(self, key):
+        """Returns the LazyAsset handle of a texture, which loads the texture when it's first drawn."""
+        return self._get_handle("textures", key)
+
+    def get_lazy_font(self, key, size=None):
+        """
+        Returns the LazyAsset handle of a font, which loads the font when it's first used.
+        With a size, the handle is the font's variant for text of that size (see Fonts.py).
+        """
+        return self._get_handle("fonts", key if size is None else get_font_key(key, size))
+
+    def _get_handle(self, asset_type, key):
+        """Returns the handle of an asset, created on the first call, so every user of an asset shares one handle."""
+        handle = self._handles.get(key)
+        if handle is None:
+            handle = self._handles[key] = LazyAsset(self, asset_type, key)
+        return handle
+
+    def warm_up(self):
+        """
+        Opens the window and audio device and loads every asset that has a handle, so nothing
+        is loaded in the middle of the first frames that use them.
+        """
+        self.open_devices()
+        for handle in self._handles.values():
+            handle.get()
 
     def get_asset_texture(self, key):
         """
         Loads and returns a texture. Only loads once to save memory.
         """
-        if key in self._assets:
-            return self._assets[key]
-        else:
-            # Load the texture if it's not already loaded
-            # Note: all abspath does is get rid of .. (which stands for relative path)
-            base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../images/" + key))
-            self._assets[key] = load_texture(base_path)
-            return self._assets[key]
+        return self._get_asset("textures", key)
 
-    def get_asset_font(self, key):
+    def get_asset_font(self, key, size=None):
         """
-        Loads and returns a font. Only loads once to save memory.
+        Loads and returns a font, or its variant for text of the given size (see Fonts.py). Only loads once to save memory.
         """
-        if key in self._assets:
-            return self._assets[key]
-        else:
-            # Load the font if it's not already loaded
-            base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../font/" + key))
-            self._assets[key] = load_font(base_path)
-            return self._assets[key]
+        return self._get_asset("fonts", key if size is None else get_font_key(key, size))
 
     def get_asset_sound(self, key):
         """
         Loads and returns a sound. Only loads once to save memory.
         """
-        if key in self._assets:
-            return self._assets[key]
-        else:
-            # Load the sound if it's not already loaded
-            base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../audio/" + key))
-            self._assets[key] = load_sound(base_path)
-            return self._assets[key]
+        return self._get_asset("sounds", key)
 
     def get_asset_music(self, key):
         """
         Loads and returns music. Only loads once to save memory.
         """
-        if key in self._assets:
-            return self._assets[key]
+        return self._get_asset("music", key)
+
+    def _get_asset(self, asset_type, key):
+        """Returns an asset from the cache, loading it if it's not already loaded, and marks it as recently used."""
+        entry = self._assets.get(key)
+        if entry is None:
+            self.open_devices()
+            start = perf_counter()
+            path = get_asset_path(asset_type, key)
+            if asset_type == "textures":
+                image, from_pack = self._pack.load_image(key, path)
+                asset = load_texture_from_image(image)
+                self._pack.free_image(image, from_pack)
+            elif asset_type == "fonts":
+                asset = load_font_variant(key, path)
+            elif asset_type == "sounds":
+                wave, from_pack = self._pack.load_wave(key, path)
+                asset = load_sound_from_wave(wave)
+                self._pack.free_wave(wave, from_pack)
+            else:
+                asset = load_music_stream(path)
+            entry = self._add_entry(key, asset, asset_type)
+            if self._observer is not None:
+                self._observer.on_asset_loaded(asset_type, key, perf_counter() - start)
         else:
-            # Load the music if it's not already loaded
-            base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../audio/" + key))
-            self._assets[key] = load_music_stream(base_path)
-            return self._assets[key]
+            self._assets.move_to_end(key)
+        if self._observer is not None:
+            self._observer.on_asset_used(asset_type, key)
+        return entry[0]
+
+    def acquire_asset(self, asset_type, key):
+        """Returns an asset like the get_asset functions and adds a reference to it, so it isn't evicted until released."""
+        asset = self._get_asset(asset_type, key)
+        self._assets[key][3] += 1
+        return asset
+
+    def release_asset(self, key):
+        """Removes a reference added by acquire_asset(). The asset can then be evicted if the cache is over budget."""
+        entry = self._assets.get(key)
+        if entry is not None and entry[3] > 0:
+            entry[3] -= 1
+            self.evict_over_budget()
+
+    def is_loaded(self, key):
+        """Returns True if the asset was already loaded."""
+        return key in self._assets
+
+    def add_asset(self, key, asset, asset_type, references=0):
+        """
+        Stores an asset loaded elsewhere (e.g. by AssetLoader or a TextureAtlas), so the get_asset functions return it.
+        references is the number of references the caller holds, like calls to acquire_asset().
+        """
+        self._add_entry(key, asset, asset_type)[3] += references
+
+    def _add_entry(self, key, asset, asset_type):
+        """Adds a loaded asset to the cache as the most recently used one and returns its entry."""
+        size = get_asset_size(asset_type, asset, get_asset_path(asset_type, key))
+        entry = self._assets[key] = [asset, asset_type, size, 0]
+        self._memory_used += size
+        self.evict_over_budget(keep=key)
+        return entry
+
+    def evict_over_budget(self, keep=None):
+        """
+        Unloads the least recently used assets without references until the cache fits in its budget.
+        The keep asset is never unloaded, it's the one just loaded and about to be used.
+        """
+        if self._memory_used <= self._budget:
+            return
+        for key in list(self._assets):
+            if self._memory_used <= self._budget:
+                break
+            if key != keep and self._assets[key][3] == 0:
+                self._unload_entry(key)
+
+    def _unload_entry(self, key):
+        """Unloads an asset and removes it from the cache."""
+        asset, asset_type, size, references = self._assets.pop(key)
+        if asset_type == "textures":
+            unload_texture(asset)
+        elif asset_type == "fonts":
+            unload_font_variant(asset)
+        elif asset_type == "sounds":
+            unload_sound(asset)
+        else:
+            unload_music_stream(asset)
+        self._memory_used -= size
+        if key in self._handles:
+            self._handles[key].forget()
+
+    def get_pack(self):
+        """Returns the AssetPack the images and sounds are decoded through."""
+        return self._pack
+
+    def save_pack(self):
+        """
+        Writes the images and sounds decoded since the last save to the asset pack, for the next launch. Nothing is
+        written while images or sounds taken from the pack are still being loaded, see AssetPack.save().
+        """
+        self._pack.save()
+
+    def set_observer(self, observer):
+        """
+        Sets the object told about asset uses and loads, or None. Its on_asset_used(asset_type, key) is called
+        every time an asset is requested, directly or through its LazyAsset handle, and
+        on_asset_loaded(asset_type, key, seconds) after every load.
+        """
+        self._observer = observer
+
+    def get_observer(self):
+        """Returns the object told about asset uses and loads, or None."""
+        return self._observer
+
+    def set_budget(self, budget):
+        """Sets the memory budget in bytes, evicting assets right away if the cache is now over it."""
+        self._budget = budget
+        self.evict_over_budget()
+
+    def get_budget(self):
+        """Returns the memory budget in bytes."""
+        return self._budget
+
+    def get_memory_usage(self):
+        """Returns the estimated memory used by the cached assets, in bytes."""
+        return self._memory_used
+
+    def get_asset_stats(self):
+        """Returns (name, asset type, size in bytes, reference count) for every cached asset, least recently used first."""
+        return [(key, asset_type, size, references) for key, (asset, asset_type, size, references) in self._assets.items()]
 
     def unload(self):
         """
-        Unloads all assets to free up memory.
-        """
-        for texture in self._assets:
-            if type(texture) == Texture2D:
-                unload_texture(texture)
-            elif type(texture) == Font:
-                unload_font(texture)
-            elif type(texture) == Sound:
-                unload_sound(texture)
-            elif type(texture) == Music:
-                unload_music_stream(texture)
-        self._assets.clear()  # clear the asset dictionary
+        Unloads all assets to free up memory, after saving what was decoded to the asset pack.
+        """
+        self.save_pack()
+        for key in list(self._assets):
+            self._unload_entry(key)
 
 
 # create an instance of the Assets class to manage assets
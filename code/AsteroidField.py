@@ -0,0 +1,260 @@
+from Settings import *
+from Assets import *
+from TextureAtlas import *
+import numpy as np
+
+# Asteroid type ids used by the AsteroidField arrays, with the texture used to draw each type
+ASTEROID_NORMAL, ASTEROID_ICY, ASTEROID_FIERY = 0, 1, 2
+ASTEROID_TYPE_NAMES = ("normal", "icy", "fiery")
+ASTEROID_TEXTURES = ("meteor.png", "icy_meteor.png", "fiery_meteor.png")
+ASTEROID_SIZE = (101, 84)
+ASTEROID_ROTATION_SPEED = 100
+# Asteroids are drawn as one mesh of quads per frame, indexed with 16 bit indices, so a mesh holds at most
+# 65536 / 4 quads; bigger fields are drawn in several meshes' worth of batches
+ASTEROID_BATCH_QUADS = 16384
+# Corners of an asteroid quad as (x, y) signs around its center, in the order DrawTexturePro() draws them (top
+# left, bottom left, bottom right, top right) so the triangles face the same way
+ASTEROID_QUAD_CORNERS = ((-1, -1), (-1, 1), (1, 1), (1, -1))
+ASTEROID_QUAD_DEPTH = -0.5  # z of the quads, inside the near and far planes of raylib's 2D projection
+
+
+class AsteroidField:
+    """
+    Stores every asteroid on screen as a struct of NumPy arrays instead of one Asteroid object per rock.
+    Live asteroids are packed into the first `count` slots of each array, so spawning, movement,
+    rotation and off-screen culling each run as a single batched operation per frame.
+
+    Attributes:
+    pos: (capacity, 2) float array of asteroid positions
+    prev_pos: (capacity, 2) float array of the positions before the last update, used to interpolate drawing
+    velocity: (capacity, 2) float array of direction * speed for each asteroid
+    rotation: float array of rotations in degrees
+    type_id: int array of asteroid types (ASTEROID_NORMAL, ASTEROID_ICY, ASTEROID_FIERY)
+    alive: bool mask, cleared by kill() and compacted away on the next cull()
+    rng: NumPy random Generator used for spawning (pass a seeded one for reproducible games)
+    """
+
+    def __init__(self, capacity, rng=None):
+        self._capacity = capacity
+        self._count = 0
+        self._pos = np.zeros((capacity, 2), dtype=np.float32)
+        self._prev_pos = np.zeros((capacity, 2), dtype=np.float32)
+        self._velocity = np.zeros((capacity, 2), dtype=np.float32)
+        self._rotation = np.zeros(capacity, dtype=np.float32)
+        self._type_id = np.zeros(capacity, dtype=np.int8)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._rng = rng if rng is not None else np.random.default_rng()
+
+        # Vertices of the asteroid quads, computed in NumPy and uploaded to one dynamic mesh every frame, so
+        # drawing the field takes a few raylib calls however many asteroids there are
+        batch_quads = min(capacity, ASTEROID_BATCH_QUADS)
+        self._vertices = np.zeros((batch_quads, 4, 3), dtype=np.float32)
+        self._vertices[:, :, 2] = ASTEROID_QUAD_DEPTH
+        self._texcoords = np.zeros((batch_quads, 4, 2), dtype=np.float32)
+        first_vertices = np.arange(0, 4 * batch_quads, 4, dtype=np.uint16)[:, None]
+        self._indices = first_vertices + np.array([0, 1, 2, 0, 2, 3], dtype=np.uint16)
+        self._mesh = None  # Mesh, uploaded when the field is first drawn
+        self._material = None
+        self._pages = []  # (atlas page texture, sizes, texture coordinates) the asteroids are drawn from
+        self._type_pages = None  # index in _pages of the page of each asteroid type
+        self._transform = matrix_identity()
+
+    def get_count(self):
+        """Returns the number of asteroid slots in use (alive or waiting to be culled)."""
+        return self._count
+
+    def get_capacity(self):
+        """Returns the maximum number of asteroids the field can hold."""
+        return self._capacity
+
+    def get_positions(self):
+        """Returns a view of the positions of the asteroids in use."""
+        return self._pos[: self._count]
+
+    def get_type_ids(self):
+        """Returns a view of the type ids of the asteroids in use."""
+        return self._type_id[: self._count]
+
+    def get_alive_mask(self):
+        """Returns a view of the alive mask of the asteroids in use."""
+        return self._alive[: self._count]
+
+    def set_rng(self, rng):
+        """Replaces the random Generator used for spawning."""
+        self._rng = rng
+
+    def get_radius(self):
+        """Returns the radius of the circular hitbox shared by every asteroid."""
+        return ASTEROID_SIZE[0] / 2
+
+    def clear(self):
+        """Removes every asteroid from the field."""
+        self._alive[: self._count] = False
+        self._count = 0
+
+    def spawn(self, amount, speed_range, type_chances):
+        """
+        Spawns up to `amount` asteroids above the top of the screen in one batch.
+        speed_range is the [min, max] speed, type_chances maps asteroid type names to spawn weights.
+        Returns the number of asteroids actually spawned.
+        """
+        amount = min(amount, self._capacity - self._count)
+        if amount <= 0:
+            return 0
+        start, end = self._count, self._count + amount
+
+        self._pos[start:end, 0] = self._rng.integers(-15, WINDOW_WIDTH + 30, amount, endpoint=True)
+        self._pos[start:end, 1] = self._rng.integers(-100, -50, amount, endpoint=True)
+        self._prev_pos[start:end] = self._pos[start:end]
+
+        # Asteroids drift diagonally or fall straight down, same as the single-asteroid spawner did
+        speed = self._rng.integers(int(speed_range[0]), int(speed_range[1]), amount, endpoint=True)
+        self._velocity[start:end, 0] = self._rng.integers(-1, 1, amount, endpoint=True) * speed
+        self._velocity[start:end, 1] = speed
+
+        # each asteroid starts with a different rotation
+        self._rotation[start:end] = self._rng.integers(0, 90, amount, endpoint=True)
+
+        # Weighted selection of asteroid type
+        weights = np.array([type_chances[name] for name in ASTEROID_TYPE_NAMES], dtype=np.float64)
+        if weights.sum() <= 0:
+            weights = np.ones(len(ASTEROID_TYPE_NAMES))
+        self._type_id[start:end] = self._rng.choice(len(ASTEROID_TYPE_NAMES), amount, p=weights / weights.sum())
+
+        self._alive[start:end] = True
+        self._count = end
+        return amount
+
+    def update(self, dt):
+        """Moves and rotates every asteroid at once by one simulation tick of dt seconds."""
+        count = self._count
+        self._prev_pos[:count] = self._pos[:count]
+        self._pos[:count] += self._velocity[:count] * dt
+        rotation = self._rotation[:count]
+        rotation += dt * ASTEROID_ROTATION_SPEED
+        rotation[rotation > 360] -= 360
+
+    def kill(self, index):
+        """Marks an asteroid as destroyed. It stops colliding immediately and is removed on the next cull()."""
+        self._alive[index] = False
+
+    def cull(self):
+        """
+        Removes destroyed asteroids and asteroids that left the screen in one compaction pass.
+        Returns the number of asteroids removed.
+        """
+        count = self._count
+        pos = self._pos[:count]
+        keep = self._alive[:count] & (pos[:, 1] <= WINDOW_HEIGHT) & (pos[:, 0] >= -15) & (pos[:, 0] <= WINDOW_WIDTH + 30)
+        kept = int(np.count_nonzero(keep))
+        if kept == count:
+            return 0
+
+        for array in (self._pos, self._prev_pos, self._velocity, self._rotation, self._type_id):
+            array[:kept] = array[:count][keep]
+        self._alive[:kept] = True
+        self._alive[kept:count] = False
+        self._count = kept
+        return count - kept
+
+    def draw(self, alpha=1.0):
+        """
+        Draws every live, on-screen asteroid with its current rotation. The quads of the asteroids of a texture
+        are computed at once in NumPy and drawn as one mesh, instead of calling DrawTexturePro() per asteroid.
+        alpha (0 to 1) interpolates the drawn positions between the previous and the current update.
+        """
+        count = self._count
+        pos = self._pos[:count]
+        if alpha < 1.0:
+            prev_pos = self._prev_pos[:count]
+            pos = prev_pos + (pos - prev_pos) * np.float32(alpha)
+        visible = self._alive[:count] & (pos[:, 1] > -ASTEROID_SIZE[1])
+        if self._mesh is None:
+            self._upload_mesh()
+
+        # The mesh is drawn by the GPU right away, so what raylib batched before it has to be drawn first
+        rl_draw_render_batch_active()
+        for page_index, (page, sizes, texcoords) in enumerate(self._pages):
+            group = visible if len(self._pages) == 1 else visible & (self._type_pages[self._type_id[:count]] == page_index)
+            indices = np.flatnonzero(group)
+            for start in range(0, len(indices), len(self._vertices)):
+                batch = indices[start : start + len(self._vertices)]
+                self._fill_quads(batch, pos[batch], sizes, texcoords)
+                self._draw_quads(len(batch), page)
+
+    def _fill_quads(self, indices, pos, sizes, texcoords):
+        """
+        Writes the quads of the asteroids at indices, drawn at pos, into the mesh arrays. sizes and texcoords are
+        the size and the texture coordinates of the 4 corners of each asteroid type.
+        """
+        quads = len(indices)
+        type_ids = self._type_id[indices]
+        np.take(texcoords, type_ids, axis=0, out=self._texcoords[:quads])
+
+        # Corners rotated around the center of each asteroid, as DrawTexturePro() does with the origin at the center:
+        # the center plus or minus half the width along a and half the height along b
+        half_sizes = sizes[type_ids] * np.float32(0.5)
+        radians = np.radians(self._rotation[indices])
+        cos, sin = np.cos(radians), np.sin(radians)
+        ax, ay = half_sizes[:, 0] * cos, half_sizes[:, 0] * sin
+        bx, by = half_sizes[:, 1] * -sin, half_sizes[:, 1] * cos
+        x, y = pos[:, 0], pos[:, 1]
+        vertices = self._vertices[:quads]
+        for corner, (a_sign, b_sign) in enumerate(ASTEROID_QUAD_CORNERS):
+            vertices[:, corner, 0] = x + a_sign * ax + b_sign * bx
+            vertices[:, corner, 1] = y + a_sign * ay + b_sign * by
+
+    def _draw_quads(self, quads, texture):
+        """Uploads the first quads of the mesh arrays and draws them with a texture."""
+        update_mesh_buffer(self._mesh[0], RL_DEFAULT_SHADER_ATTRIB_LOCATION_POSITION, self._mesh.vertices, quads * self._vertices[0].nbytes, 0)
+        update_mesh_buffer(self._mesh[0], RL_DEFAULT_SHADER_ATTRIB_LOCATION_TEXCOORD, self._mesh.texcoords, quads * self._texcoords[0].nbytes, 0)
+        self._mesh.triangleCount = quads * 2
+        self._material.maps[MATERIAL_MAP_DIFFUSE].texture = texture
+        draw_mesh(self._mesh[0], self._material, self._transform)
+
+    def _upload_mesh(self):
+        """
+        Uploads the mesh the asteroids are drawn with, loads its material and looks up the atlas page, size and
+        texture coordinates of each asteroid type.
+        """
+        self._mesh = ffi.new("Mesh *")
+        self._mesh.vertexCount = self._vertices.shape[0] * 4
+        self._mesh.triangleCount = self._vertices.shape[0] * 2
+        self._mesh.vertices = ffi.cast("float *", ffi.from_buffer(self._vertices))
+        self._mesh.texcoords = ffi.cast("float *", ffi.from_buffer(self._texcoords))
+        self._mesh.indices = ffi.cast("unsigned short *", ffi.from_buffer(self._indices))
+        upload_mesh(self._mesh, True)
+        self._material = load_material_default()
+
+        regions = [game_atlas.get_region(texture_name) for texture_name in ASTEROID_TEXTURES]
+        sources = np.array([(source.x, source.y, source.width, source.height) for source in (region.get_source() for region in regions)], dtype=np.float32)
+        sizes = sources[:, 2:4]
+        corners = np.array(ASTEROID_QUAD_CORNERS, dtype=np.float32) * 0.5 + 0.5  # (0, 0) top left to (1, 1) bottom right
+        # Asteroids are drawn page by page, with the sizes and texture coordinates (on that page) of every type
+        self._pages = []
+        self._type_pages = np.zeros(len(regions), dtype=np.int8)
+        pages = []
+        for type_id, region in enumerate(regions):
+            page = region.get()
+            index = next((index for index, known_page in enumerate(pages) if known_page is page), None)
+            if index is None:
+                index = len(pages)
+                pages.append(page)
+                texcoords = (sources[:, None, 0:2] + corners[None, :, :] * sizes[:, None, :]) / np.array([page.width, page.height], dtype=np.float32)
+                self._pages.append((page, sizes, texcoords))
+            self._type_pages[type_id] = index
+
+    def unload(self):
+        """Unloads the mesh and material of the field, if they were loaded. Call before the window is closed."""
+        if self._mesh is not None:
+            # The arrays belong to NumPy, so raylib must not free them
+            self._mesh.vertices = self._mesh.texcoords = ffi.NULL
+            self._mesh.indices = ffi.NULL
+            unload_mesh(self._mesh[0])
+            self._mesh = None
+        if self._material is not None:
+            # Keeps UnloadMaterial() from unloading the atlas page the asteroids were drawn with
+            self._material.maps[MATERIAL_MAP_DIFFUSE].texture.id = rl_get_texture_id_default()
+            unload_material(self._material)
+            self._material = None
+        self._pages = []
@@ -0,0 +1,281 @@
+import os
+import struct
+import pyray
+import raylib
+
+"""
+Backend selection. Every module gets its raylib functions through `from Settings import *`, and Settings
+star-imports this module after pyray/raylib, so the names exported here replace the raylib ones.
+
+The backend is picked with the ASTEROIDS_BACKEND environment variable:
+- "raylib" (default): nothing is replaced, the game opens a window and plays audio as usual.
+- "null": window, drawing and audio calls do nothing, textures are only read for their size, time is
+  simulated and input comes from NullBackend instead of the keyboard and mouse. The game can then be
+  imported and run headless (e.g. on a server or in CI) at unlimited speed.
+"""
+
+BACKEND_NAMES = ("raylib", "null")
+MAX_MATERIAL_MAPS = 12  # length of the maps array of a raylib Material
+
+
+def _do_nothing(*args, **kwargs):
+    """Stand-in for window, drawing and audio calls of the null backend."""
+    return None
+
+
+class NullBackend:
+    """
+    Headless replacement for raylib's window, drawing, audio and input functions.
+    Time only advances when a frame ends, by frame_time seconds, so games run as fast as the CPU allows
+    while every timer still sees a steady frame rate. Input is injected with the set/press methods and
+    "pressed" input only lasts until the end of the frame, like in raylib.
+
+    Attributes:
+    frame_time: Simulated length of a frame in seconds
+    """
+
+    # raylib calls that have no effect without a window or audio device
+    NO_OP_FUNCTIONS = (
+        "init_window",
+        "close_window",
+        "init_audio_device",
+        "close_audio_device",
+        "begin_drawing",
+        "clear_background",
+        "begin_texture_mode",
+        "end_texture_mode",
+        "begin_blend_mode",
+        "end_blend_mode",
+        "begin_shader_mode",
+        "end_shader_mode",
+        "begin_scissor_mode",
+        "end_scissor_mode",
+        "rl_set_blend_factors_separate",
+        "rl_draw_render_batch_active",
+        "upload_mesh",
+        "update_mesh_buffer",
+        "set_texture_filter",
+        "set_target_fps",
+        "set_trace_log_level",
+        "play_sound",
+        "set_sound_volume",
+        "play_music_stream",
+        "pause_music_stream",
+        "resume_music_stream",
+        "stop_music_stream",
+        "update_music_stream",
+        "set_music_volume",
+        "unload_texture",
+        "unload_render_texture",
+        "unload_shader",
+        "unload_mesh",
+        "unload_material",
+        "unload_image",
+        "unload_wave",
+        "unload_font",
+        "unload_sound",
+        "unload_music_stream",
+    )
+
+    def __init__(self, frame_time=1 / 60):
+        self._frame_time = frame_time
+        self._time = 0.0
+        self._frame_count = 0
+        self._screen_width, self._screen_height = 0, 0
+        self._keys_down = set()
+        self._keys_pressed = set()
+        self._mouse_buttons_pressed = set()
+        self._mouse_position = (0.0, 0.0)
+        self._chars_pressed = []
+        self._should_close = False
+        self._material_maps = []  # maps of the materials returned by load_material_default(), kept alive
+
+    def set_frame_time(self, frame_time):
+        """Sets the simulated length of the following frames, in seconds."""
+        self._frame_time = frame_time
+
+    def get_frame_count(self):
+        """Returns the number of frames ended since the backend was created."""
+        return self._frame_count
+
+    def set_keys_down(self, keys):
+        """Sets the keys held down from now on (replaces the previously held keys)."""
+        self._keys_down = set(keys)
+
+    def press_key(self, key):
+        """Presses a key for the current frame."""
+        self._keys_pressed.add(key)
+
+    def click_mouse(self, x, y, button=pyray.MOUSE_BUTTON_LEFT):
+        """Moves the mouse to (x, y) and clicks the button for the current frame."""
+        self._mouse_position = (float(x), float(y))
+        self._mouse_buttons_pressed.add(button)
+
+    def move_mouse(self, x, y):
+        """Moves the mouse to (x, y)."""
+        self._mouse_position = (float(x), float(y))
+
+    def type_text(self, text):
+        """Queues characters to be returned by get_char_pressed(), one per call."""
+        self._chars_pressed.extend(ord(char) for char in text)
+
+    def request_close(self):
+        """Makes window_should_close() return True, ending the game loop."""
+        self._should_close = True
+
+    # Replacements for raylib functions
+
+    def init_window(self, width, height, title):
+        self._screen_width, self._screen_height = width, height
+
+    def window_should_close(self):
+        return self._should_close
+
+    def end_drawing(self):
+        # Advance the simulated clock and drop the input that only lasts one frame
+        self._time += self._frame_time
+        self._frame_count += 1
+        self._keys_pressed.clear()
+        self._mouse_buttons_pressed.clear()
+
+    def get_time(self):
+        return self._time
+
+    def get_frame_time(self):
+        return self._frame_time
+
+    def get_fps(self):
+        return round(1 / self._frame_time) if self._frame_time > 0 else 0
+
+    def get_screen_width(self):
+        return self._screen_width
+
+    def get_screen_height(self):
+        return self._screen_height
+
+    def is_key_down(self, key):
+        return key in self._keys_down
+
+    def is_key_pressed(self, key):
+        return key in self._keys_pressed
+
+    def is_mouse_button_pressed(self, button):
+        return button in self._mouse_buttons_pressed
+
+    def get_mouse_position(self):
+        return pyray.Vector2(*self._mouse_position)
+
+    def get_char_pressed(self):
+        return self._chars_pressed.pop(0) if self._chars_pressed else 0
+
+    def read_png_size(self, path):
+        """Returns the (width, height) stored in the header of a PNG file."""
+        with open(path, "rb") as file:
+            header = file.read(24)
+        return struct.unpack(">II", header[16:24])
+
+    def load_texture(self, path):
+        # Only the size of a texture matters without a GPU, and it's stored in the PNG header
+        width, height = self.read_png_size(path)
+        return pyray.Texture(0, width, height, 1, pyray.PIXELFORMAT_UNCOMPRESSED_R8G8B8A8)
+
+    def load_image(self, path):
+        # Images are only used to create textures, so like load_texture() only the size is read
+        width, height = self.read_png_size(path)
+        return pyray.Image(pyray.ffi.NULL, width, height, 1, pyray.PIXELFORMAT_UNCOMPRESSED_R8G8B8A8)
+
+    def gen_image_color(self, width, height, color):
+        # Like load_image(), a generated image only has a size
+        return pyray.Image(pyray.ffi.NULL, width, height, 1, pyray.PIXELFORMAT_UNCOMPRESSED_R8G8B8A8)
+
+    def load_texture_from_image(self, image):
+        return pyray.Texture(0, image.width, image.height, 1, pyray.PIXELFORMAT_UNCOMPRESSED_R8G8B8A8)
+
+    def load_render_texture(self, width, height):
+        texture = pyray.Texture(0, width, height, 1, pyray.PIXELFORMAT_UNCOMPRESSED_R8G8B8A8)
+        return pyray.RenderTexture(0, texture, pyray.Texture())
+
+    def load_shader_from_memory(self, vertex_shader, fragment_shader):
+        return pyray.Shader()
+
+    def load_material_default(self):
+        # The maps of a material are filled in before it's drawn, so unlike the other structs they have to exist
+        maps = pyray.ffi.new("MaterialMap[]", MAX_MATERIAL_MAPS)
+        self._material_maps.append(maps)
+        return pyray.Material(pyray.Shader(), maps, [0.0] * 4)
+
+    def load_wave(self, path):
+        return pyray.Wave()
+
+    def load_sound_from_wave(self, wave):
+        return pyray.Sound()
+
+    def load_font(self, path, *args):
+        return pyray.Font()
+
+    def load_sound(self, path):
+        return pyray.Sound()
+
+    def load_music_stream(self, path):
+        return pyray.Music()
+
+    def measure_text_ex(self, font, text, font_size, spacing):
+        # Rough monospace estimate, close enough for centering text that is never drawn
+        return pyray.Vector2(len(text) * (font_size * 0.6 + spacing), font_size)
+
+    def get_functions(self):
+        """Returns the raylib function names replaced by this backend, mapped to their replacements."""
+        functions = {name: _do_nothing for name in self.NO_OP_FUNCTIONS}
+        # Every drawing call, in both the pyray and the raylib naming
+        functions.update({name: _do_nothing for name in dir(pyray) if name.startswith("draw_")})
+        functions.update({name: _do_nothing for name in dir(raylib) if name.startswith("Draw")})
+        for name in (
+            "init_window",
+            "window_should_close",
+            "end_drawing",
+            "get_time",
+            "get_frame_time",
+            "get_fps",
+            "get_screen_width",
+            "get_screen_height",
+            "is_key_down",
+            "is_key_pressed",
+            "is_mouse_button_pressed",
+            "get_mouse_position",
+            "get_char_pressed",
+            "load_texture",
+            "load_image",
+            "gen_image_color",
+            "load_texture_from_image",
+            "load_render_texture",
+            "load_shader_from_memory",
+            "load_material_default",
+            "load_wave",
+            "load_sound_from_wave",
+            "load_font",
+            "load_sound",
+            "load_music_stream",
+            "measure_text_ex",
+        ):
+            functions[name] = getattr(self, name)
+        return functions
+
+
+_backend_name = os.environ.get("ASTEROIDS_BACKEND", "raylib").lower()
+if _backend_name not in BACKEND_NAMES:
+    raise ValueError(f"Unknown ASTEROIDS_BACKEND {_backend_name!r}, expected one of {BACKEND_NAMES}")
+
+_null_backend = NullBackend() if _backend_name == "null" else None
+_overrides = _null_backend.get_functions() if _null_backend else {}
+globals().update(_overrides)
+__all__ = list(_overrides)
+
+
+def get_backend_name():
+    """Returns the name of the backend in use ("raylib" or "null")."""
+    return _backend_name
+
+
+def get_null_backend():
+    """Returns the NullBackend used to drive input and time headless, or None with the raylib backend."""
+    return _null_backend
@@ -0,0 +1,194 @@
+from Settings import *
+import numpy as np
+
+# Collision layers. Every entity inserted into the grid belongs to one layer,
+# and queries pass a mask made of one or more layers to only get the entities they care about.
+LAYER_PLAYER = 1
+LAYER_LASER = 2
+LAYER_ASTEROID = 4
+LAYER_POWERUP = 8
+LAYER_TREASURE = 16
+LAYER_ALL = LAYER_PLAYER | LAYER_LASER | LAYER_ASTEROID | LAYER_POWERUP | LAYER_TREASURE
+
+
+def _concatenate_ranges(starts, lengths):
+    """Returns the ranges start..start + length - 1 of every start and length, concatenated in one array."""
+    offsets = np.cumsum(lengths) - lengths
+    return np.repeat(starts - offsets, lengths) + np.arange(int(lengths.sum()))
+
+
+def get_sprite_boxes(sprites):
+    """
+    Returns the (x, y, width, height) arrays of the boxes of a list of sprites (anything with get_x(), get_y(),
+    get_width() and get_height()), to insert or query them in one batch.
+    """
+    boxes = np.array([(sprite.get_x(), sprite.get_y(), sprite.get_width(), sprite.get_height()) for sprite in sprites], dtype=np.float32)
+    return boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+
+
+class SpatialGrid:
+    """
+    Uniform grid broadphase used to find which entities are close enough to need an exact collision check.
+    The grid is rebuilt each tick: entities are inserted as axis-aligned boxes (one batch per layer),
+    build() buckets every box into the cell holding its center, and query() only looks at the cells that
+    could hold a box overlapping the queried one, keeping the layers in its mask; query_boxes() does the same for
+    many boxes in one vectorized pass. Building and querying stay near-linear in the number of entities.
+
+    Entities outside of the grid bounds are clamped into the border cells, so they can still be found,
+    just with less precise bucketing.
+
+    Attributes:
+    cell_size: Width and height of a grid cell in pixels
+    bounds: (min_x, min_y, max_x, max_y) area covered by the grid cells
+    """
+
+    def __init__(self, cell_size=128, bounds=(-256, -256, WINDOW_WIDTH + 256, WINDOW_HEIGHT + 256)):
+        self._cell_size = cell_size
+        self._min_x, self._min_y = bounds[0], bounds[1]
+        self._columns = int(np.ceil((bounds[2] - bounds[0]) / cell_size))
+        self._rows = int(np.ceil((bounds[3] - bounds[1]) / cell_size))
+        self._cell_count = self._columns * self._rows
+        self._pending = []  # (layer, ids, x, y, width, height) batches waiting for build()
+
+        # Built grid: entries sorted by cell, with the slice of each cell given by _cell_start
+        self._cell_start = np.zeros(self._cell_count + 1, dtype=np.int64)
+        self._entry_layers = np.zeros(0, dtype=np.int64)
+        self._entry_ids = np.zeros(0, dtype=np.int64)
+        self._entry_boxes = np.zeros((4, 0), dtype=np.float32)
+        # Largest half width/height of any entry, used to widen queries since entries only sit in their center cell
+        self._max_half_width = 0.0
+        self._max_half_height = 0.0
+
+    def clear(self):
+        """Removes every entity from the grid."""
+        self._pending.clear()
+        self._cell_start[:] = 0
+        self._entry_layers = self._entry_layers[:0]
+        self._entry_ids = self._entry_ids[:0]
+        self._entry_boxes = self._entry_boxes[:, :0]
+        self._max_half_width = 0.0
+        self._max_half_height = 0.0
+
+    def insert(self, layer, ids, x, y, width, height):
+        """
+        Queues entities of a single layer to be added on the next build().
+        ids, x, y, width and height can either be single numbers or arrays with one value per entity.
+        """
+        ids = np.atleast_1d(np.asarray(ids, dtype=np.int64))
+        if len(ids) == 0:
+            return
+        x, y, width, height = (np.broadcast_to(np.asarray(value, dtype=np.float32), ids.shape) for value in (x, y, width, height))
+        self._pending.append((layer, ids, x, y, width, height))
+
+    def _cell_index(self, x, y):
+        """Returns the clamped column and row of the cell(s) holding the given point(s)."""
+        column = np.clip((np.asarray(x) - self._min_x) // self._cell_size, 0, self._columns - 1).astype(np.int64)
+        row = np.clip((np.asarray(y) - self._min_y) // self._cell_size, 0, self._rows - 1).astype(np.int64)
+        return column, row
+
+    def build(self):
+        """Buckets every entity inserted since the last clear() into the cell holding the center of its box."""
+        if not self._pending:
+            self.clear()
+            return
+        layers = np.concatenate([np.full(len(batch[1]), batch[0], dtype=np.int64) for batch in self._pending])
+        ids = np.concatenate([batch[1] for batch in self._pending])
+        x0 = np.concatenate([batch[2] for batch in self._pending])
+        y0 = np.concatenate([batch[3] for batch in self._pending])
+        width = np.concatenate([batch[4] for batch in self._pending])
+        height = np.concatenate([batch[5] for batch in self._pending])
+        self._pending.clear()
+
+        column, row = self._cell_index(x0 + width / 2, y0 + height / 2)
+        cells = row * self._columns + column
+
+        # Sort entries by cell; cell ids are small so a stable sort on int16 is a linear radix sort
+        order = np.argsort(cells.astype(np.int16 if self._cell_count < 2**15 else np.int64), kind="stable")
+        self._cell_start[0] = 0
+        np.cumsum(np.bincount(cells, minlength=self._cell_count), out=self._cell_start[1:])
+        self._entry_layers = layers[order]
+        self._entry_ids = ids[order]
+        x0, y0 = x0[order], y0[order]
+        self._entry_boxes = np.stack((x0, y0, x0 + width[order], y0 + height[order]))
+        self._max_half_width = float(width.max()) / 2
+        self._max_half_height = float(height.max()) / 2
+
+    def query(self, x, y, width, height, mask=LAYER_ALL):
+        """
+        Returns (layers, ids) arrays of every entity in the mask's layers whose box overlaps the given box.
+        """
+        # Any overlapping entry has its center within half of the largest entry size of the queried box
+        column0, row0 = self._cell_index(x - self._max_half_width, y - self._max_half_height)
+        column1, row1 = self._cell_index(x + width + self._max_half_width, y + height + self._max_half_height)
+        slices = []
+        for row in range(int(row0), int(row1) + 1):
+            # Cells in a row are contiguous, so a whole row span is one slice of the sorted entries
+            start = self._cell_start[row * self._columns + column0]
+            end = self._cell_start[row * self._columns + column1 + 1]
+            if end > start:
+                slices.append(np.arange(start, end))
+        if not slices:
+            return self._entry_layers[:0], self._entry_ids[:0]
+
+        entries = np.concatenate(slices) if len(slices) > 1 else slices[0]
+        boxes = self._entry_boxes[:, entries]
+        hits = (
+            (self._entry_layers[entries] & mask).astype(bool)
+            & (boxes[0] <= x + width)
+            & (boxes[2] >= x)
+            & (boxes[1] <= y + height)
+            & (boxes[3] >= y)
+        )
+        entries = entries[hits]
+        return self._entry_layers[entries], self._entry_ids[entries]
+
+    def query_boxes(self, x, y, width, height, mask=LAYER_ALL):
+        """
+        Queries several boxes in one vectorized pass, like calling query() for each of them. x, y, width and
+        height are arrays with one value per queried box. Returns (box indices, layers, ids) arrays with one entry
+        per overlapping box and entity.
+        """
+        x, y, width, height = (np.atleast_1d(np.asarray(value, dtype=np.float32)) for value in (x, y, width, height))
+        if len(x) == 0 or len(self._entry_ids) == 0:
+            return self._entry_ids[:0], self._entry_layers[:0], self._entry_ids[:0]
+        column0, row0 = self._cell_index(x - self._max_half_width, y - self._max_half_height)
+        column1, row1 = self._cell_index(x + width + self._max_half_width, y + height + self._max_half_height)
+
+        # One span of the sorted entries per row of every box, as in query()
+        row_counts = row1 - row0 + 1
+        span_boxes = np.repeat(np.arange(len(x)), row_counts)
+        rows = _concatenate_ranges(row0, row_counts)
+        starts = self._cell_start[rows * self._columns + column0[span_boxes]]
+        lengths = self._cell_start[rows * self._columns + column1[span_boxes] + 1] - starts
+        entries = _concatenate_ranges(starts, lengths)
+        boxes = np.repeat(span_boxes, lengths)
+
+        entry_boxes = self._entry_boxes[:, entries]
+        hits = (
+            (self._entry_layers[entries] & mask).astype(bool)
+            & (entry_boxes[0] <= x[boxes] + width[boxes])
+            & (entry_boxes[2] >= x[boxes])
+            & (entry_boxes[1] <= y[boxes] + height[boxes])
+            & (entry_boxes[3] >= y[boxes])
+        )
+        entries = entries[hits]
+        return boxes[hits], self._entry_layers[entries], self._entry_ids[entries]
+
+    def query_layer(self, x, y, width, height, layer):
+        """Returns the ids of the entities of one layer whose box overlaps the given box."""
+        return self.query(x, y, width, height, layer)[1]
+
+    def get_entry_count(self):
+        """Returns the number of entities in the built grid."""
+        return len(self._entry_ids)
+
+
+if __name__ == "__main__":
+    test_grid = SpatialGrid()
+    test_grid.insert(LAYER_ASTEROID, np.arange(3), [0, 500, 1900], [0, 500, 1000], 101, 101)
+    test_grid.insert(LAYER_PLAYER, 0, 450, 450, 112, 75)
+    test_grid.build()
+    print(test_grid.query(400, 400, 200, 200))  # asteroid 1 and the player
+    print(test_grid.query_layer(400, 400, 200, 200, LAYER_ASTEROID))  # asteroid 1 only
+    print(test_grid.query_layer(-5000, -5000, 10, 10, LAYER_ASTEROID))  # nothing
+    print(test_grid.query_boxes([400, -5000], [400, -5000], [200, 10], [200, 10]))  # box 0: asteroid 1 and the player
@@ -0,0 +1,152 @@
+from Settings import *
+from AssetManifest import WEB_BUILD
+
+"""
+Font variants. load_font() rasterizes every printable character at 32 px, and the game draws that atlas scaled
+up to 120 and 200 px, which blurs the Silkscreen pixel fonts. Fonts are instead loaded per size: the asset key
+"slkscreb.ttf@60" is slkscreb.ttf rasterized at exactly 60 px, with only the characters FONT_VARIANT_GLYPHS
+lists for that size, so text drawn at its variant's size is never scaled.
+
+Text of FONT_SDF_MIN_SIZE px and more (buttons, titles, the clock) uses the "@sdf" variant instead: a signed
+distance field atlas at FONT_SDF_BASE_SIZE, drawn with the SDF shader from get_font_shader(), which stays sharp
+at any size. One SDF atlas per font serves every large size, for a fraction of the memory of a 200 px atlas.
+"""
+
+FONT_SDF_MIN_SIZE = 50  # text this large uses the SDF variant of its font
+FONT_SDF_BASE_SIZE = 64  # size the SDF atlases are generated at
+FONT_GLYPH_PADDING = 2  # pixels around every glyph of an atlas
+FONT_GLYPHS_ASCII = "".join(chr(code) for code in range(32, 127))
+FONT_GLYPHS_LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz "
+FONT_GLYPHS_DIGITS = "0123456789-"
+# Characters of every variant the game draws; variants not listed get FONT_GLYPHS_ASCII. Every variant also
+# gets "?", which raylib draws in place of characters the atlas doesn't have.
+FONT_VARIANT_GLYPHS = {
+    "slkscr.ttf@40": FONT_GLYPHS_LETTERS,  # city input box
+    "slkscr.ttf@sdf": FONT_GLYPHS_DIGITS + "PAUSED",  # clock and pause screen
+    "slkscreb.ttf@20": FONT_GLYPHS_LETTERS,  # small buttons
+    "slkscreb.ttf@35": FONT_GLYPHS_DIGITS + ".x",  # points multiplier
+    "slkscreb.ttf@40": FONT_GLYPHS_LETTERS + FONT_GLYPHS_DIGITS + ":",  # points
+    # leaderboard, buttons, oxygen meter, title and game over
+    "slkscreb.ttf@sdf": FONT_GLYPHS_LETTERS + FONT_GLYPHS_DIGITS + ".:",
+}
+
+# Fragment shader turning the distance field into antialiased glyph edges, as in raylib's text_font_sdf example
+if WEB_BUILD:
+    SDF_FRAGMENT_SHADER = """#version 100
+#extension GL_OES_standard_derivatives : enable
+precision mediump float;
+varying vec2 fragTexCoord;
+varying vec4 fragColor;
+uniform sampler2D texture0;
+void main() {
+    float distance = texture2D(texture0, fragTexCoord).a - 0.5;
+    float change = length(vec2(dFdx(distance), dFdy(distance)));
+    gl_FragColor = vec4(fragColor.rgb, fragColor.a * smoothstep(-change, change, distance));
+}
+"""
+else:
+    SDF_FRAGMENT_SHADER = """#version 330
+in vec2 fragTexCoord;
+in vec4 fragColor;
+uniform sampler2D texture0;
+out vec4 finalColor;
+void main() {
+    float distance = texture(texture0, fragTexCoord).a - 0.5;
+    float change = length(vec2(dFdx(distance), dFdy(distance)));
+    finalColor = vec4(fragColor.rgb, fragColor.a * smoothstep(-change, change, distance));
+}
+"""
+
+_sdf_fonts = set()  # loaded SDF variants, which are drawn with the SDF shader
+_sdf_shader = None
+
+
+def get_font_key(file_name, size):
+    """Returns the asset key of the variant of a font file used to draw text at the given size."""
+    return f"{file_name}@sdf" if size >= FONT_SDF_MIN_SIZE else f"{file_name}@{size}"
+
+
+def get_font_file(key):
+    """Returns the font file name of an asset key, with or without a variant."""
+    return key.partition("@")[0]
+
+
+def decode_font_variant(key, path):
+    """
+    Rasterizes the glyphs of a font variant into a CPU-side atlas Image, without a GL context, so it can run on a
+    worker thread. Returns the data upload_font_variant() takes, or None for a key without a variant.
+    """
+    variant = key.partition("@")[2]
+    if not variant:
+        return None
+    sdf = variant == "sdf"
+    size = FONT_SDF_BASE_SIZE if sdf else int(variant)
+    codepoints = ffi.new("int[]", sorted({ord(character) for character in FONT_VARIANT_GLYPHS.get(key, FONT_GLYPHS_ASCII) + "?"}))
+
+    data_size = ffi.new("int *")
+    data = LoadFileData(path.encode(), data_size)
+    glyph_count = ffi.new("int *")
+    glyphs = LoadFontData(data, data_size[0], size, codepoints, len(codepoints), FONT_SDF if sdf else FONT_DEFAULT, glyph_count)
+    UnloadFileData(data)
+    # SDF glyphs carry their own margin; packed with the skyline method, which wastes less atlas space
+    padding = 0 if sdf else FONT_GLYPH_PADDING
+    recs = ffi.new("Rectangle **")
+    atlas = GenImageFontAtlas(glyphs, recs, glyph_count[0], size, padding, 1)
+    return size, glyph_count[0], padding, atlas, recs[0], glyphs, sdf
+
+
+def upload_font_variant(key, path, decoded):
+    """Creates the font from the data of decode_font_variant(), or loads the font file if it was None. Main thread only."""
+    if decoded is None:
+        return load_font(path)
+    size, glyph_count, padding, atlas, recs, glyphs, sdf = decoded
+    texture = load_texture_from_image(atlas)
+    unload_image(atlas)
+    font = Font(size, glyph_count, padding, texture, recs, glyphs)
+    if sdf:
+        # The shader needs the distance between texels, not the nearest one
+        set_texture_filter(font.texture, TEXTURE_FILTER_BILINEAR)
+        _sdf_fonts.add(font)
+    return font
+
+
+def load_font_variant(key, path):
+    """
+    Loads the font of an asset key from the font file at path: the variant's size and characters for a key with
+    a variant (see the module docstring), otherwise the file at raylib's default size like load_font().
+    """
+    return upload_font_variant(key, path, decode_font_variant(key, path))
+
+
+def unload_font_variant(font):
+    """Unloads a font loaded by load_font_variant()."""
+    _sdf_fonts.discard(font)
+    unload_font(font)
+
+
+def get_font_shader(font):
+    """Returns the shader a font has to be drawn with (the SDF shader for SDF variants), or None."""
+    global _sdf_shader
+    if font not in _sdf_fonts:
+        return None
+    if _sdf_shader is None:
+        _sdf_shader = load_shader_from_memory(None, SDF_FRAGMENT_SHADER)
+    return _sdf_shader
+
+
+def draw_font_text(font, text, position, font_size, spacing, tint):
+    """Draws text like draw_text_ex(), with the shader of its font (see get_font_shader())."""
+    shader = get_font_shader(font)
+    if shader is not None:
+        begin_shader_mode(shader)
+    draw_text_ex(font, text, position, font_size, spacing, tint)
+    if shader is not None:
+        end_shader_mode()
+
+
+def unload_font_shaders():
+    """Unloads the SDF shader, if it was loaded. Call before the window is closed."""
+    global _sdf_shader
+    if _sdf_shader is not None:
+        unload_shader(_sdf_shader)
+        _sdf_shader = None
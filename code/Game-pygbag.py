@@ -1,4 +1,17 @@
 from Sprites import *
+from AsteroidField import *
+from Broadphase import *
+from Narrowphase import *
+from ObjectPool import ObjectPool
+from MyTimer import Scheduler, wall_clock_scheduler
+from SimulationClock import SimulationClock
+from Profiler import *
+from RenderQueue import *
+from HudCompositor import *
+from AssetLoader import AssetLoader, GAMEPLAY_ASSET_MANIFEST, MENU_ASSET_MANIFEST
+from time import perf_counter
+from Backend import get_backend_name
+from Replay import ReplayRecorder, pack_input, unpack_input
 from WeatherApi import *
 from Menu import *
 from random import *
@@ -6,6 +19,34 @@ from InputBox import *
 from GameSaver import *
 from GameSaver import saved_data
 import asyncio
+import sys
+import zlib
+
+
+# Weighted spawn tables: repeated entries are picked more often
+TREASURE_VARIATIONS = (
+    "diamond.png",
+    "emerald.png",
+    "emerald.png",
+    "ruby.png",
+    "iron.png",
+    "iron.png",
+    "iron.png",
+    "iron.png",
+    "emerald.png",
+    "ruby.png",
+    "iron.png",
+)
+POWER_UP_VARIATIONS = ("O2", "O2", "O2", "O2", "O2", "HP", "HP", "HP", "Ammo", "Ammo", "Ammo", "Ammo", "Ammo")
+# With fewer live asteroids than this, every pair is tested directly: building the collision grid costs more than it saves
+COLLISION_GRID_MIN_ASTEROIDS = 64
+
+# Scratch rectangles of the loading screen, its picture stretched over the window and the progress bar under it
+_loading_source = Rectangle(0, 0, 0, 0)
+_loading_dest = Rectangle(0, 0, WINDOW_WIDTH, WINDOW_HEIGHT)
+_loading_origin = Vector2(0, 0)
+_progress_bar = Rectangle(WINDOW_WIDTH / 2 - 400, WINDOW_HEIGHT - 140, 800, 40)
+_progress_fill = Rectangle(_progress_bar.x, _progress_bar.y, 0, _progress_bar.height)
 
 
 class SpaceGame:
@@ -18,7 +59,28 @@ class SpaceGame:
     fiery ones.
     """
 
-    def __init__(self, city="Default", difficulty_temp=65, difficulty_wdsp=load_gamesave_file()["City wind speed range"]):
+    def __init__(
+        self,
+        city="Default",
+        difficulty_temp=65,
+        difficulty_wdsp=load_gamesave_file()["City wind speed range"],
+        swarm=False,
+        tick_rate=SIMULATION_TICK_RATE,
+        seed=None,
+    ):
+
+        # The game simulation advances in fixed ticks, separate from rendering.
+        # The simulation clock turns frame time into ticks (and can pause or scale time); drawing interpolates between the last two ticks.
+        self._simulation_clock = SimulationClock(tick_rate)  # restarts from 0 with every game
+        self._time_scale = 1.0  # time scale chosen with set_time_scale(), before the freeze slow motion
+        self._scheduler = Scheduler(self._simulation_clock.get_time)  # game timers, run once per simulation tick
+
+        # Every subsystem draws from its own random generator, all derived from one seed, so a seeded game is reproducible
+        self.seed_random(seed)
+
+        # Input recording (see Replay.py); a recording starts with each game while a record path is set
+        self._record_path = None
+        self._recorder = None
 
         # Creates the outerspace game background
         self._stars_list = []
@@ -38,22 +100,75 @@ class SpaceGame:
         # Progressive difficulty spawning and speed range difficulty cycles
         self._asteroid_spawning_level = 0
         self._asteroid_speed_level = 0
-        self._asteroid_spawn_increase_timer = Timer(4, True, False, self.capped_asteroid_spawn_timer)
-        self._asteroid_speed_increase_timer = Timer(10, True, False, self.capped_asteroid_speed_timer)
+        # The spawn level goes up first; once it's maxed out, the spawn timer hands over to the speed timer
+        self._asteroid_spawn_increase_timer = Timer(4, True, True, self.capped_asteroid_spawn_timer, self._scheduler)
+        self._asteroid_speed_increase_timer = Timer(10, True, False, self.capped_asteroid_speed_timer, self._scheduler)
 
         # Game entity storage
-        self._asteroids_list = []
-        self._max_asteroids = 6
-        self._power_ups = []  # list of powerup objects
-        self._treasure = []  # list of treasure objects
+        # Swarm mode fills the screen with thousands of asteroids, refilling the whole deficit every frame
+        self._swarm_mode = swarm
+        if self._swarm_mode:
+            self._base_max_asteroids = SWARM_MAX_ASTEROIDS
+            self._asteroid_spawn_batch = SWARM_MAX_ASTEROIDS
+            self._asteroid_field = AsteroidField(SWARM_MAX_ASTEROIDS, self._asteroid_rng)
+        else:
+            # 6 asteroids to start with, plus 2 for each of the 7 spawning levels
+            self._base_max_asteroids = 6
+            self._asteroid_spawn_batch = 1
+            self._asteroid_field = AsteroidField(6 + 2 * 7, self._asteroid_rng)
+        self._max_asteroids = self._base_max_asteroids
+        self._collision_grid = SpatialGrid()  # broadphase rebuilt every frame before the collision checks
+        self._grid_lasers = []  # lasers checked for collisions this frame, indexed by their grid id
+        self._grid_built = False  # True if the collision checks of this frame go through the collision grid
+
+        # Powerups and treasure are reused from fixed-size pools, so spawning them during gameplay doesn't allocate.
+        # Based on the powerup type, have a spawn rate, spawn area ((min x, max x), (min y, max y)),
+        # direction of movement, class, and pool. Only one powerup of each type can be on screen at a time.
+        pwrup_speed = 300
+        self._power_up_stats = {
+            "O2": {
+                "class": O2_PowerUP,
+                "rarity": 13,
+                "pos": ((20, WINDOW_WIDTH - 60), (-1500, -500)),
+                "direction": (0, 1),
+            },
+            "Ammo": {
+                "class": Ammo_PowerUP,
+                "rarity": 4,
+                "pos": ((-3000, -500), (20, WINDOW_HEIGHT - 60)),
+                "direction": (1, 0),
+            },
+            "HP": {
+                "class": HeartCapsule_PowerUP,
+                "rarity": 1,
+                "pos": ((WINDOW_WIDTH, 3000), (20, WINDOW_HEIGHT - 60)),
+                "direction": (-1, 0),
+            },
+        }
+        shared_pool = None
+        for stats in self._power_up_stats.values():
+            stats["pool"] = ObjectPool(
+                lambda stats=stats: stats["class"]((0, 0), pwrup_speed, stats["direction"]), 1, shared_with=shared_pool
+            )
+            shared_pool = shared_pool or stats["pool"]
+        self._power_ups = shared_pool.get_active()  # list of powerup objects, shared by the three powerup pools
+        self._treasure_pool = ObjectPool(lambda: Treasure((0, 0), 200, (0, 1)), 1)
+        self._treasure = self._treasure_pool.get_active()  # list of treasure objects
 
         # Core game component objects
-        self._player = Spaceship()
-        self._game_clock = Clock(game_assets.get_asset_font("slkscr.ttf"))
+        self._player = Spaceship(scheduler=self._scheduler)
+        self._game_clock = Clock(game_assets.get_lazy_font("slkscr.ttf", FONT_SIZE), scheduler=self._scheduler)
+        # Everything the HUD compositor draws: the player's hearts, ammo, oxygen and points, then the clock
+        self._hud_elements = self._player.get_hud_elements() + (self._game_clock,)
         self._menu = Menu()  # integrates menu system used by the game
+        self._asset_loader = None  # streams in the gameplay assets while the loading screen is shown
+        self._startup_loader = None  # streams in the menu assets before the main menu, see set_startup_loader()
+        self._asset_profiler = None  # AssetUsageProfiler recording the assets of every state, see set_asset_profiler()
+        self._profiler = FrameProfiler()  # per-phase frame timings, shown with F3 during a game
 
         # Audio management
-        self._game_music = game_assets.get_asset_music("game_music.ogg")
+        # Held for the whole game, so the asset cache never evicts the stream while it plays
+        self._game_music = game_assets.acquire_asset("music", "game_music.ogg")
         set_music_volume(self._game_music, 0.4)
         self._is_music_playing = False
 
@@ -79,8 +194,10 @@ class SpaceGame:
 
         # Input box positioned near difficulty button for city input
         self._user_input_box = InputBox(
-            Vector2(WINDOW_WIDTH / 2 - 300, 365), game_assets.get_asset_font("slkscr.ttf"), 40, 600, 80, 18, RED, WHITE, BLACK
+            Vector2(WINDOW_WIDTH / 2 - 300, 365), game_assets.get_lazy_font("slkscr.ttf", 40), 40, 600, 80, 18, RED, WHITE, BLACK
         )
+        # The input box is part of the options screen, shown once the difficulty button is clicked
+        self._menu.get_screen_tree("options").add(self._user_input_box)
 
         # Game Screen Transitioning
         self._screens = {
@@ -90,8 +207,54 @@ class SpaceGame:
             "options": self.handle_options_menu,
             "start_game": self.handle_start_game,
             "loading_screen": self.handle_loading_screen,
+            "startup_loading": self.handle_startup_loading_screen,
         }
 
+    def seed_random(self, seed=None):
+        """
+        Creates the random generators of every subsystem (asteroids, power-ups, treasure, stars, leaderboard names)
+        from one seed, so the same seed and the same input always play out the same game.
+        A random seed is picked if none is given. Returns the seed used.
+        """
+        if seed is None:
+            seed = int(np.random.SeedSequence().entropy % 2**63)
+        self._seed = seed
+        asteroid_seed, power_up_seed, treasure_seed, star_seed, name_seed = np.random.SeedSequence(seed).spawn(5)
+        self._asteroid_rng = np.random.default_rng(asteroid_seed)
+        self._power_up_rng = Random(int(power_up_seed.generate_state(1)[0]))
+        self._treasure_rng = Random(int(treasure_seed.generate_state(1)[0]))
+        self._star_rng = Random(int(star_seed.generate_state(1)[0]))
+        self._name_rng = Random(int(name_seed.generate_state(1)[0]))
+        if hasattr(self, "_asteroid_field"):
+            self._asteroid_field.set_rng(self._asteroid_rng)
+        return seed
+
+    def get_seed(self):
+        """Returns the seed the random generators were created from."""
+        return self._seed
+
+    def get_simulation_time(self):
+        """Returns the simulated seconds since the current game started."""
+        return self._simulation_clock.get_time()
+
+    def set_time_scale(self, time_scale):
+        """
+        Sets how fast the game runs compared to real time, e.g. 0.5 for slow motion or 50 to fast-forward
+        a headless run. The freeze slow motion applies on top of it.
+        """
+        self._time_scale = time_scale
+        self._simulation_clock.set_time_scale(time_scale)
+
+    def toggle_pause(self):
+        """Pauses or resumes the game. A paused game runs no simulation ticks and pauses the music."""
+        clock = self._simulation_clock
+        if clock.is_paused():
+            clock.resume()
+            resume_music_stream(self._game_music)
+        else:
+            clock.pause()
+            pause_music_stream(self._game_music)
+
     def start_music(self):
         """Starts the game music if it's not already playing."""
         if not self._is_music_playing:
@@ -127,7 +290,14 @@ class SpaceGame:
     def collect_item(self, item, collect_sfx):
         """Helper function to handle power-up collection effects and audio."""
         self.play_collection_sfx(collect_sfx)
-        self._power_ups.remove(item)
+        self.remove_power_up(item)
+
+    def remove_power_up(self, power_up):
+        """Removes a power-up from the screen and returns it to its pool."""
+        for stats in self._power_up_stats.values():
+            if stats["pool"].owns(power_up):
+                stats["pool"].release(power_up)
+                return
 
     def play_collection_sfx(self, collect_sfx):
         sound = game_assets.get_asset_sound(collect_sfx)
@@ -136,7 +306,7 @@ class SpaceGame:
 
     def update_leaderboard_list(self):
         """Save player score and time lasted to leaderboard."""
-        random_name = "".join(choices(self._char_string, k=4))
+        random_name = "".join(self._name_rng.choices(self._char_string, k=4))
         score = self._player._score_tracker.get_current_points()
         time = self._game_clock.get_current_time()
         self.add_to_leaderboard_list(random_name, score, time)
@@ -158,8 +328,8 @@ class SpaceGame:
 
     def reset_asteroids(self):
         """Clears the asteroids on screen and resets asteroid spawn cap."""
-        self._asteroids_list.clear()
-        self._max_asteroids = 6
+        self._asteroid_field.clear()
+        self._max_asteroids = self._base_max_asteroids
 
     def reset_difficulty(self):
         """
@@ -173,13 +343,14 @@ class SpaceGame:
         self._asteroid_speed_level = 0
 
         # Recalibrate the timing of spawn difficulty increase before the speed difficulty increase
-        self._asteroid_spawn_increase_timer = Timer(4, True, False, self.capped_asteroid_spawn_timer)
-        self._asteroid_speed_increase_timer = Timer(10, True, False, self.capped_asteroid_speed_timer)
+        self._asteroid_speed_increase_timer.deactivate()
+        self._asteroid_spawn_increase_timer.activate()
 
     def clear_collectibles(self):
-        """Clears all powerups and treasure objects."""
-        self._power_ups.clear()
-        self._treasure.clear()
+        """Clears all powerups and treasure objects, returning them to their pools."""
+        for stats in self._power_up_stats.values():
+            stats["pool"].release_all()
+        self._treasure_pool.release_all()
 
     def set_to_death_screen(self):
         """Update menu state flags to set the screen to the death screen."""
@@ -194,6 +365,8 @@ class SpaceGame:
         # push the death menu state
         self._menu._menu_state_stack.pop()
         self._menu._menu_state_stack.push("death_menu")
+        # The HUD isn't drawn in the menus
+        hud_compositor.unload()
 
     def reset_game(self):
         """
@@ -202,7 +375,11 @@ class SpaceGame:
         based on score. Reset players data, clear all asteroids and collectibles that spawned,
         reset to the game's starting difficulty.
         """
+        self.stop_recording()
         self.update_leaderboard_list()
+        # Simulation time restarts from 0, so every timer is restarted by the resets below
+        self._simulation_clock.reset()
+        self._scheduler.clear()
         self.reset_background()
         self.reset_asteroids()
         self.reset_difficulty()
@@ -232,59 +409,71 @@ class SpaceGame:
         """
         if self._asteroid_spawning_level < 7:
             self._asteroid_spawning_level += 1
-            self._max_asteroids += 2
+            # Swarm mode is already at its cap, so only the level advances
+            if not self._swarm_mode:
+                self._max_asteroids += 2
+        if self._asteroid_spawning_level == 7:
+            self.initiate_asteroid_speed_mechanics()
 
-    def initiate_asteroid_spawning_mechanics(self):
+    def initiate_asteroid_speed_mechanics(self):
         """
-        Controls the difficulty progression system. First increases asteroid count,
-        then transitions to increasing asteroid speed after count reaches maximum.
+        Controls the difficulty progression system. The asteroid count increases first,
+        then once it reaches its maximum the spawn timer stops and the speed timer starts.
         This creates a two-phase difficulty curve.
         """
         # Only start increasing speed after max spawn level is reached
-        if self._asteroid_spawning_level == 7:
-            self._asteroid_speed_increase_timer.active = True
-            self._asteroid_speed_increase_timer.update()
-        else:
-            self._asteroid_spawn_increase_timer.active = True
-            self._asteroid_spawn_increase_timer.update()
+        self._asteroid_spawn_increase_timer.deactivate()
+        self._asteroid_speed_increase_timer.activate()
 
     def make_stars(self):
         """Generates stars at random positions"""
         for i in range(50):
-            random_star_pos = Vector2(randint(0, WINDOW_WIDTH), randint(0, WINDOW_HEIGHT))
+            random_star_pos = (self._star_rng.randint(0, WINDOW_WIDTH), self._star_rng.randint(0, WINDOW_HEIGHT))
             self._stars_list.append(
-                Star(game_assets.get_asset_texture("star.png"), random_star_pos, 0, Vector2(15, 15), Vector2(0, 0))
+                Star(game_atlas.get_region("star.png"), random_star_pos, 0, (15, 15), (0, 0), self._star_rng.randint(0, 12))
             )
 
-    def draw_outer_space(self):
+    def update_outer_space(self, dt):
         """Manages the twinkling stars background effect."""
         for star in self._stars_list:
-            star.dynamically_grow()
-            star.movement_update(Vector2(0, 0), 0, Vector2(0, 0), WHITE)
+            star.dynamically_grow(dt)
 
-    def draw_treasure(self):
+    def draw_outer_space(self):
+        """Draws the twinkling stars background."""
+        for star in self._stars_list:
+            star.draw()
+
+    def update_treasure(self, dt):
         """
         Spawns treasure with value-weighted randomness.
         Common items (iron) appear more frequently than rare items (diamonds).
         Treasures fall vertically through space.
         """
         self.create_treasure()
-        self.handle_treasure_deletion()
+        self.handle_treasure_deletion(dt)
+
+    def draw_treasure(self, alpha):
+        """Draws the treasure on screen."""
+        for treasure in self._treasure:
+            treasure.draw(0, WHITE, alpha)
 
-    def draw_asteroids(self):
+    def update_asteroids(self, dt):
         """
         Spawns and manages asteroids with type probabilities determined
         by temperature. Different asteroid types imply unique behaviors:
         fiery (more damage), icy (freezing effect), and normal.
-        Asteroids rotate as they move across screen
+        Asteroids rotate as they move across screen. Every step runs once
+        for the whole asteroid field rather than once per asteroid.
         """
         self.create_asteroids()
-        for asteroid in self._asteroids_list[:]:
-            asteroid.dynamically_rotate()
-            asteroid.project_asteroid()
+        self._asteroid_field.update(dt)
         self.handle_asteroid_deletion()
 
-    def draw_power_ups(self):
+    def draw_asteroids(self, alpha):
+        """Draws the asteroid field, interpolated between the last two ticks. The field draws itself in one batch."""
+        render_queue.add(RENDER_LAYER_ASTEROIDS, self._asteroid_field.draw, alpha)
+
+    def update_power_ups(self, dt):
         """
         Spawns power-ups with weighted probabilities based on usefulness.
         Each power-up type has unique spawn locations and movement patterns:
@@ -296,78 +485,37 @@ class SpaceGame:
         """
 
         self.create_power_up()
-        self.handle_power_up_deletion()
+        self.handle_power_up_deletion(dt)
+
+    def draw_power_ups(self, alpha):
+        """Draws the power-ups on screen."""
+        for power_up in self._power_ups:
+            power_up.draw(0, WHITE, alpha)
 
     def create_treasure(self):
         """
         Adds treasure if there isn't already one on the screen.
         The treasure is selected with weighted randomness to favor common items.
         """
-        treasure_variations = choice(
-            [
-                "diamond.png",
-                "emerald.png",
-                "emerald.png",
-                "ruby.png",
-                "iron.png",
-                "iron.png",
-                "iron.png",
-                "iron.png",
-                "emerald.png",
-                "ruby.png",
-                "iron.png",
-            ]
-        )
-        treasure_speed = 200
-        if len(self._treasure) < 1:
-            random_treasure_pos = Vector2(randint(20, WINDOW_WIDTH - 60), randint(-4000, -1000))
-            treasure_direction = Vector2(0, 1)
-            treasure = Treasure(random_treasure_pos, treasure_speed, treasure_direction)
-            treasure.set_texture(game_assets.get_asset_texture(treasure_variations))
-            # Add to treasure list for spawning
-            self._treasure += [treasure]
-
-    def create_single_asteroid(self):
-        """Creates a single asteroid to add to asteroid list."""
-        random_asteroid_pos = Vector2(randint(-15, WINDOW_WIDTH + 30), randint(-100, -50))
-        random_asteroid_speed = randint(self._max_speed_range_custom[0], self._max_speed_range_custom[1])
-        random_asteroid_direction = Vector2(randint(-1, 1), 1)
-
-        # Get asteroid_type distributions
-        type_chances = self.determine_asteroids_temperature_chance()
-
-        # Weighted selection of asteroid type
-        asteroid_type = choices(
-            ["normal", "icy", "fiery"], weights=[type_chances["normal"], type_chances["icy"], type_chances["fiery"]], k=1
-        )[0]
-
-        # Create asteroid based on determined type
-        if asteroid_type == "fiery":
-            current_asteroid = Asteroid(
-                random_asteroid_pos,
-                random_asteroid_speed,
-                random_asteroid_direction,
-                Vector2(101, 84),
-                game_assets.get_asset_texture("fiery_meteor.png"),
-            )
-        elif asteroid_type == "icy":
-            current_asteroid = Asteroid(
-                random_asteroid_pos,
-                random_asteroid_speed,
-                random_asteroid_direction,
-                Vector2(101, 84),
-                game_assets.get_asset_texture("icy_meteor.png"),
-            )
-        else:
-            current_asteroid = Asteroid(random_asteroid_pos, random_asteroid_speed, random_asteroid_direction)
-        self._asteroids_list += [current_asteroid]
+        treasure_variations = self._treasure_rng.choice(TREASURE_VARIATIONS)
+        treasure = self._treasure_pool.acquire()
+        if treasure is not None:
+            # Reuse the pooled treasure, which adds it to the treasure list for spawning
+            treasure.respawn(self._treasure_rng.randint(20, WINDOW_WIDTH - 60), self._treasure_rng.randint(-4000, -1000), 200)
+            treasure.set_texture(game_atlas.get_region(treasure_variations))
 
     def create_asteroids(self):
         """
-        Adds asteroid as long as max hasn't been reached yet.
+        Adds asteroids as long as max hasn't been reached yet. Normal games add one asteroid
+        per simulation tick; swarm mode refills the whole deficit in a single batch.
         """
-        if len(self._asteroids_list) < self._max_asteroids:
-            self.create_single_asteroid()
+        missing_asteroids = self._max_asteroids - self._asteroid_field.get_count()
+        if missing_asteroids > 0:
+            self._asteroid_field.spawn(
+                min(missing_asteroids, self._asteroid_spawn_batch),
+                self._max_speed_range_custom,
+                self.determine_asteroids_temperature_chance(),
+            )
 
     def create_power_up(self):
         """
@@ -381,82 +529,60 @@ class SpaceGame:
         - HP: Health power-up, moves from right to left.
         This method handles the creation and addition of a new power-up to the game.
         """
-        select_pwrup = choice(["O2", "O2", "O2", "O2", "O2", "HP", "HP", "HP", "Ammo", "Ammo", "Ammo", "Ammo", "Ammo"])
-        pwrup_speed = 300
-
-        # Based on the powerup type, have a spawn rate, position and direction of movement, and class
-        self._power_up_stats = {
-            "O2": {
-                "class": O2_PowerUP,
-                "rarity": 13,
-                "pos": Vector2(randint(20, WINDOW_WIDTH - 60), randint(-1500, -500)),
-                "direction": Vector2(0, 1),
-            },
-            "Ammo": {
-                "class": Ammo_PowerUP,
-                "rarity": 4,
-                "pos": Vector2(randint(-3000, -500), randint(20, WINDOW_HEIGHT - 60)),
-                "direction": Vector2(1, 0),
-            },
-            "HP": {
-                "class": HeartCapsule_PowerUP,
-                "rarity": 1,
-                "pos": Vector2(randint(WINDOW_WIDTH, 3000), randint(20, WINDOW_HEIGHT - 60)),
-                "direction": Vector2(-1, 0),
-            },
-        }
+        select_pwrup = self._power_up_rng.choice(POWER_UP_VARIATIONS)
 
-        # Ensure only one power-up of the selected type is on screen at a time
-        if len(self._power_ups) < 1 and not any(
-            isinstance(pwrup, self._power_up_stats[select_pwrup]["class"]) for pwrup in self._power_ups
-        ):
+        # Ensure only one power-up is on screen at a time; each type's pool holds a single power-up
+        if len(self._power_ups) < 1:
             select_pwrup_stats = self._power_up_stats[select_pwrup]
-            self._power_ups.append(
-                select_pwrup_stats["class"](select_pwrup_stats["pos"], pwrup_speed, select_pwrup_stats["direction"])
-            )
-
-    def handle_treasure_deletion(self):
+            power_up = select_pwrup_stats["pool"].acquire()
+            if power_up is not None:
+                (min_x, max_x), (min_y, max_y) = select_pwrup_stats["pos"]
+                power_up.respawn(
+                    self._power_up_rng.randint(min_x, max_x), self._power_up_rng.randint(min_y, max_y), power_up.get_speed()
+                )
+                if isinstance(power_up, O2_PowerUP):
+                    # A reused oxygen tank has to be shot open again
+                    power_up.change_lock_status(True)
+
+    def handle_treasure_deletion(self, dt):
         """
         Updates the position of each treasure as it falls and removes it if it falls off the screen.
         """
-        for treasure in self._treasure[:]:
+        # walk backwards since removing a treasure swaps the last treasure into its place
+        for index in range(len(self._treasure) - 1, -1, -1):
+            treasure = self._treasure[index]
             # remove treasure objects as they exit the sides of the screens
-            treasure.movement_update(treasure.get_direction(), 0, Vector2(0, 0), WHITE)
-            pos = treasure.get_position()
-            if pos.y > WINDOW_HEIGHT:
-                self._treasure.remove(treasure)
+            treasure.update_pos(dt)
+            if treasure.get_y() > WINDOW_HEIGHT:
+                self._treasure_pool.release(treasure)
 
     def handle_asteroid_deletion(self):
         """
-        Updates the position of each asteroid as it falls
-        and removes it if it falls off the screen.
+        Removes every asteroid that fell off the screen or was destroyed
+        in a single batched pass over the asteroid field.
         """
-        for asteroid in self._asteroids_list[:]:
+        self._asteroid_field.cull()
 
-            # Update asteroid position
-            pos = asteroid.get_position()
-            if pos.y > WINDOW_HEIGHT or (pos.x < -15 or pos.x > WINDOW_WIDTH + 30):
-                self._asteroids_list.remove(asteroid)
-
-    def handle_power_up_deletion(self):
+    def handle_power_up_deletion(self, dt):
         """
         Updates the position of each power differently based on type.
         remove powerup if it goes off the screen.
         """
-        for power_up in self._power_ups[:]:
+        # walk backwards since removing a powerup swaps the last powerup into its place
+        for index in range(len(self._power_ups) - 1, -1, -1):
+            power_up = self._power_ups[index]
             # Note: Movement update of each power_up is initilized differently to change movement
-            power_up.movement_update(power_up.get_direction(), 0, Vector2(0, 0), WHITE)
-            pos = power_up.get_position()
+            power_up.update_pos(dt)
 
             if isinstance(power_up, O2_PowerUP):
-                if pos.y > WINDOW_HEIGHT:
-                    self._power_ups.remove(power_up)
+                if power_up.get_y() > WINDOW_HEIGHT:
+                    self.remove_power_up(power_up)
             elif isinstance(power_up, Ammo_PowerUP):
-                if pos.x > WINDOW_WIDTH:
-                    self._power_ups.remove(power_up)
+                if power_up.get_x() > WINDOW_WIDTH:
+                    self.remove_power_up(power_up)
             elif isinstance(power_up, HeartCapsule_PowerUP):
-                if pos.x < -15:
-                    self._power_ups.remove(power_up)
+                if power_up.get_x() < -15:
+                    self.remove_power_up(power_up)
 
     def determine_asteroids_temperature_chance(self):
         """
@@ -477,19 +603,19 @@ class SpaceGame:
                 break
         return chances
 
-    def deal_player_damage(self, texture):
+    def deal_player_damage(self, asteroid_type):
         """
-        Damage player based on asteroid texture.
+        Damage player based on asteroid type.
         Reset score multiplier for player.
         """
         # Fiery meteors deal triple damage
-        if texture == game_assets.get_asset_texture("fiery_meteor.png"):
+        if asteroid_type == ASTEROID_FIERY:
             for i in range(3):
                 self._player.take_damage()
             self.play_damage_sfx()
 
         # Icy meteors freeze player and deal single damage
-        elif texture == game_assets.get_asset_texture("icy_meteor.png"):
+        elif asteroid_type == ASTEROID_ICY:
             self._player.freeze_player()
             self._player.take_damage()
 
@@ -502,22 +628,21 @@ class SpaceGame:
     def check_player_death(self):
         """
         End the game if player runs out of oxygen or dies from
-        getting hit by asteroids. Reset the game if necessary
+        getting hit by asteroids. Reset the game if necessary.
+        Returns True if the game was reset.
         """
         if self._player._oxygen_meter.get_current_oxygen_level() == 0 or self._player._current_health == 0:
             self.reset_game()
+            return True
+        return False
 
-    def create_asteroid_hitbox(self, asteroid):
+    def create_asteroid_hitbox(self, index):
         """
-        Creates a rectangular collision box for an asteroid.
+        Creates a rectangular collision box for the asteroid at the given field index.
         Returns the Rectangle object used for the hitbox.
         """
-        asteroid_hitbox = Rectangle(
-            asteroid.get_position().x - asteroid._sprite_texture.width / 2,
-            asteroid.get_position().y - asteroid._sprite_texture.width / 2,
-            asteroid.get_size().x,
-            asteroid.get_size().y,
-        )
+        x, y = self._asteroid_field.get_positions()[index].tolist()
+        asteroid_hitbox = Rectangle(x - ASTEROID_SIZE[0] / 2, y - ASTEROID_SIZE[0] / 2, ASTEROID_SIZE[0], ASTEROID_SIZE[1])
         return asteroid_hitbox
 
     def create_player_hitbox(self):
@@ -525,9 +650,7 @@ class SpaceGame:
         Creates a rectangular collision box for an player.
         Returns the Rectangle object used for the hitbox.
         """
-        player_hitbox = Rectangle(
-            self._player.get_position().x, self._player.get_position().y, self._player.get_size().x, self._player.get_size().y
-        )
+        player_hitbox = Rectangle(self._player.get_x(), self._player.get_y(), self._player.get_width(), self._player.get_height())
         return player_hitbox
 
     def get_player_triangle_data(self, player):
@@ -541,51 +664,56 @@ class SpaceGame:
         v3 = Vector2(player_hitbox.x + player_hitbox.width, player_hitbox.y + player_hitbox.height)
         return (v1, v2, v3)
 
-    def get_asteroid_cicle_data(self, asteroid):
+    def get_asteroid_cicle_data(self, indices):
         """
-        Returns the center and radius of asteroid as a tuple.
-        Tuple is used to track the radius and center
-        needed to simulate a circular collision box.
+        Returns the centers and radius of the asteroids at the given field indices as a tuple
+        of (center_x, center_y, radius). Used to test all of the asteroids' circular collision boxes at once.
         """
-        center = Vector2(int(asteroid.get_position().x), int(asteroid.get_position().y))
-        radius = asteroid.get_size().x / 2
-        return (center, radius)
+        # Centers are truncated to whole pixels like the single-asteroid Vector2 hitboxes were
+        centers = np.trunc(self._asteroid_field.get_positions()[indices])
+        return (centers[:, 0], centers[:, 1], self._asteroid_field.get_radius())
 
-    def check_asteroid_player_collision(self, asteroid):
+    def check_asteroid_player_collision(self, indices):
         """
-        Checks if the asteroid collides with the player. Uses A
-        circle hitbox detection for the asteroid with any side of the player triangular hitbox sides.
+        Checks which of the given asteroids collide with the player. Uses A
+        circle hitbox detection for the asteroids with any side of the player triangular hitbox sides,
+        tested for every asteroid in one batch.
         Hit by regular asteroid: player damage.
         hit by icy asteroid: deal some damage and freeze player for a period of time.
         Hit by firey asteroid: extra player damage.
         For every hit, reset score multiplier for the player and
-        remove asteroid from the asteroid list.
+        remove asteroid from the asteroid field.
         """
-        center, radius = self.get_asteroid_cicle_data(asteroid)
+        if len(indices) == 0:
+            return
+        center_x, center_y, radius = self.get_asteroid_cicle_data(indices)
 
         # Vertices for the player hitbox triangle sides
         v1, v2, v3 = self.get_player_triangle_data(self._player)
 
         # Triangle-circle collision detection for player-asteroid hit
-        if (
-            check_collision_circle_line(center, radius, v1, v2)
-            or check_collision_circle_line(center, radius, v1, v3)
-            or check_collision_circle_line(center, radius, v2, v3)
-        ):
+        hits = indices[circles_hit_triangle(center_x, center_y, radius, (v1.x, v1.y), (v2.x, v2.y), (v3.x, v3.y))]
+        for index in hits.tolist():
             self._player.get_player_points().reset_multiplier()
-            self.deal_player_damage(asteroid.get_texture())
-            self._asteroids_list.remove(asteroid)
+            self.deal_player_damage(int(self._asteroid_field.get_type_ids()[index]))
+            self._asteroid_field.kill(index)
 
-    def check_asteroid_laser_collision(self, asteroid):
+    def check_asteroid_laser_collision(self, indices, lasers):
         """
-        Checks if any of the player's lasers collide with the asteroid.
-        If so, the laser is destroyed.
+        Checks which of the given lasers collide with any of the given asteroids, testing every pair in one batch.
+        Each laser that hits an asteroid is destroyed.
         """
-        center, radius = self.get_asteroid_cicle_data(asteroid)
-        for laser in self._player.get_lasers():
-            laser_hitbox = Rectangle(laser.get_position().x, laser.get_position().y, laser.get_size().x, laser.get_size().y)
-            if check_collision_circle_rec(center, radius, laser_hitbox):
-                self._player._laser_projectiles.remove(laser)
+        if len(indices) == 0 or len(lasers) == 0:
+            return
+        center_x, center_y, radius = self.get_asteroid_cicle_data(indices)
+        laser_boxes = np.array(
+            [(laser.get_x(), laser.get_y(), laser.get_width(), laser.get_height()) for laser in lasers]
+        )
+        hit_asteroids, hit_lasers = circles_hit_rects(
+            center_x, center_y, radius, laser_boxes[:, 0], laser_boxes[:, 1], laser_boxes[:, 2], laser_boxes[:, 3]
+        )
+        for laser_index in np.unique(hit_lasers).tolist():
+            self._player.remove_laser(lasers[laser_index])
 
     def check_player_powerup_collision(self, powerup):
         """
@@ -605,16 +733,19 @@ class SpaceGame:
             # O2 requires unlocking first (shoot to unlock
             self.increase_player_stats(powerup)
 
-    def check_laser_O2_powerup_collision(self, powerup):
+    def check_laser_O2_powerup_collision(self, powerup, lasers):
         """
-        Checks if any of the player's lasers collide with the cased O2 Powerup.
+        Checks if any of the given lasers near the powerup collide with the cased O2 Powerup.
         If so, the laser is destroyed and the O2 Powerup is unlocked for the player
         to collect the oxygen.
         """
         # Create player hitboxes for collision detection
         power_up_hitbox = self.create_power_up_hitbox(powerup)
-        for laser in self._player.get_lasers():
-            laser_hitbox = Rectangle(laser.get_position().x, laser.get_position().y, laser.get_size().x, laser.get_size().y)
+        for laser in lasers:
+            # The laser may already have been destroyed by an asteroid this frame
+            if laser not in self._player.get_lasers():
+                continue
+            laser_hitbox = self.create_laser_hitbox(laser)
 
             if (
                 isinstance(powerup, O2_PowerUP)
@@ -626,7 +757,7 @@ class SpaceGame:
                 play_sound(explosion)
                 # So that player can now collect oxygen bubble
                 powerup.change_lock_status(False)
-                self._player._laser_projectiles.remove(laser)
+                self._player.remove_laser(laser)
 
     def asteroid_collision_check(self):
         """
@@ -637,11 +768,61 @@ class SpaceGame:
         - Icy: Freezes player temporarily + moderate damage
         - Normal: Standard damage (2 hearts)
         If asteroids collide with the lasers, delete the laser, NOT the asteroid.
+        With the collision grid built, only asteroids it finds near the player or a laser get the exact checks;
+        otherwise every live asteroid does. The exact checks run as batched NumPy tests.
         """
+        if not self._grid_built:
+            self.check_few_asteroid_collisions()
+            return
 
-        for asteroid in self._asteroids_list:
-            self.check_asteroid_player_collision(asteroid)
-            self.check_asteroid_laser_collision(asteroid)
+        player_hitbox = self.create_player_hitbox()
+        # The triangle's tip sits 8 pixels above the player hitbox
+        self.check_asteroid_player_collision(
+            self._collision_grid.query_layer(
+                player_hitbox.x, player_hitbox.y - 8, player_hitbox.width, player_hitbox.height + 8, LAYER_ASTEROID
+            )
+        )
+
+        # Asteroids destroyed by the player this frame no longer block lasers
+        alive = self._asteroid_field.get_alive_mask()
+        if self._grid_lasers:
+            laser_boxes = get_sprite_boxes(self._grid_lasers)
+            candidates = np.unique(self._collision_grid.query_boxes(*laser_boxes, LAYER_ASTEROID)[2])
+            self.check_asteroid_laser_collision(candidates[alive[candidates]], self._grid_lasers)
+
+    def check_few_asteroid_collisions(self):
+        """
+        Asteroid collisions without the collision grid, for the few asteroids of a normal game: every live asteroid
+        is tested against the player and each laser one at a time in plain Python, which costs less than a batched
+        NumPy test for so few shapes. Same effects as check_asteroid_player_collision() and
+        check_asteroid_laser_collision().
+        """
+        field = self._asteroid_field
+        live = np.flatnonzero(field.get_alive_mask())
+        if len(live) == 0:
+            return
+        radius = field.get_radius()
+        # Centers are truncated to whole pixels like in get_asteroid_cicle_data()
+        centers = np.trunc(field.get_positions()[live]).tolist()
+        # The vertices of get_player_triangle_data(), without building Vector2s
+        left, top = self._player.get_x(), self._player.get_y()
+        right, bottom = left + self._player.get_width(), top + self._player.get_height()
+        v1, v2, v3 = ((left + right) / 2, top - 8), (left, bottom), (right, bottom)
+
+        # Asteroids destroyed by the player this frame no longer block lasers
+        remaining = []
+        for index, (x, y) in zip(live.tolist(), centers):
+            if circle_hits_triangle(x, y, radius, v1, v2, v3):
+                self._player.get_player_points().reset_multiplier()
+                self.deal_player_damage(int(field.get_type_ids()[index]))
+                field.kill(index)
+            else:
+                remaining.append((x, y))
+
+        for laser in self._grid_lasers:
+            laser_x, laser_y, laser_width, laser_height = laser.get_x(), laser.get_y(), laser.get_width(), laser.get_height()
+            if any(circle_hits_rect(x, y, radius, laser_x, laser_y, laser_width, laser_height) for x, y in remaining):
+                self._player.remove_laser(laser)
 
     def powerup_collision_check(self):
         """
@@ -652,10 +833,24 @@ class SpaceGame:
         - Health: Direct collection
         This causes the player to have to make strategic decisions around oxygen management.
         """
-
-        for powerup in self._power_ups:
-            self.check_player_powerup_collision(powerup)
-            self.check_laser_O2_powerup_collision(powerup)
+        power_ups = self._power_ups[:]
+        if not self._grid_built:
+            for powerup in power_ups:
+                self.check_player_powerup_collision(powerup)
+                if self._grid_lasers:
+                    self.check_laser_O2_powerup_collision(powerup, self._grid_lasers)
+            return
+
+        if not power_ups:
+            return
+        boxes, layers, ids = self._collision_grid.query_boxes(*get_sprite_boxes(power_ups), LAYER_PLAYER | LAYER_LASER)
+        for power_up_id, powerup in enumerate(power_ups):
+            found = boxes == power_up_id
+            if LAYER_PLAYER in layers[found]:
+                self.check_player_powerup_collision(powerup)
+            nearby_lasers = [self._grid_lasers[laser_id] for laser_id in ids[found & (layers == LAYER_LASER)].tolist()]
+            if nearby_lasers:
+                self.check_laser_O2_powerup_collision(powerup, nearby_lasers)
 
     def treasure_collision_check(self):
         """
@@ -665,13 +860,19 @@ class SpaceGame:
         All treasures increase the score multiplier equally.
         """
         treasure_points = {
-            game_assets.get_asset_texture("iron.png"): 50,
-            game_assets.get_asset_texture("diamond.png"): 200,
-            game_assets.get_asset_texture("emerald.png"): 100,
-            game_assets.get_asset_texture("ruby.png"): 75,
+            game_atlas.get_region("iron.png"): 50,
+            game_atlas.get_region("diamond.png"): 200,
+            game_atlas.get_region("emerald.png"): 100,
+            game_atlas.get_region("ruby.png"): 75,
         }
         for treasure in self._treasure[:]:
             treasure_hitbox = self.create_treasure_hitbox(treasure)
+            if self._grid_built and not len(
+                self._collision_grid.query_layer(
+                    treasure_hitbox.x, treasure_hitbox.y, treasure_hitbox.width, treasure_hitbox.height, LAYER_PLAYER
+                )
+            ):
+                continue
             player_hitbox = self.create_player_hitbox()
 
             if check_collision_recs(treasure_hitbox, player_hitbox):
@@ -707,16 +908,21 @@ class SpaceGame:
         Creates a rectangular collision box for an powerup.
         Returns the Rectangle object used for the powerup.
         """
-        power_up_hitbox = Rectangle(powerup.get_position().x, powerup.get_position().y, powerup.get_size().x, powerup.get_size().y)
+        power_up_hitbox = Rectangle(powerup.get_x(), powerup.get_y(), powerup.get_width(), powerup.get_height())
         return power_up_hitbox
 
+    def create_laser_hitbox(self, laser):
+        """
+        Creates and returns a hitbox (Rectangle) for a given laser object.
+        """
+        laser_hitbox = Rectangle(laser.get_x(), laser.get_y(), laser.get_width(), laser.get_height())
+        return laser_hitbox
+
     def create_treasure_hitbox(self, treasure):
         """
         Creates and returns a hitbox (Rectangle) for a given treasure object.
         """
-        treasure_hitbox = Rectangle(
-            treasure.get_position().x, treasure.get_position().y, treasure.get_size().x, treasure.get_size().y
-        )
+        treasure_hitbox = Rectangle(treasure.get_x(), treasure.get_y(), treasure.get_width(), treasure.get_height())
         return treasure_hitbox
 
     def increase_player_points(self, treasure, treasure_points):
@@ -725,33 +931,167 @@ class SpaceGame:
         removes the treasure, and increases the player's points and player's score multiplier.
         """
         self._play_treasure_collect_sfx()
-        self._treasure.remove(treasure)
+        self._treasure_pool.release(treasure)
         treasure_texture = treasure.get_texture()
         self._player.get_player_points().increase_points(treasure_points[treasure_texture])
         self._player.get_player_points().increase_multiplier(0.1)
 
+    def build_collision_grid(self):
+        """
+        Rebuilds the collision grid from the current positions of every entity.
+        Each entity type goes in its own layer, inserted in one batch, so each collision system only queries what
+        it needs. With fewer than COLLISION_GRID_MIN_ASTEROIDS live asteroids the grid isn't built, and the
+        collision checks test every pair instead.
+        """
+        self._grid_lasers = self._player.get_lasers()[:]
+        field = self._asteroid_field
+        live = np.flatnonzero(field.get_alive_mask())
+        self._grid_built = len(live) >= COLLISION_GRID_MIN_ASTEROIDS
+        if not self._grid_built:
+            return
+
+        grid = self._collision_grid
+        grid.clear()
+        player = self._player
+        # The triangle's tip sits 8 pixels above the player hitbox
+        grid.insert(LAYER_PLAYER, 0, player.get_x(), player.get_y() - 8, player.get_width(), player.get_height() + 8)
+        for layer, sprites in ((LAYER_LASER, self._grid_lasers), (LAYER_POWERUP, self._power_ups), (LAYER_TREASURE, self._treasure)):
+            if sprites:
+                grid.insert(layer, np.arange(len(sprites)), *get_sprite_boxes(sprites))
+
+        radius = field.get_radius()
+        positions = field.get_positions()[live]
+        grid.insert(LAYER_ASTEROID, live, positions[:, 0] - radius, positions[:, 1] - radius, radius * 2, radius * 2)
+
+        grid.build()
+
     def initialize_collision_checks(self):
-        """Runs all collision detection systems each frame."""
+        """Runs all collision detection systems each frame, after rebuilding the collision grid."""
+        self.build_collision_grid()
         self.asteroid_collision_check()
         self.powerup_collision_check()
         self.treasure_collision_check()
 
-    def spawn_obstacles_collectibles(self):
-        """Manages the spawning of all game elements."""
-        self.initiate_asteroid_spawning_mechanics()
-        self.draw_asteroids()
-        self.draw_power_ups()
-        self.draw_treasure()
-        self.draw_outer_space()
-
-    def initialize_game(self):
-        """Main game loop content - updates all game elements each frame."""
-        self.spawn_obstacles_collectibles()
-        self._player.initialize_player_mechanics()
-        self._game_clock.run_clock()
+    def spawn_obstacles_collectibles(self, dt):
+        """Manages the spawning and movement of all game elements for one simulation tick."""
+        profiler = self._profiler
+        start = perf_counter()
+        self.update_asteroids(dt)
+        start = profiler.add_since(ENTITY_ASTEROIDS, start)
+        self.update_power_ups(dt)
+        start = profiler.add_since(ENTITY_POWER_UPS, start)
+        self.update_treasure(dt)
+        start = profiler.add_since(ENTITY_TREASURE, start)
+        self.update_outer_space(dt)
+        profiler.add_since(ENTITY_STARS, start)
+
+    def update_game(self, dt):
+        """Main game loop content - advances every game element by one fixed simulation tick of dt seconds."""
+        self._simulation_clock.tick()
+        if self._recorder is not None:
+            self._recorder.record_tick(pack_input(*self._player.get_input_state()))
+        profiler = self._profiler
+        start = perf_counter()
+        # Game timers (difficulty, score clock, oxygen, unfreezing) that are due by this tick
+        self._scheduler.run_due()
+        start = profiler.add_since(PHASE_TIMERS, start)
+        self.spawn_obstacles_collectibles(dt)
+        start = profiler.add_since(PHASE_SPAWN, start)
+        self._player.update_player_mechanics(dt)
+        profiler.add_since(ENTITY_SHIP, start)
+        start = profiler.add_since(PHASE_PLAYER, start)
         self.initialize_collision_checks()
-        self.start_music()
-        update_music_stream(self._game_music)
+        profiler.add_since(PHASE_COLLISIONS, start)
+        if self._recorder is not None and self._recorder.wants_keyframe(self._simulation_clock.get_tick()):
+            self._recorder.add_keyframe(self.get_keyframe_state())
+
+    def get_keyframe_state(self):
+        """
+        Returns a small summary of the game state, stored in replay keyframes and compared on playback.
+        Asteroid positions are summarized by a checksum.
+        """
+        player = self._player
+        return {
+            "tick": self._simulation_clock.get_tick(),
+            "player": [player.get_x(), player.get_y()],
+            "health": player.get_current_health(),
+            "ammo": player.get_current_ammo(),
+            "oxygen": player.get_oxygen_meter().get_current_oxygen_level(),
+            "points": player.get_player_points().get_current_points(),
+            "asteroids": self._asteroid_field.get_count(),
+            "asteroid_checksum": zlib.crc32(self._asteroid_field.get_positions().tobytes()),
+        }
+
+    def record_games(self, path):
+        """
+        Records every following game to a replay file at path (written when the game ends).
+        Each recorded game is reseeded with a fresh seed that is stored in the replay.
+        """
+        self._record_path = path
+
+    def start_recording(self, keyframe_interval=600):
+        """Reseeds the game and starts recording the input of the game that is about to start."""
+        header = {
+            "seed": self.seed_random(),
+            "tick_rate": self._simulation_clock.get_tick_rate(),
+            "swarm": self._swarm_mode,
+            "temperature": self._game_temperature_custom,
+            "speed_range": list(self._max_speed_range_custom),
+        }
+        self._recorder = ReplayRecorder(header, keyframe_interval)
+
+    def stop_recording(self):
+        """Writes the current recording (if any) to the record path and stops recording."""
+        if self._recorder is not None:
+            self._recorder.save(self._record_path)
+            print(f"saved replay of {self._recorder.get_tick_count()} ticks to {self._record_path}")
+            self._recorder = None
+
+    def run_replay(self, replay):
+        """
+        Plays a recorded game back as fast as possible: only the simulation ticks run, nothing is drawn.
+        Stops at the end of the recording or when the player dies, and checks every keyframe on the way.
+        Returns a dict with the ticks played, the first tick whose keyframe didn't match (or None) and the final score.
+        """
+        header = replay.get_header()
+        self.seed_random(header["seed"])
+        self._game_temperature_custom = header["temperature"]
+        self._max_speed_range_custom = list(header["speed_range"])
+        self._simulation_clock.reset()
+        self._menu._menu_state_stack.push("start_game")
+
+        desync_tick = None
+        for tick in range(1, replay.get_tick_count() + 1):
+            self._player.set_input_state(*unpack_input(replay.get_input(tick)))
+            self.update_game(self._simulation_clock.get_timestep())
+            keyframe = replay.get_keyframe(tick)
+            if keyframe is not None and desync_tick is None and keyframe != self.get_keyframe_state():
+                desync_tick = tick
+            # read the score before a game over resets it
+            points = self._player.get_player_points().get_current_points()
+            if self.check_player_death():
+                break
+        return {"ticks": tick, "desync_tick": desync_tick, "points": points}
+
+    def draw_game(self, alpha):
+        """
+        Queues every game element in the render queue, which handle_start_game() draws at the end of the frame,
+        so the order here doesn't matter. alpha (0 to 1) is how far the frame is between the last two
+        simulation ticks, and moving entities are drawn at the matching in-between position.
+        """
+        profiler = self._profiler
+        start = perf_counter()
+        self.draw_asteroids(alpha)
+        start = profiler.add_since(ENTITY_ASTEROIDS, start)
+        self.draw_power_ups(alpha)
+        start = profiler.add_since(ENTITY_POWER_UPS, start)
+        self.draw_treasure(alpha)
+        start = profiler.add_since(ENTITY_TREASURE, start)
+        self.draw_outer_space()
+        start = profiler.add_since(ENTITY_STARS, start)
+        self._player.draw_player_mechanics(alpha)
+        hud_compositor.draw(self._hud_elements)
+        profiler.add_since(ENTITY_SHIP, start)
 
     def should_exit_menu_status(self):
         """Checks if user has clicked exit button."""
@@ -791,20 +1131,14 @@ class SpaceGame:
 
         # Initialize with the main menu state
         self._menu._menu_state_stack.push("main_menu")
+        if self._startup_loader is not None:
+            # The loading screen is shown over the main menu until the menu assets are loaded
+            self._menu._menu_state_stack.push("startup_loading")
 
         while not window_should_close() and not self.should_exit_menu_status():
             begin_drawing()
             clear_background(BG_COLOR)
-
-            # This current_state is used to determine what new menu to now run
-            current_state = self._menu._menu_state_stack.top()
-
-            # Menu screen to run based on current game state
-            if current_state in self._screens:
-                self._screens[current_state]()
-            else:
-                print(current_state + " not recognized.")
-
+            self.run_current_screen()
             end_drawing()
 
         # store the games data to be saved (city data, player leaderboard)
@@ -813,10 +1147,65 @@ class SpaceGame:
         saved_data["City temperature"] = self._game_temperature_custom
         saved_data["City wind speed range"] = self._max_speed_range_custom
         save_game_data_file(saved_data)
+        # keep the recording of a game that was still running when the window closed
+        self.stop_recording()
 
         # Close the game
         self.cleanup_asteroids_game()
 
+    def get_current_state(self):
+        """Returns the current game state (e.g. "main_menu" or "start_game")."""
+        return self._menu._menu_state_stack.top()
+
+    def set_asset_profiler(self, profiler):
+        """Records the assets used by every game state with an AssetUsageProfiler, or stops recording with None."""
+        self._asset_profiler = profiler
+        game_assets.set_observer(profiler)
+
+    def run_current_screen(self):
+        """Runs one frame of the screen matching the current game state."""
+        if self._asset_profiler is not None:
+            self._asset_profiler.begin_frame()
+
+        # Timers outside of the game simulation
+        wall_clock_scheduler.run_due()
+
+        # This current_state is used to determine what new menu to now run
+        current_state = self.get_current_state()
+
+        # Menu screen to run based on current game state
+        if current_state in self._screens:
+            self._screens[current_state]()
+        else:
+            print(current_state + " not recognized.")
+
+        if self._asset_profiler is not None:
+            self._asset_profiler.end_frame()
+
+    def run_headless(self, max_frames=None, start_state="start_game", on_frame=None):
+        """
+        Runs the game loop without saving data or closing the window, for use with the null backend
+        (ASTEROIDS_BACKEND=null) where frames run as fast as the CPU allows. Use set_time_scale() to
+        also run more simulation ticks per frame.
+        Starts in start_state and stops once the state changes (e.g. the player died and the death
+        menu came up), after max_frames frames, or when the window is asked to close.
+        on_frame(frame_index) is called before each frame, e.g. to inject input through the NullBackend.
+        Returns the number of frames run.
+        """
+        self._menu._menu_state_stack.push(start_state)
+        frames = 0
+        while (max_frames is None or frames < max_frames) and not window_should_close():
+            if on_frame is not None:
+                on_frame(frames)
+            begin_drawing()
+            clear_background(BG_COLOR)
+            self.run_current_screen()
+            end_drawing()
+            frames += 1
+            if self._menu._menu_state_stack.top() != start_state or self.should_exit_menu_status():
+                break
+        return frames
+
     def handle_main_menu(self):
         """
         Handles the main menu logic, including drawing the menu and resetting the input box.
@@ -840,18 +1229,17 @@ class SpaceGame:
         """
         Handles the options menu, including drawing difficulty information and handling user input for difficulty and whether to erase data.
         """
-        self._menu.run_options_menu()
-        self._menu.draw_difficulty_information(
+        self._menu.set_difficulty_information(
             self._city_custom, str(self._game_temperature_custom), str(self._max_speed_range_custom)
         )
+        # Only display the input box if the difficulty button has been clicked
+        self._menu.get_screen_tree("options").set_visible(self._user_input_box, self._menu._difficulty_clicked)
+        self._menu.run_options_menu()
 
-        if self._menu._difficulty_clicked:
-            # Only display the input box if the difficulty button hasn't been clicked
-            self._user_input_box.enable_input_box()
-            if self._user_input_box._enter_is_pressed:
-                city_typed = self._user_input_box._text_to_save
-                self.change_game_difficulty(city_typed)
-                self._user_input_box.reset_input_box()
+        if self._user_input_box._enter_is_pressed:
+            city_typed = self._user_input_box._text_to_save
+            self.change_game_difficulty(city_typed)
+            self._user_input_box.reset_input_box()
 
         # Erase save data upon button click
         if self._menu._erase_file_clicked:
@@ -864,29 +1252,127 @@ class SpaceGame:
 
             self._menu._erase_file_clicked = False
 
+    def get_entity_counts(self):
+        """Returns the number of live entities of every type, by the profiler's entity type names."""
+        return {
+            "asteroids": self._asteroid_field.get_count(),
+            "power-ups": len(self._power_ups),
+            "treasure": len(self._treasure),
+            "stars": len(self._stars_list),
+            "ship": 1 + len(self._player.get_lasers()),
+        }
+
     def handle_start_game(self):
         """
-        Initializes the game, checks player death, and manages the start of the game.
+        Runs the game for one rendered frame: samples input, advances the simulation by as many fixed
+        ticks as the simulation clock gives for the frame time (checking player death after each one),
+        then draws the game. P pauses the game and F3 shows or hides the profiler overlay.
+        """
+        clock = self._simulation_clock
+        if is_key_pressed(KEY_P):
+            self.toggle_pause()
+        if is_key_pressed(KEY_F3):
+            self._profiler.toggle()
+        if not clock.is_paused():
+            self._player.poll_input()
+            self.start_music()
+            start = perf_counter()
+            update_music_stream(self._game_music)
+            self._profiler.add_since(PHASE_MUSIC, start)
+        if self._record_path is not None and self._recorder is None and clock.get_tick() == 0:
+            self.start_recording()
+
+        # The world slows down while the player is frozen by an icy asteroid
+        clock.set_time_scale(self._time_scale * (FREEZE_TIME_SCALE if self._player.is_frozen() else 1.0))
+        timestep = clock.get_timestep()
+        for step in range(clock.advance(get_frame_time())):
+            self.update_game(timestep)
+            if self.check_player_death():
+                self._profiler.end_frame()
+                return
+        start = perf_counter()
+        self.draw_game(clock.get_alpha())
+        if clock.is_paused():
+            self.draw_pause_screen()
+        start = self._profiler.add_since(PHASE_DRAW, start)
+        render_queue.flush()
+        self._profiler.add_since(PHASE_RENDER, start)
+        self._profiler.draw(self.get_entity_counts(), render_queue.get_stats())
+        self._profiler.end_frame()
+
+    def draw_pause_screen(self):
+        """Dims the game and shows that it's paused, in the UI layer of the render queue."""
+        render_queue.add(RENDER_LAYER_UI, draw_rectangle, 0, 0, WINDOW_WIDTH, WINDOW_HEIGHT, Color(0, 0, 0, 150))
+        font = game_assets.get_asset_font("slkscr.ttf", FONT_SIZE)
+        text_size = text_cache.measure(font, "PAUSED", FONT_SIZE, 10)
+        text_pos = Vector2(WINDOW_WIDTH / 2 - text_size.x / 2, WINDOW_HEIGHT / 2 - text_size.y / 2)
+        render_queue.add(RENDER_LAYER_UI, draw_font_text, font, "PAUSED", text_pos, FONT_SIZE, 10, WHITE)
+
+    def set_startup_loader(self, loader):
+        """
+        Shows the loading screen at startup while an AssetLoader, started already, loads the menu assets, before
+        the main menu. Call before the game loop runs.
+        """
+        self._startup_loader = loader
+
+    def draw_loading_screen(self, progress):
+        """Draws the loading screen, with a progress bar filled to progress, from 0 to 1."""
+        loading_texture = game_assets.get_asset_texture("loading_screen.png")
+        _loading_source.width, _loading_source.height = loading_texture.width, loading_texture.height
+        draw_texture_pro(loading_texture, _loading_source, _loading_dest, _loading_origin, 0, WHITE)
+
+        # Progress bar along the bottom of the screen
+        _progress_fill.width = _progress_bar.width * progress
+        draw_rectangle_rec(_progress_fill, WHITE)
+        draw_rectangle_lines_ex(_progress_bar, 4, WHITE)
+
+    def handle_startup_loading_screen(self):
+        """
+        Displays the loading screen while the menu assets load at startup. Each frame uploads a few assets, so the
+        screen keeps drawing, then the main menu is shown as soon as everything is loaded.
         """
-        self.initialize_game()
-        self.check_player_death()
+        loading_done = self._startup_loader.upload()
+        self.draw_loading_screen(self._startup_loader.get_progress())
+        if loading_done:
+            self._startup_loader.print_timings()
+            self._startup_loader = None
+            self._menu._menu_state_stack.pop()
 
     def handle_loading_screen(self):
         """
-        Displays loading screen while game resources initialize.
-        Repeatedly updates start_timer in the mean time.
+        Displays loading screen while the gameplay assets load, with a progress bar.
+        Each frame uploads a few assets, then the game starts as soon as everything is loaded.
         """
-        loading_texture = game_assets.get_asset_texture("loading_screen.png")
-        loading_texture_source = Rectangle(0, 0, loading_texture.width, loading_texture.height)
-        loading_texture_dest = Rectangle(0, 0, WINDOW_WIDTH, WINDOW_HEIGHT)
-        draw_texture_pro(loading_texture, loading_texture_source, loading_texture_dest, Vector2(), 0, WHITE)
-        self._menu._start_timer.update()
+        if self._asset_loader is None:
+            # Only the assets not loaded yet are loaded, so starting the next games takes a single frame
+            self._asset_loader = AssetLoader(game_assets, GAMEPLAY_ASSET_MANIFEST)
+        loading_done = self._asset_loader.upload()
+        self.draw_loading_screen(self._asset_loader.get_progress())
+
+        if loading_done:
+            self._asset_loader = None
+            # Switch first, so the asset profiler counts the prewarmed assets as start_game's
+            self._menu.start_game_after_loading()
+            self.prewarm_game()
+
+    def prewarm_game(self):
+        """
+        Gets everything the game uses ready before its first frame. Pools and the asteroid field are allocated when
+        the game is created; this builds the sprite atlas and resolves the asset handles of the fonts, so no
+        game frame has to.
+        """
+        game_atlas.build()
+        game_assets.warm_up()
 
     def cleanup_asteroids_game(self):
         """
         Performs cleanup when the game loop ends:
         unload assets and close the window.
         """
+        menu_canvas.unload()
+        hud_compositor.unload()
+        self._asteroid_field.unload()
+        unload_font_shaders()
         game_assets.unload()
         close_audio_device()
         close_window()
@@ -911,6 +1397,9 @@ class SpaceGame:
             """
         # Initialize with the main menu state
         self._menu._menu_state_stack.push("main_menu")
+        if self._startup_loader is not None:
+            # The loading screen is shown over the main menu until the menu assets are loaded
+            self._menu._menu_state_stack.push("startup_loading")
 
         while not window_should_close() and not self.should_exit_menu_status():
             # Show fps, but don't show print any fps messaging on the terminal
@@ -921,16 +1410,7 @@ class SpaceGame:
             begin_drawing()
             clear_background(BG_COLOR)
             draw_text(f"FPS: {current_fps}", 10, 10, 40, WHITE)
-
-            # This current_state is used to determine what new menu to now run
-            current_state = self._menu._menu_state_stack.top()
-
-            # Menu screen to run based on current game state
-            if current_state in self._screens:
-                self._screens[current_state]()
-            else:
-                print(current_state + " not recognized.")
-
+            self.run_current_screen()
             end_drawing()
 
         # store the games data to be saved (city data, player leaderboard)
@@ -964,6 +1444,9 @@ async def run_optimized_web(self):  # This is basically the main(self): method
 
     # Initialize with the main menu state
     self._menu._menu_state_stack.push("main_menu")
+    if self._startup_loader is not None:
+        # The loading screen is shown over the main menu until the menu assets are loaded
+        self._menu._menu_state_stack.push("startup_loading")
 
     while not window_should_close() and not self.should_exit_menu_status():
         # Show fps, but don't show print any fps messaging on the terminal
@@ -974,15 +1457,7 @@ async def run_optimized_web(self):  # This is basically the main(self): method
         begin_drawing()
         clear_background(BG_COLOR)
         draw_text(f"FPS: {current_fps}", 10, 10, 40, WHITE)
-
-        # This current_state is used to determine what new menu to now run
-        current_state = self._menu._menu_state_stack.top()
-
-        # Menu screen to run based on current game state
-        if current_state in self._screens:
-            self._screens[current_state]()
-        else:
-            print(current_state + " not recognized.")
+        self.run_current_screen()
 
         asyncio.sleep(0)  # test position? idk if this is the right place
         end_drawing()
@@ -999,5 +1474,26 @@ async def run_optimized_web(self):  # This is basically the main(self): method
 
 
 if __name__ == "__main__":
-    game_test = SpaceGame()
-    game_test.run_optimized()
+    game_test = SpaceGame(swarm="--swarm" in sys.argv)
+    if "--time-scale" in sys.argv:
+        # e.g. --time-scale 50 to fast-forward a headless run
+        game_test.set_time_scale(float(sys.argv[sys.argv.index("--time-scale") + 1]))
+    asset_profiler = None
+    if "--profile-assets" in sys.argv:
+        # records the assets each state uses, reports the loads that happened mid-frame and updates StateAssetManifest.py
+        from AssetProfiler import AssetUsageProfiler
+
+        asset_profiler = AssetUsageProfiler(game_test.get_current_state)
+        game_test.set_asset_profiler(asset_profiler)
+    if "--record" in sys.argv:
+        # python Game.py --record my_game.replay records each game; play it back with python Replay.py my_game.replay
+        game_test.record_games(sys.argv[sys.argv.index("--record") + 1])
+    if get_backend_name() == "null":
+        # Headless run (ASTEROIDS_BACKEND=null python Game.py): play one game with no input and report how long it lasted
+        frames = game_test.run_headless()
+        print(f"headless game over after {frames} frames ({get_time():.1f} seconds at {game_test._time_scale}x speed)")
+    else:
+        game_test.run_optimized()
+    if asset_profiler is not None:
+        asset_profiler.print_report()
+        asset_profiler.write_state_manifests()
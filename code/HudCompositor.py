@@ -0,0 +1,129 @@
+from Settings import *
+from RenderQueue import *
+
+"""
+HUD compositor. The HUD (hearts, ammo, oxygen, score and clock) changes a few times per second at most, but
+drawing it takes about 20 sprites and 5 strings every frame. The compositor keeps the HUD in a window-sized,
+transparent RenderTexture instead, and only redraws the elements whose state changed (a heart emptied, a shot
+fired, the oxygen level dropped, points scored), so a frame of the HUD is a single blit.
+
+The HUD is drawn over the game, so the texture has to keep its transparency: the elements are drawn into it
+with premultiplied alpha (see _begin_premultiplied_output()) and it's blitted with BLEND_ALPHA_PREMULTIPLY.
+"""
+
+HUD_BOUNDS_MARGIN = 2  # pixels cleared around the bounds of an element, for glyphs drawn slightly past them
+
+# Scratch rectangle of the blitted HUD; render textures are stored upside down, hence the negative height
+_hud_source = Rectangle(0, 0, 0, 0)
+_hud_position = Vector2(0, 0)
+
+
+def _blit_premultiplied(texture):
+    """Draws a texture holding premultiplied colors over the whole window."""
+    _hud_source.width, _hud_source.height = texture.width, -texture.height
+    begin_blend_mode(BLEND_ALPHA_PREMULTIPLY)
+    DrawTextureRec(texture, _hud_source, _hud_position, WHITE)
+    end_blend_mode()
+
+
+def _begin_premultiplied_output():
+    """
+    Blends what is drawn next so the render texture ends up with premultiplied colors and the right coverage
+    (plain BLEND_ALPHA would multiply the alpha of a drawn pixel with itself over a transparent texture).
+    """
+    rl_set_blend_factors_separate(RL_SRC_ALPHA, RL_ONE_MINUS_SRC_ALPHA, RL_ONE, RL_ONE_MINUS_SRC_ALPHA, RL_FUNC_ADD, RL_FUNC_ADD)
+    begin_blend_mode(BLEND_CUSTOM_SEPARATE)
+
+
+def _overlaps(a, b):
+    """Returns True if two (x, y, width, height) boxes overlap."""
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+
+def _grow(bounds, margin=HUD_BOUNDS_MARGIN):
+    """Returns (x, y, width, height) bounds grown by margin pixels on every side."""
+    return bounds[0] - margin, bounds[1] - margin, bounds[2] + 2 * margin, bounds[3] + 2 * margin
+
+
+class HudCompositor:
+    """
+    Draws HUD elements through a RenderTexture, see the module docstring.
+
+    An element is any object with get_hud_state(), returning a value that changes whenever the element would
+    look different, get_hud_bounds(), returning the (x, y, width, height) box it draws in, and draw_hud(),
+    drawing it right away.
+
+    Attributes:
+    width: Width of the HUD texture in pixels
+    height: Height of the HUD texture in pixels
+    """
+
+    def __init__(self, width=WINDOW_WIDTH, height=WINDOW_HEIGHT):
+        self._width = width
+        self._height = height
+        self._canvas = None  # RenderTexture, loaded when the HUD is first drawn
+        self._drawn = {}  # element -> (state, bounds) it has on the canvas
+        self._element_redraws = 0
+
+    def draw(self, elements):
+        """
+        Redraws the elements whose state changed into the HUD texture, and queues the texture in the HUD layer of
+        the render queue. elements are drawn in order, so later ones are drawn over earlier ones.
+        """
+        if self._canvas is None:
+            self._canvas = load_render_texture(self._width, self._height)
+            begin_texture_mode(self._canvas)
+            clear_background(BLANK)
+            end_texture_mode()
+            self._drawn.clear()
+        changed = [element for element in elements if self._drawn.get(element, (None,))[0] != element.get_hud_state()]
+        if changed:
+            self._redraw(elements, changed)
+        render_queue.add(RENDER_LAYER_HUD, _blit_premultiplied, self._canvas.texture)
+
+    def _redraw(self, elements, changed):
+        """Clears where the changed elements were and will be drawn, and redraws them and every element they overlap."""
+        redraw = set()
+        areas = []
+        pending = changed
+        while pending:
+            # Clearing an area erases the elements overlapping it, which then have to be redrawn (and cleared) too
+            for element in pending:
+                redraw.add(element)
+                if element in self._drawn:
+                    areas.append(_grow(self._drawn[element][1]))
+                areas.append(_grow(element.get_hud_bounds()))
+            pending = [
+                element
+                for element in elements
+                if element not in redraw and element in self._drawn and any(_overlaps(_grow(self._drawn[element][1]), area) for area in areas)
+            ]
+
+        begin_texture_mode(self._canvas)
+        for x, y, width, height in areas:
+            begin_scissor_mode(int(x), int(y), int(width + 0.999), int(height + 0.999))
+            clear_background(BLANK)
+            end_scissor_mode()
+        _begin_premultiplied_output()
+        for element in elements:
+            if element in redraw:
+                element.draw_hud()
+                self._drawn[element] = (element.get_hud_state(), element.get_hud_bounds())
+                self._element_redraws += 1
+        end_blend_mode()
+        end_texture_mode()
+
+    def get_stats(self):
+        """Returns the number of element redraws since the compositor was created."""
+        return self._element_redraws
+
+    def unload(self):
+        """Unloads the HUD texture, e.g. while the menus are shown. The next draw() loads and redraws it."""
+        if self._canvas is not None:
+            unload_render_texture(self._canvas)
+            self._canvas = None
+        self._drawn.clear()
+
+
+# The compositor the game HUD is drawn through
+hud_compositor = HudCompositor()
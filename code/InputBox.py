@@ -1,10 +1,12 @@
 from pyray import *
 from raylib import *
+from Settings import *
 from DoublyLinkedStack import *
 from Assets import game_assets
+from Widgets import *
 
 
-class InputBox:
+class InputBox(Widget):
     """
     A text box that allows user input with various customization options.
 
@@ -14,19 +16,22 @@ class InputBox:
     - Can be resized, repositioned, and styled.
     - Displays text or a placeholder ("Enter City") when empty.
     - Tracks mouse hover and input events to show visual changes.
+
+    The input box is a widget: the WidgetTree it's added to tells it when it's hovered and gives it the
+    keyboard input while it is.
     """
 
     def __init__(self, pos, font, font_size, width, height, character_limit, border_color, interior_color, text_color):
+        super().__init__()
         self._input_box_pos = pos
         self._character_limit = character_limit
         self._border_color = border_color
         self._interior_color = interior_color
         self._text_color = text_color
-        self._mouse_is_hovering = False
         self._is_enabled = False
         self._input_box_text = ""
         self._text_to_save = ""
-        self._input_box_font = font
+        self._input_box_font = font  # LazyAsset handle of the font
         self._input_box_font_size = font_size
         self._input_box_width = width
         self._input_box_height = height
@@ -52,32 +57,30 @@ class InputBox:
         """
         Checks if the mouse is hovering inside the input box.
         """
-        mouse_pos = get_mouse_position()
-        in_rectangle_width = self._input_box_pos.x <= mouse_pos.x <= self._input_box_pos.x + self._input_box_width
-        in_rectangle_height = self._input_box_pos.y <= mouse_pos.y <= self._input_box_pos.y + self._input_box_height
-        return in_rectangle_width and in_rectangle_height
+        return self.is_hovered()
 
-    def handle_input(self):
+    def get_rectangle(self):
         """
-        Handle user input: character typing, backspace, and enter
+        Returns the input box rectangle, for hit-testing.
         """
-        if self.mouse_in_input_box():
-            self._mouse_is_hovering = True
-        else:
-            self._mouse_is_hovering = False
-
-        if self._mouse_is_hovering:  # Allow typing if the mouse is hovering
-            user_character = chr(get_char_pressed())  # Convert unicode to character
-            if user_character in self._accepted_characters and len(self._input_box_text) <= self._character_limit:
-                self._input_box_text += user_character
-            if is_key_pressed(KEY_BACKSPACE) and len(self._input_box_text) > 0:
-                self._input_box_text = self._input_box_text[:-1]
-                # reset the input box UI and save text after hitting enter
-            if is_key_pressed(KEY_ENTER):
-                self._text_to_save = self._input_box_text
-                self._enter_is_pressed = True
-                if len(self._text_to_save) > 0:  # Ensure text has at least one character
-                    self.adjust_saved_text()  # Format the text for saving
+        return self._input_box_rectangle
+
+    def handle_input(self, snapshot):
+        """
+        Handle user input: character typing, backspace, and enter.
+        Only called while the mouse is hovering, which is when typing is allowed.
+        """
+        user_character = snapshot.character
+        if user_character and user_character in self._accepted_characters and len(self._input_box_text) <= self._character_limit:
+            self._input_box_text += user_character
+        if snapshot.backspace_pressed and len(self._input_box_text) > 0:
+            self._input_box_text = self._input_box_text[:-1]
+            # reset the input box UI and save text after hitting enter
+        if snapshot.enter_pressed:
+            self._text_to_save = self._input_box_text
+            self._enter_is_pressed = True
+            if len(self._text_to_save) > 0:  # Ensure text has at least one character
+                self.adjust_saved_text()  # Format the text for saving
 
     def get_saved_text(self):
         """
@@ -108,13 +111,13 @@ class InputBox:
             display_text = self._input_box_text
 
         # Measure text dimensions for correct centering
-        text_dimensions = measure_text_ex(self._input_box_font, display_text, self._input_box_font_size, 0)
+        text_dimensions = measure_text_ex(self._input_box_font.get(), display_text, self._input_box_font_size, 0)
         text_width = text_dimensions.x
         text_height = text_dimensions.y
 
         # Draw the text (either placeholder or input text)
         draw_text_pro(
-            self._input_box_font,
+            self._input_box_font.get(),
             display_text,
             Vector2(
                 self._input_box_pos.x + self._input_box_width / 2 - text_width / 2,
@@ -127,12 +130,17 @@ class InputBox:
             self._text_color,
         )
 
-    def enable_input_box(self):
+    def get_draw_state(self):
+        """
+        Returns the hover state and text the input box is drawn with, so the menu canvas knows when to redraw it.
+        """
+        return self.is_hovered(), self._input_box_text
+
+    def draw(self):
         """
-        Enables and draws the input box, processes user input, and displays text.
+        Draws the input box and its text (or placeholder).
         """
         self.draw_input_box()
-        self.handle_input()
         self.draw_text_input_UI()
 
     def reset_input_box(self):
@@ -148,7 +156,7 @@ if __name__ == "__main__":
 
     test_input_box = InputBox(
         Vector2(get_screen_width() / 2 - 250, get_screen_height() / 2 - 65),
-        game_assets.get_asset_font("slkscreb.ttf"),
+        game_assets.get_lazy_font("slkscreb.ttf", 40),
         40,
         500,
         130,
@@ -157,9 +165,13 @@ if __name__ == "__main__":
         ORANGE,
         WHITE,
     )
+    test_tree = WidgetTree()
+    test_tree.add(test_input_box)
     while not window_should_close():
+        ui_input.take()
+        test_tree.dispatch(ui_input)
         begin_drawing()
         clear_background(BLACK)
-        test_input_box.enable_input_box()
+        test_input_box.draw()
         end_drawing()
     close_window()
@@ -1,5 +1,6 @@
 import asyncio
 from Game import *
+from AssetLoader import *
 
 """
 This is the main file used for running the game on browser. 
@@ -18,40 +19,12 @@ POINTS_FONT_SIZE = 40
 OXYGEN_FONT_SIZE = 70
 MAX_ASTEROID_SPEED = [200, 250]
 
-# load all game assets now to prevent lag at runtime or network errors
-game_assets.get_asset_font("slkscr.ttf")
-game_assets.get_asset_font("slkscreb.ttf")
-
-game_assets.get_asset_texture("diamond.png")
-game_assets.get_asset_texture("emerald.png")
-game_assets.get_asset_texture("empty_heart_container.png")
-game_assets.get_asset_texture("fiery_meteor.png")
-game_assets.get_asset_texture("green_laser.png")
-game_assets.get_asset_texture("green_ship.png")
-game_assets.get_asset_texture("health_power_up.png")
-game_assets.get_asset_texture("heart_container.png")
-game_assets.get_asset_texture("icy_meteor.png")
-game_assets.get_asset_texture("iron.png")
-game_assets.get_asset_texture("laser_powerup.png")
+# load the menu assets before the main menu to prevent lag at runtime or network errors, the loading screen loads the rest.
+# Only the loading screen's own picture is loaded right away; the startup loading screen uploads the other menu
+# assets a few per frame, while images and sounds are decoded on worker threads.
 game_assets.get_asset_texture("loading_screen.png")
-game_assets.get_asset_texture("meteor.png")
-game_assets.get_asset_texture("ruby.png")
-game_assets.get_asset_texture("star.png")
-game_assets.get_asset_texture("water_tank.png")
-game_assets.get_asset_texture("water.png")
-
-game_assets.get_asset_music("game_music.mp3")
-
-game_assets.get_asset_sound("ammo_collect.wav")
-game_assets.get_asset_sound("bubble.wav")
-game_assets.get_asset_sound("button_click.wav")
-game_assets.get_asset_sound("crash.wav")
-game_assets.get_asset_sound("explosion.wav")
-game_assets.get_asset_sound("freeze_sfx.wav")
-game_assets.get_asset_sound("game_over.wav")
-game_assets.get_asset_sound("heart_collect.wav")
-game_assets.get_asset_sound("laser.wav")
-game_assets.get_asset_sound("treasure_collect.wav")
+asset_loader = AssetLoader(game_assets, MENU_ASSET_MANIFEST)
+asset_loader.start()
 
 
 async def main():
@@ -59,6 +32,7 @@ async def main():
     For running the game on a web browser.
     """
     game_test = SpaceGame()
+    game_test.set_startup_loader(asset_loader)
     game_test.run_optimized_web()
 
 
@@ -2,6 +2,9 @@ from pyray import *
 from raylib import *
 from MyTimer import *
 from Assets import *
+from TextCache import *
+from MenuCanvas import *
+from Widgets import *
 from DoublyLinkedStack import *
 from GameSaver import *
 
@@ -21,18 +24,11 @@ class Menu:
         # Load the saved leaderboard data
         self._leaderboard = load_gamesave_file()["Game Leaderboard"]
         self._title = "untitled asteroids game"
+        self._difficulty_information = ("", "", "")  # city, temperature and speed range shown in the options menu
+        self._shown_screen = None  # menu screen drawn last frame
         self.create_buttons()
-        self._start_timer = Timer(4, False, False, self.start_game_after_delay)
         self._menu_state_stack = DoublyLinkedStack()
 
-        # Game screen button events tied to each menu state
-        self._menu_event_handlings = {
-            "main_menu": self.main_menu_buttons_handling,
-            "death_menu": self.death_menu_buttons_handling,
-            "leaderboard": self.leaderboard_buttons_handling,
-            "options": self.options_buttons_handling,
-        }
-
     def score_sort(self, entry):
         """
         Sort helper function used to sort leaderboard entries by score.
@@ -58,10 +54,10 @@ class Menu:
         place = 1
         for player_data in self._leaderboard:
             player_data = player_data[0] + "    score: " + str(player_data[1]) + "    time: " + str(player_data[2])
-            text_dimensions = measure_text_ex(game_assets.get_asset_font("slkscreb.ttf"), player_data, 55, 0)
+            text_dimensions = text_cache.measure(game_assets.get_asset_font("slkscreb.ttf", 55), player_data, 55, 0)
             centered_txt_width = (WINDOW_WIDTH - text_dimensions.x) / 2
-            draw_text_ex(
-                game_assets.get_asset_font("slkscreb.ttf"),
+            draw_font_text(
+                game_assets.get_asset_font("slkscreb.ttf", 55),
                 str(place) + ". " + player_data,
                 Vector2(centered_txt_width, text_height),
                 55,
@@ -71,75 +67,128 @@ class Menu:
             text_height += 60
             place += 1
 
-    def start_game_after_delay(self):
+    def start_game_after_loading(self):
         """
-        This function is called after a timer delay to push menu_screen then start_game.
+        This function is called by the loading screen once the game assets are loaded, to replace it with start_game.
 
         This is so that loading screen can be the game state for a while, (so handle_loading_screen in Game.py can be called).
         And so that menu_screen is always the bottom of the stack as it should be
         """
         self._menu_state_stack.pop()
         self._menu_state_stack.push("start_game")
+        # The menus aren't drawn while the game is played
+        menu_canvas.unload()
+        self._shown_screen = None
 
     def create_buttons(self):
         """
         Creates all buttons for the menu with their positions, sizes, and text.
         """
         self._buttons["start"] = Button(
-            Vector2(WINDOW_WIDTH / 2 - 310, 450), 620, 80, "START", game_assets.get_asset_font("slkscreb.ttf"), 60
+            Vector2(WINDOW_WIDTH / 2 - 310, 450), 620, 80, "START", game_assets.get_lazy_font("slkscreb.ttf", 60), 60
         )
         self._buttons["stats"] = Button(
-            Vector2(WINDOW_WIDTH / 2 - 310, 550), 620, 80, "LEADERBOARD", game_assets.get_asset_font("slkscreb.ttf"), 60
+            Vector2(WINDOW_WIDTH / 2 - 310, 550), 620, 80, "LEADERBOARD", game_assets.get_lazy_font("slkscreb.ttf", 60), 60
         )
         self._buttons["exit"] = Button(
-            Vector2(WINDOW_WIDTH / 2 - 310, 650), 620, 80, "EXIT", game_assets.get_asset_font("slkscreb.ttf"), 60
+            Vector2(WINDOW_WIDTH / 2 - 310, 650), 620, 80, "EXIT", game_assets.get_lazy_font("slkscreb.ttf", 60), 60
         )
         self._buttons["main menu"] = Button(
-            Vector2(WINDOW_WIDTH / 2 - 310, 550), 620, 80, "MAIN MENU", game_assets.get_asset_font("slkscreb.ttf"), 60
+            Vector2(WINDOW_WIDTH / 2 - 310, 550), 620, 80, "MAIN MENU", game_assets.get_lazy_font("slkscreb.ttf", 60), 60
         )
         self._buttons["options"] = Button(
-            Vector2(WINDOW_WIDTH / 2 - 310, 750), 620, 80, "OPTIONS", game_assets.get_asset_font("slkscreb.ttf"), 60
+            Vector2(WINDOW_WIDTH / 2 - 310, 750), 620, 80, "OPTIONS", game_assets.get_lazy_font("slkscreb.ttf", 60), 60
         )
         self._buttons["difficulty"] = Button(
-            Vector2(WINDOW_WIDTH / 2 - 310, 750), 620, 80, "DIFFICULTY", game_assets.get_asset_font("slkscreb.ttf"), 60
+            Vector2(WINDOW_WIDTH / 2 - 310, 750), 620, 80, "DIFFICULTY", game_assets.get_lazy_font("slkscreb.ttf", 60), 60
         )
         self._buttons["erase file"] = Button(
-            Vector2(WINDOW_WIDTH / 2 - 310, 750), 200, 50, "ERASE SAVE", game_assets.get_asset_font("slkscreb.ttf"), 20
+            Vector2(WINDOW_WIDTH / 2 - 310, 750), 200, 50, "ERASE SAVE", game_assets.get_lazy_font("slkscreb.ttf", 20), 20
+        )
+
+        # Widget tree of every menu screen: its buttons, where they are on it and what clicking them does
+        self._screen_trees = {screen: WidgetTree() for screen in ("main_menu", "leaderboard", "death_menu", "options")}
+        main_menu = self._screen_trees["main_menu"]
+        main_menu.add(self._buttons["start"], pos=Vector2(WINDOW_WIDTH / 2 - 310, 450), on_click=self.start_button_clicked)
+        main_menu.add(self._buttons["stats"], pos=Vector2(WINDOW_WIDTH / 2 - 310, 550), on_click=self.stats_button_clicked)
+        main_menu.add(self._buttons["options"], pos=Vector2(WINDOW_WIDTH / 2 - 310, 650), on_click=self.options_button_clicked)
+        main_menu.add(self._buttons["exit"], pos=Vector2(WINDOW_WIDTH / 2 - 310, 750), on_click=self.exit_button_clicked)
+        self._screen_trees["leaderboard"].add(
+            self._buttons["main menu"], pos=Vector2(WINDOW_WIDTH / 2 - 310, 850), on_click=self.back_button_clicked
         )
+        death_menu = self._screen_trees["death_menu"]
+        death_menu.add(self._buttons["main menu"], pos=Vector2(WINDOW_WIDTH / 2 - 700, 550), on_click=self.death_main_menu_button_clicked)
+        death_menu.add(self._buttons["exit"], pos=Vector2(WINDOW_WIDTH / 2 + 40, 550), on_click=self.exit_button_clicked)
+        options = self._screen_trees["options"]
+        options.add(self._buttons["main menu"], pos=Vector2(WINDOW_WIDTH / 2 - 310, 850), on_click=self.back_button_clicked)
+        options.add(self._buttons["difficulty"], pos=Vector2(WINDOW_WIDTH / 2 - 310, 250), on_click=self.difficulty_button_clicked)
+        options.add(self._buttons["erase file"], pos=Vector2(1600, 980), on_click=self.erase_file_button_clicked)
+
+    def get_screen_tree(self, screen):
+        """
+        Returns the WidgetTree of a menu screen ("main_menu", "leaderboard", "death_menu" or "options"), e.g. to
+        add a widget to it.
+        """
+        return self._screen_trees[screen]
+
+    def draw_screen(self, screen, draw_static, screen_key=None):
+        """
+        Runs a frame of a menu screen: updates the hovered widget of the screen's widget tree, draws the screen
+        through the menu canvas, then dispatches the clicks and keyboard input. draw_static() draws what isn't a
+        widget, and is only called when the screen is composed, i.e. when screen_key (by default the screen's
+        name) or the shown widgets change.
+        """
+        tree = self._screen_trees[screen]
+        if screen != self._shown_screen:
+            # Places the buttons shared with other screens where this screen has them
+            tree.invalidate()
+            self._shown_screen = screen
+        ui_input.take()
+        tree.update_hover(ui_input)
+        menu_canvas.draw(screen if screen_key is None else screen_key, draw_static, tree.get_widgets())
+        # After drawing, so a click that changes the menu state still draws this frame as the screen clicked on
+        tree.dispatch_input(ui_input)
 
     def draw_title(self):
         """
         Draws the title of the game in the center of the screen.
         """
-        title_text_dimensions = measure_text_ex(game_assets.get_asset_font("slkscreb.ttf"), self._title, 80, 0)
+        title_text_dimensions = text_cache.measure(game_assets.get_asset_font("slkscreb.ttf", 80), self._title, 80, 0)
         centered_title_width = (WINDOW_WIDTH - title_text_dimensions.x) / 2
-        draw_text_ex(game_assets.get_asset_font("slkscreb.ttf"), self._title, Vector2(centered_title_width, 120), 80, 0, WHITE)
+        draw_font_text(game_assets.get_asset_font("slkscreb.ttf", 80), self._title, Vector2(centered_title_width, 120), 80, 0, WHITE)
 
-    def draw_difficulty_information(self, city, temp, speed):
+    def set_difficulty_information(self, city, temp, speed):
         """
-        Displays difficulty settings (city, temperature, and speed range) in the options menu.
+        Sets the difficulty settings (city, temperature, and speed range) displayed in the options menu.
         city (str): The name of the selected city.
         temp (str): The temperature in Fahrenheit.
         speed (str): The speed range selected.
         """
-        draw_text_ex(
-            game_assets.get_asset_font("slkscreb.ttf"),
+        self._difficulty_information = (city, temp, speed)
+
+    def draw_difficulty_information(self):
+        """
+        Displays the difficulty settings set by set_difficulty_information() in the options menu.
+        """
+        city, temp, speed = self._difficulty_information
+        draw_font_text(
+            game_assets.get_asset_font("slkscreb.ttf", 45),
             "City: " + city,
             Vector2(self._buttons["difficulty"].get_button_position().x, 480),
             45,
             0,
             WHITE,
         )
-        draw_text_ex(
-            game_assets.get_asset_font("slkscreb.ttf"),
+        draw_font_text(
+            game_assets.get_asset_font("slkscreb.ttf", 45),
             "Temperature: " + temp + " F",
             Vector2(self._buttons["difficulty"].get_button_position().x, 580),
             45,
             0,
             WHITE,
         )
-        draw_text_ex(
-            game_assets.get_asset_font("slkscreb.ttf"),
+        draw_font_text(
+            game_assets.get_asset_font("slkscreb.ttf", 45),
             "Speed range: " + speed,
             Vector2(self._buttons["difficulty"].get_button_position().x, 680),
             45,
@@ -155,124 +204,77 @@ class Menu:
         set_sound_volume(button_click, 0.4)
         play_sound(button_click)
 
-    def check_button_clicks_optimized(self):
-        """
-        Checks for mouse button clicks and handles the logic for each menu state.
-        Changes states based on button clicks (start, stats, options, exit, etc.).
-        Uses DoublylinkedList.
-        """
+    def start_button_clicked(self):
+        """Starts the game from the main menu."""
+        # Dont push start game screen yet, the loading screen replaces itself with it once loading is done
+        self._menu_state_stack.push("loading_screen")
+        self.play_button_click_sfx()
 
-        # call handling method based on the current_state
-        current_state = self._menu_state_stack.top()
-        self._menu_event_handlings[current_state]()
+    def stats_button_clicked(self):
+        """Opens the leaderboard from the main menu."""
+        self._menu_state_stack.push("leaderboard")
+        self.play_button_click_sfx()
 
-    def main_menu_buttons_handling(self):
-        """Check clicks for buttons on main menu."""
-        if is_mouse_button_pressed(MOUSE_BUTTON_LEFT) and check_collision_point_rec(
-            get_mouse_position(), self._buttons["start"].get_rectangle()
-        ):
-            # Pop but dont push start game screen yet, until timer has finished, then push menu and start to recalibrate
-            self._menu_state_stack.push("loading_screen")
-            self.play_button_click_sfx()
-            self._start_timer.activate()
-        elif is_mouse_button_pressed(MOUSE_BUTTON_LEFT) and check_collision_point_rec(
-            get_mouse_position(), self._buttons["stats"].get_rectangle()
-        ):
-            self._menu_state_stack.push("leaderboard")
-            self.play_button_click_sfx()
-        elif is_mouse_button_pressed(MOUSE_BUTTON_LEFT) and check_collision_point_rec(
-            get_mouse_position(), self._buttons["options"].get_rectangle()
-        ):
-            self._menu_state_stack.push("options")
-            self.play_button_click_sfx()
-        elif is_mouse_button_pressed(MOUSE_BUTTON_LEFT) and check_collision_point_rec(
-            get_mouse_position(), self._buttons["exit"].get_rectangle()
-        ):
-            self._exit_clicked = True
-
-    def options_buttons_handling(self):
-        """Check clicks for buttons on options menu."""
-        if is_mouse_button_pressed(MOUSE_BUTTON_LEFT) and check_collision_point_rec(
-            get_mouse_position(), self._buttons["main menu"].get_rectangle()
-        ):
-            self._menu_state_stack.pop()  # Go back to the main menu
-            self._menu_state_stack.push("main_menu")
-            self._difficulty_clicked = False
-            self._erase_file_clicked = False
-            self.play_button_click_sfx()
+    def options_button_clicked(self):
+        """Opens the options from the main menu."""
+        self._menu_state_stack.push("options")
+        self.play_button_click_sfx()
 
-        elif is_mouse_button_pressed(MOUSE_BUTTON_LEFT) and check_collision_point_rec(
-            get_mouse_position(), self._buttons["difficulty"].get_rectangle()
-        ):
-            if self._difficulty_clicked != True:
-                self._difficulty_clicked = True
-                self.play_button_click_sfx()
-            else:
-                self._difficulty_clicked = False
-                self.play_button_click_sfx()
-
-        elif is_mouse_button_pressed(MOUSE_BUTTON_LEFT) and check_collision_point_rec(
-            get_mouse_position(), self._buttons["erase file"].get_rectangle()
-        ):
-            if self._erase_file_clicked != True:
-                self._erase_file_clicked = True
-                self.play_button_click_sfx()
-
-    def leaderboard_buttons_handling(self):
-        """Check clicks for buttons on leaderboard menu."""
-        if is_mouse_button_pressed(MOUSE_BUTTON_LEFT) and check_collision_point_rec(
-            get_mouse_position(), self._buttons["main menu"].get_rectangle()
-        ):
-            self._menu_state_stack.pop()
-            self._menu_state_stack.push("main_menu")
-            self.play_button_click_sfx()
+    def exit_button_clicked(self):
+        """Exits the game, from the main menu or the death menu."""
+        self._exit_clicked = True
 
-    def death_menu_buttons_handling(self):
-        """Check clicks for buttons on death menu."""
-        if is_mouse_button_pressed(MOUSE_BUTTON_LEFT) and check_collision_point_rec(
-            get_mouse_position(), self._buttons["main menu"].get_rectangle()
-        ):
-            self._menu_state_stack.pop()  # go to main menu
+    def back_button_clicked(self):
+        """Goes back to the main menu from the options or the leaderboard."""
+        self._menu_state_stack.pop()
+        self._menu_state_stack.push("main_menu")
+        self._difficulty_clicked = False
+        self._erase_file_clicked = False
+        self.play_button_click_sfx()
+
+    def death_main_menu_button_clicked(self):
+        """Goes back to the main menu from the death menu."""
+        self._menu_state_stack.pop()  # go to main menu
+        self.play_button_click_sfx()
+
+    def difficulty_button_clicked(self):
+        """Shows or hides the city input box of the options."""
+        self._difficulty_clicked = not self._difficulty_clicked
+        self.play_button_click_sfx()
+
+    def erase_file_button_clicked(self):
+        """Erases the save data, from the options."""
+        if self._erase_file_clicked != True:
+            self._erase_file_clicked = True
             self.play_button_click_sfx()
-        elif is_mouse_button_pressed(MOUSE_BUTTON_LEFT) and check_collision_point_rec(
-            get_mouse_position(), self._buttons["exit"].get_rectangle()
-        ):
-            self._exit_clicked = True
 
     def run_menu(self):
         """
-        Runs the main menu by drawing buttons and handling button click checks.
+        Runs the main menu by drawing buttons and handling button clicks.
         """
-        self._buttons["start"].draw_button(RED, BLACK, Vector2(WINDOW_WIDTH / 2 - 310, 450))
-        self._buttons["stats"].draw_button(RED, BLACK, Vector2(WINDOW_WIDTH / 2 - 310, 550))
-        self._buttons["options"].draw_button(RED, BLACK, Vector2(WINDOW_WIDTH / 2 - 310, 650))
-        self._buttons["exit"].draw_button(RED, BLACK, Vector2(WINDOW_WIDTH / 2 - 310, 750))
-        self.draw_title()
-        # self.check_button_clicks()
-        self.check_button_clicks_optimized()
+        self.draw_screen("main_menu", self.draw_title)
 
     def run_leaderboard_menu(self):
         """
         Runs the leaderboard menu by drawing the 'main menu' button and displaying leaderboard stats.
         """
-        self._buttons["main menu"].draw_button(RED, BLACK, Vector2(WINDOW_WIDTH / 2 - 310, 850))
-        # self.check_button_clicks()
-        self.check_button_clicks_optimized()
-        self.draw_leaderboard_stats()
+        self.draw_screen("leaderboard", self.draw_leaderboard_stats)
 
     def run_death_menu(self):
         """
         Runs the death menu, drawing 'main menu' and 'exit' buttons, and displaying 'GAME OVER' text.
         """
-        self._buttons["main menu"].draw_button(RED, BLACK, Vector2(WINDOW_WIDTH / 2 - 700, 550))
-        self._buttons["exit"].draw_button(RED, BLACK, Vector2(WINDOW_WIDTH / 2 + 40, 550))
-        # self.check_button_clicks()
-        self.check_button_clicks_optimized()
-        title_text_dimensions = measure_text_ex(game_assets.get_asset_font("slkscreb.ttf"), "GAME OVER", 200, 0)
+        self.draw_screen("death_menu", self.draw_game_over_title)
+
+    def draw_game_over_title(self):
+        """
+        Draws the 'GAME OVER' text of the death menu.
+        """
+        title_text_dimensions = text_cache.measure(game_assets.get_asset_font("slkscreb.ttf", 200), "GAME OVER", 200, 0)
         centered_title_width = (WINDOW_WIDTH - title_text_dimensions.x) / 2
         centered_title_height = (WINDOW_HEIGHT - title_text_dimensions.y) / 2
-        draw_text_ex(
-            game_assets.get_asset_font("slkscreb.ttf"),
+        draw_font_text(
+            game_assets.get_asset_font("slkscreb.ttf", 200),
             "GAME OVER",
             Vector2(centered_title_width, int(centered_title_height / 1.5)),
             200,
@@ -282,32 +284,33 @@ class Menu:
 
     def run_options_menu(self):
         """
-        This function runs the options menu by drawing buttons and checking for button clicks.
+        This function runs the options menu by drawing buttons and handling button clicks.
         It allows the player to go back to the main menu or access difficulty settings.
         """
-        self._buttons["main menu"].draw_button(RED, BLACK, Vector2(WINDOW_WIDTH / 2 - 310, 850))
-        self._buttons["difficulty"].draw_button(RED, BLACK, Vector2(WINDOW_WIDTH / 2 - 310, 250))
-        self._buttons["erase file"].draw_button(RED, BLACK, Vector2(1600, 980))
-        # self.check_button_clicks()
-        self.check_button_clicks_optimized()
+        # The difficulty information is part of the screen, which is composed again when it changes
+        self.draw_screen("options", self.draw_difficulty_information, ("options",) + self._difficulty_information)
 
 
-class Button:
+class Button(Widget):
     """
     Every button is a stylized rectangle object with text that can be clicked and interacted with.
     It includes features like hover effects, repositioning, and drawing to the screen.
+    Buttons are widgets: the WidgetTree of a screen tells them when they're hovered and handles their clicks,
+    and the menu canvas only calls draw() when their hover state changed.
     """
 
-    def __init__(self, pos, width, height, text, font, font_size):
+    def __init__(self, pos, width, height, text, font, font_size, box_color=RED, text_color=BLACK):
+        super().__init__()
         self._pos = pos
         self._text = text
-        self._font = font
+        self._font = font  # LazyAsset handle of the font
         self._font_size = font_size
         self._width = width
         self._height = height
+        self._box_color = box_color
+        self._text_color = text_color
         # Create a rectangle representing the button's area, used for hover detection and drawing
         self._rectangle = Rectangle(self._pos.x, self._pos.y, self._width, self._height)
-        self._hovered_yet = False
 
     def get_button_position(self):
         """
@@ -321,27 +324,27 @@ class Button:
         Updates the button's rectangle to reflect the new position.
         """
         self._pos = pos
-        self._rectangle = Rectangle(self._pos.x, self._pos.y, self._width, self._height)
+        self._rectangle.x, self._rectangle.y = pos.x, pos.y
 
-    def is_hovered(self):
+    def reposition(self, pos):
         """
-        Checks if the mouse cursor is hovering over the button.
-        Returns True if the mouse cursor is inside the button's rectangle, otherwise False.
+        Repositions the button when its widget tree places it.
         """
-        mouse_pos = get_mouse_position()
-        in_rectangle_width = self._pos.x <= mouse_pos.x <= self._pos.x + self._width
-        in_rectangle_height = self._pos.y <= mouse_pos.y <= self._pos.y + self._height
-        return in_rectangle_width and in_rectangle_height
+        self.reposition_button(pos)
 
-    def draw_button(self, color1, color2, pos):
+    def on_hover_changed(self, hovered):
         """
-        Draws the button, including hover effects. Changes color on hover.
+        Plays the hover sound when the mouse enters the button.
         """
-        # Update the button position
-        self.reposition_button(pos)
+        if hovered:
+            self._play_hover_sound()
 
+    def draw(self):
+        """
+        Draws the button, including hover effects. Changes color on hover.
+        """
         # Set the button colors based on hover status
-        box_color, text_color = self._get_button_colors(color1, color2)
+        box_color, text_color = self._get_button_colors()
 
         # Draw the button's background
         self._draw_button_background(box_color)
@@ -352,23 +355,13 @@ class Button:
         # Draw the button's border
         self._draw_button_border()
 
-    def _get_button_colors(self, color1, color2):
+    def _get_button_colors(self):
         """
         Determines the button colors based on the hover state.
         """
-        # Default button colors
-        box_color, text_color = color1, color2
-
-        # If the button is hovered, change the colors
         if self.is_hovered():
-            box_color, text_color = GRAY, LIGHTGRAY
-            if not self._hovered_yet:
-                self._play_hover_sound()
-                self._hovered_yet = True
-        else:
-            self._hovered_yet = False
-
-        return box_color, text_color
+            return GRAY, LIGHTGRAY
+        return self._box_color, self._text_color
 
     def _play_hover_sound(self):
         """
@@ -388,16 +381,15 @@ class Button:
         """
         Draws the button's text centered within the button.
         """
-        text_dimensions = measure_text_ex(self._font, self._text, self._font_size, 0.0)
+        font = self._font.get()
+        text_dimensions = text_cache.measure(font, self._text, self._font_size, 0.0)
         text_width, text_height = text_dimensions.x, text_dimensions.y
-        draw_text_pro(
-            self._font,
+        draw_font_text(
+            font,
             self._text,
             Vector2(
                 self._pos.x + self._rectangle.width / 2 - text_width / 2, self._pos.y + self._rectangle.height / 2 - text_height / 2
             ),
-            Vector2(0, 0),
-            0,
             self._font_size,
             0.0,
             text_color,
@@ -0,0 +1,103 @@
+from Settings import *
+
+"""
+Retained drawing of the menu screens. A menu screen is composed once into a window-sized RenderTexture (the
+canvas): its static content (title, leaderboard, GAME OVER) and every widget (button). After that, a frame only
+redraws the widgets whose look changed (e.g. a button that became hovered) into the canvas, and draws the canvas
+to the screen. A frame of a menu nobody touches is a single full-screen blit.
+"""
+
+# Scratch rectangle of the blitted canvas; render textures are stored upside down, hence the negative height
+_canvas_source = Rectangle(0, 0, 0, 0)
+_canvas_position = Vector2(0, 0)
+
+
+class MenuCanvas:
+    """
+    Window-sized RenderTexture a menu screen is composed into, see the module docstring.
+
+    A widget is any object with get_draw_state(), returning a value that changes whenever the widget would look
+    different (e.g. whether a button is hovered), and draw(), drawing the widget over everything it covers on the
+    canvas.
+
+    Attributes:
+    width: Width of the canvas in pixels
+    height: Height of the canvas in pixels
+    clear_color: Color the canvas is cleared to before a screen is composed
+    """
+
+    def __init__(self, width=WINDOW_WIDTH, height=WINDOW_HEIGHT, clear_color=BG_COLOR):
+        self._width = width
+        self._height = height
+        self._clear_color = clear_color
+        self._canvas = None  # RenderTexture, loaded when the first screen is drawn
+        self._screen = None  # key of the screen on the canvas
+        self._widgets = None  # widget list of the screen on the canvas
+        self._drawn_states = {}  # widget -> draw state it has on the canvas
+        self._compositions = 0
+        self._widget_redraws = 0
+
+    def draw(self, screen, draw_static, widgets):
+        """
+        Draws a menu screen. screen is a key identifying everything draw_static() draws: the canvas is composed
+        again (draw_static() then every widget) when it's different from the last frame's, or when widgets isn't
+        the same list (e.g. a widget was hidden, see WidgetTree.get_widgets()). Otherwise only the widgets whose
+        draw state changed are redrawn. Call between begin_drawing() and end_drawing().
+        """
+        if self._canvas is None:
+            self._canvas = load_render_texture(self._width, self._height)
+        if screen != self._screen or widgets is not self._widgets:
+            self._compose(screen, draw_static, widgets)
+        else:
+            self._redraw_changed(widgets)
+        _canvas_source.width, _canvas_source.height = self._canvas.texture.width, -self._canvas.texture.height
+        DrawTextureRec(self._canvas.texture, _canvas_source, _canvas_position, WHITE)
+
+    def _compose(self, screen, draw_static, widgets):
+        """Clears the canvas and draws a screen on it."""
+        self._screen = screen
+        self._widgets = widgets
+        self._drawn_states.clear()
+        begin_texture_mode(self._canvas)
+        clear_background(self._clear_color)
+        draw_static()
+        for widget in widgets:
+            widget.draw()
+            self._drawn_states[widget] = widget.get_draw_state()
+        end_texture_mode()
+        self._compositions += 1
+
+    def _redraw_changed(self, widgets):
+        """Redraws the widgets whose draw state changed since they were drawn on the canvas."""
+        in_texture_mode = False
+        for widget in widgets:
+            state = widget.get_draw_state()
+            if self._drawn_states.get(widget) != state:
+                if not in_texture_mode:
+                    begin_texture_mode(self._canvas)
+                    in_texture_mode = True
+                widget.draw()
+                self._drawn_states[widget] = state
+                self._widget_redraws += 1
+        if in_texture_mode:
+            end_texture_mode()
+
+    def invalidate(self):
+        """Composes the canvas again on the next draw(), e.g. after the data of the static content changed."""
+        self._screen = None
+        self._widgets = None
+
+    def get_stats(self):
+        """Returns (screens composed, widgets redrawn) since the canvas was created."""
+        return self._compositions, self._widget_redraws
+
+    def unload(self):
+        """Unloads the canvas, e.g. while the game is played. The next draw() loads and composes it again."""
+        if self._canvas is not None:
+            unload_render_texture(self._canvas)
+            self._canvas = None
+        self.invalidate()
+
+
+# The canvas the menu screens are drawn on
+menu_canvas = MenuCanvas()
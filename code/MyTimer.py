@@ -1,48 +1,158 @@
-from Settings import get_time
 from pyray import *
 from raylib import *
+from Settings import get_time
+from heapq import heapify, heappop, heappush, heapreplace
+
+# Events due within this many seconds of the current time run now, so float rounding in the time source
+# (e.g. ticks times the tick length) can't push an event back by a whole tick
+TIME_EPSILON = 1e-9
+
+# Fields of a scheduled event, stored as a list so the heap compares them by due time, then by insertion order
+EVENT_DUE = 0
+EVENT_ORDER = 1
+EVENT_FUNC = 2  # None once the event was cancelled or ran for the last time
+EVENT_PERIOD = 3  # None for one-shot events
+EVENT_FIRST_DUE = 4
+EVENT_RUNS = 5
+
+
+class Scheduler:
+    """
+    Runs functions at given times, using a min-heap of events ordered by due time.
+    run_due() only looks at the earliest event, so events that aren't due cost nothing per frame,
+    and scheduling or cancelling an event is O(log n).
+
+    Repeating events are due at exact multiples of their period after the first run, instead of one
+    period after the frame they ran on, so they don't drift. If several periods passed since the last
+    run_due() (a long frame), the event runs once for every missed period.
+
+    Attributes:
+    time_source: Function returning the current time in seconds
+    """
+
+    def __init__(self, time_source=get_time):
+        self._time_source = time_source
+        self._events = []
+        self._order = 0  # keeps events due at the same time in the order they were scheduled
+        self._cancelled = 0  # cancelled events still in the heap
+
+    def get_time(self):
+        """Returns the current time of the scheduler's time source."""
+        return self._time_source()
+
+    def schedule(self, delay, func, period=None):
+        """
+        Runs func() delay seconds from now, then every period seconds if period is given.
+        Returns the event, which can be passed to cancel().
+        """
+        due = self._time_source() + delay
+        self._order += 1
+        event = [due, self._order, func, period, due, 0]
+        heappush(self._events, event)
+        return event
+
+    def cancel(self, event):
+        """Cancels a scheduled event. Cancelling an event that already ran for the last time does nothing."""
+        if event[EVENT_FUNC] is not None:
+            event[EVENT_FUNC] = None
+            self._cancelled += 1
+            # Cancelled events are dropped when they reach the top of the heap, or all at once when they pile up
+            if self._cancelled > len(self._events) // 2:
+                # in place, run_due() may be iterating over the same list
+                self._events[:] = [event for event in self._events if event[EVENT_FUNC] is not None]
+                heapify(self._events)
+                self._cancelled = 0
+
+    def is_pending(self, event):
+        """Returns True if the event is still going to run."""
+        return event[EVENT_FUNC] is not None
+
+    def run_due(self):
+        """Runs every event that is due, in due time order. Returns the number of functions called."""
+        now = self._time_source() + TIME_EPSILON
+        events = self._events
+        calls = 0
+        while events and events[0][EVENT_DUE] <= now:
+            event = events[0]
+            func = event[EVENT_FUNC]
+            if func is None:
+                heappop(events)
+                self._cancelled -= 1
+                continue
+            if event[EVENT_PERIOD] is None:
+                heappop(events)
+                event[EVENT_FUNC] = None
+            else:
+                # Computed from the first due time so rounding errors don't add up over many periods
+                event[EVENT_RUNS] += 1
+                event[EVENT_DUE] = event[EVENT_FIRST_DUE] + event[EVENT_RUNS] * event[EVENT_PERIOD]
+                self._order += 1
+                event[EVENT_ORDER] = self._order
+                heapreplace(events, event)
+            # Rescheduled before the call, so the function can cancel its own event
+            func()
+            calls += 1
+        return calls
+
+    def clear(self):
+        """Cancels every event, e.g. when the time source restarts from 0."""
+        for event in self._events:
+            event[EVENT_FUNC] = None
+        self._events.clear()
+        self._cancelled = 0
+
+    def get_pending_count(self):
+        """Returns the number of events that are going to run."""
+        return len(self._events) - self._cancelled
+
+
+# Scheduler running on the wall clock, for timers outside of the game simulation (e.g. menus).
+# SpaceGame runs it once per frame.
+wall_clock_scheduler = Scheduler()
 
 
 class Timer:
-    def __init__(self, duration: int, repeat=False, autostart=False, func=None):
+    def __init__(self, duration: int, repeat=False, autostart=False, func=None, scheduler=None):
         # set the timer duration, repeat flag, autostart flag, and function to call when timer ends
+        # the timer runs on a Scheduler; game timers use the game's simulation time scheduler instead of the wall clock
+        self.scheduler = scheduler if scheduler is not None else wall_clock_scheduler
         self.duration = duration
-        self.start_time = 0
-        self.active = False
         self.repeat = repeat
         self.func = func
+        self._event = None
 
         # if autostart is True, start the timer automatically when the Timer object is created
         if autostart:
             self.activate()
 
     def activate(self):
-        self.active = True
-        self.start_time = get_time()
+        """Starts the timer from now, restarting it if it was already running."""
+        self.deactivate()
+        self._event = self.scheduler.schedule(self.duration, self.finish, self.duration if self.repeat else None)
 
     def deactivate(self):
-        self.active = False
-        self.start_time = 0
-        if self.repeat:
-            self.activate()
+        """Stops the timer without calling its function."""
+        if self._event is not None:
+            self.scheduler.cancel(self._event)
+            self._event = None
+
+    def is_active(self):
+        """Returns True if the timer is running."""
+        return self._event is not None and self.scheduler.is_pending(self._event)
 
-    def update(self):
-        if self.active:
-            elapsed_time = get_time() - self.start_time
-            if elapsed_time >= self.duration:
-                if self.func and self.start_time:
-                    self.func()
-                self.deactivate()
-            # print(elapsed_time)
+    def finish(self):
+        """Called by the scheduler when the duration is up."""
+        if self.func:
+            self.func()
 
 
 # testing
 if __name__ == "__main__":
     init_window(1920, 1080, "Timer")
-    test_timer = Timer(5, False, False)
+    test_timer = Timer(1, True, False, lambda: print("tick", get_time()))
     test_timer.activate()
     while not window_should_close():
-        test_timer.update()
+        wall_clock_scheduler.run_due()
         begin_drawing()
         clear_background(BLACK)
         end_drawing()
@@ -0,0 +1,146 @@
+import numpy as np
+
+"""
+Batched exact collision tests. Each function takes arrays of circle centers and radii and tests them
+all at once in NumPy, returning the indices of the circles that hit. The math mirrors raylib's
+CheckCollisionCircleLine and CheckCollisionCircleRec, so results match the single-shape raylib calls
+without crossing into C once per asteroid.
+
+A handful of shapes is tested faster one at a time than through NumPy's per-call overhead, so every batched
+test also has a plain Python version for a single circle.
+"""
+
+FLOAT32_EPSILON = float(np.finfo(np.float32).eps)  # length below which raylib treats a segment as a point
+
+
+def circles_hit_segment(center_x, center_y, radius, p1, p2):
+    """
+    Returns a bool mask of the circles touching the line segment p1-p2 (same test as check_collision_circle_line).
+    center_x, center_y and radius can be arrays or numbers; p1 and p2 are (x, y) pairs.
+    """
+    center_x, center_y = np.asarray(center_x, dtype=np.float64), np.asarray(center_y, dtype=np.float64)
+    dx, dy = p1[0] - p2[0], p1[1] - p2[1]
+    length_sq = dx * dx + dy * dy
+    if abs(dx) + abs(dy) <= FLOAT32_EPSILON:
+        # Degenerate segment, test against the point instead
+        return (center_x - p1[0]) ** 2 + (center_y - p1[1]) ** 2 <= np.square(radius)
+
+    # Closest point on the segment to each circle center
+    t = np.clip(((center_x - p1[0]) * (p2[0] - p1[0]) + (center_y - p1[1]) * (p2[1] - p1[1])) / length_sq, 0.0, 1.0)
+    closest_dx = p1[0] - t * dx - center_x
+    closest_dy = p1[1] - t * dy - center_y
+    return closest_dx * closest_dx + closest_dy * closest_dy <= np.square(radius)
+
+
+def circle_hits_segment(center_x, center_y, radius, p1, p2):
+    """Returns True if the circle touches the line segment p1-p2, like circles_hit_segment() for a single circle."""
+    dx, dy = p1[0] - p2[0], p1[1] - p2[1]
+    length_sq = dx * dx + dy * dy
+    if abs(dx) + abs(dy) <= FLOAT32_EPSILON:
+        return (center_x - p1[0]) ** 2 + (center_y - p1[1]) ** 2 <= radius * radius
+    t = min(max(((center_x - p1[0]) * (p2[0] - p1[0]) + (center_y - p1[1]) * (p2[1] - p1[1])) / length_sq, 0.0), 1.0)
+    closest_dx = p1[0] - t * dx - center_x
+    closest_dy = p1[1] - t * dy - center_y
+    return closest_dx * closest_dx + closest_dy * closest_dy <= radius * radius
+
+
+def circle_hits_triangle(center_x, center_y, radius, v1, v2, v3):
+    """Returns True if the circle touches any side of the triangle v1-v2-v3, like circles_hit_triangle() for a single circle."""
+    # Most circles are nowhere near the triangle, those out of reach of its bounding box are rejected first
+    if center_x + radius < min(v1[0], v2[0], v3[0]) or center_x - radius > max(v1[0], v2[0], v3[0]):
+        return False
+    if center_y + radius < min(v1[1], v2[1], v3[1]) or center_y - radius > max(v1[1], v2[1], v3[1]):
+        return False
+    return (
+        circle_hits_segment(center_x, center_y, radius, v1, v2)
+        or circle_hits_segment(center_x, center_y, radius, v1, v3)
+        or circle_hits_segment(center_x, center_y, radius, v2, v3)
+    )
+
+
+def circle_hits_rect(center_x, center_y, radius, rect_x, rect_y, rect_width, rect_height):
+    """Returns True if the circle touches the rectangle, like circles_hit_rects() for a single pair."""
+    half_width, half_height = rect_width / 2, rect_height / 2
+    dx = abs(center_x - (rect_x + half_width))
+    dy = abs(center_y - (rect_y + half_height))
+    if dx > half_width + radius or dy > half_height + radius:
+        return False
+    if dx <= half_width or dy <= half_height:
+        return True
+    return (dx - half_width) ** 2 + (dy - half_height) ** 2 <= radius * radius
+
+
+def circles_hit_triangle(center_x, center_y, radius, v1, v2, v3):
+    """
+    Returns the indices of the circles touching any side of the triangle v1-v2-v3.
+    Matches the three check_collision_circle_line calls used for the player's triangular hitbox.
+    """
+    hit = circles_hit_segment(center_x, center_y, radius, v1, v2)
+    hit |= circles_hit_segment(center_x, center_y, radius, v1, v3)
+    hit |= circles_hit_segment(center_x, center_y, radius, v2, v3)
+    return np.flatnonzero(hit)
+
+
+def circles_hit_rects(center_x, center_y, radius, rect_x, rect_y, rect_width, rect_height):
+    """
+    Tests every circle against every rectangle (same test as check_collision_circle_rec).
+    Returns (circle_indices, rect_indices) arrays with one entry per colliding pair.
+    """
+    center_x = np.asarray(center_x, dtype=np.float64)[:, None]
+    center_y = np.asarray(center_y, dtype=np.float64)[:, None]
+    radius = np.broadcast_to(np.asarray(radius, dtype=np.float64), center_x.shape[:1])[:, None]
+    half_width = np.asarray(rect_width, dtype=np.float64)[None, :] / 2
+    half_height = np.asarray(rect_height, dtype=np.float64)[None, :] / 2
+
+    # Distance from each circle center to each rectangle center, folded into one quadrant
+    dx = np.abs(center_x - (np.asarray(rect_x, dtype=np.float64)[None, :] + half_width))
+    dy = np.abs(center_y - (np.asarray(rect_y, dtype=np.float64)[None, :] + half_height))
+
+    in_reach = (dx <= half_width + radius) & (dy <= half_height + radius)
+    overlaps_side = (dx <= half_width) | (dy <= half_height)
+    corner_distance_sq = (dx - half_width) ** 2 + (dy - half_height) ** 2
+    hit = in_reach & (overlaps_side | (corner_distance_sq <= radius * radius))
+    return np.nonzero(hit)
+
+
+if __name__ == "__main__":
+    # Compare the batched tests against raylib's single-shape checks; raylib's collision functions don't need a window
+    from pyray import Vector2, Rectangle, check_collision_circle_line, check_collision_circle_rec
+
+    rng = np.random.default_rng(0)
+    centers = rng.uniform(0, 400, (2000, 2)).round()
+    radii = rng.uniform(5, 60, 2000)
+    triangle = ((200.0, 142.0), (144.0, 225.0), (256.0, 225.0))
+    rects = rng.uniform(0, 400, (10, 2))
+    sizes = rng.uniform(5, 60, (10, 2))
+
+    batched_triangle = set(circles_hit_triangle(centers[:, 0], centers[:, 1], radii, *triangle).tolist())
+    raylib_triangle = set()
+    v1, v2, v3 = (Vector2(*vertex) for vertex in triangle)
+    for i, ((x, y), r) in enumerate(zip(centers.tolist(), radii.tolist())):
+        center = Vector2(x, y)
+        if (
+            check_collision_circle_line(center, r, v1, v2)
+            or check_collision_circle_line(center, r, v1, v3)
+            or check_collision_circle_line(center, r, v2, v3)
+        ):
+            raylib_triangle.add(i)
+    print("triangle hits match raylib:", batched_triangle == raylib_triangle, len(raylib_triangle))
+    single_triangle = {i for i, ((x, y), r) in enumerate(zip(centers.tolist(), radii.tolist())) if circle_hits_triangle(x, y, r, *triangle)}
+    print("single triangle hits match raylib:", single_triangle == raylib_triangle)
+
+    circle_ids, rect_ids = circles_hit_rects(centers[:, 0], centers[:, 1], radii, rects[:, 0], rects[:, 1], sizes[:, 0], sizes[:, 1])
+    batched_rects = set(zip(circle_ids.tolist(), rect_ids.tolist()))
+    raylib_rects = set()
+    for i, ((x, y), r) in enumerate(zip(centers.tolist(), radii.tolist())):
+        for j, ((rx, ry), (rw, rh)) in enumerate(zip(rects.tolist(), sizes.tolist())):
+            if check_collision_circle_rec(Vector2(x, y), r, Rectangle(rx, ry, rw, rh)):
+                raylib_rects.add((i, j))
+    print("rectangle hits match raylib:", batched_rects == raylib_rects, len(raylib_rects))
+    single_rects = {
+        (i, j)
+        for i, ((x, y), r) in enumerate(zip(centers.tolist(), radii.tolist()))
+        for j, ((rx, ry), (rw, rh)) in enumerate(zip(rects.tolist(), sizes.tolist()))
+        if circle_hits_rect(x, y, r, rx, ry, rw, rh)
+    }
+    print("single rectangle hits match raylib:", single_rects == raylib_rects)
@@ -0,0 +1,79 @@
+class ObjectPool:
+    """
+    Fixed-capacity pool of reusable objects. Every object is created up front, acquire() pops one off
+    the free list and release() puts it back, so spawning and despawning during gameplay never allocates.
+
+    The objects currently in use are kept in an active list. Releasing swaps the last active object into
+    the released object's slot, so removal is O(1) but does not keep the list in order. Loops that release
+    objects while iterating should walk the active list backwards (see release_where()).
+
+    Several pools can share one active list by passing shared_with, which lets different object types
+    (e.g. the three power-up types) live in a single list while each type keeps its own free list.
+
+    Attributes:
+    factory: Function that creates a new object for the pool
+    capacity: Number of objects created up front
+    """
+
+    def __init__(self, factory, capacity, shared_with=None):
+        self._free = [factory() for i in range(capacity)]
+        self._owned = frozenset(self._free)  # every object created by this pool, active or not
+        self._capacity = capacity
+        if shared_with is not None:
+            self._active = shared_with._active
+            self._active_index = shared_with._active_index
+        else:
+            self._active = []  # objects in use
+            self._active_index = {}  # object -> its index in self._active
+
+    def acquire(self):
+        """
+        Takes an object off the free list and marks it as active.
+        Returns None if every object of the pool is already in use.
+        """
+        if not self._free:
+            return None
+        obj = self._free.pop()
+        self._active_index[obj] = len(self._active)
+        self._active.append(obj)
+        return obj
+
+    def release(self, obj):
+        """Returns an active object of this pool to the free list using an O(1) swap-remove."""
+        index = self._active_index.pop(obj)
+        last = self._active.pop()
+        if last is not obj:
+            self._active[index] = last
+            self._active_index[last] = index
+        self._free.append(obj)
+
+    def release_where(self, should_release):
+        """
+        Releases every active object of this pool for which should_release(obj) returns True.
+        Walks the active list backwards so swapped-in objects have already been checked.
+        Objects of other pools sharing the active list are skipped.
+        """
+        for index in range(len(self._active) - 1, -1, -1):
+            obj = self._active[index]
+            if obj in self._owned and should_release(obj):
+                self.release(obj)
+
+    def release_all(self):
+        """Returns every active object of this pool to its free list, leaving other pools' objects in a shared list."""
+        self.release_where(self.owns)
+
+    def owns(self, obj):
+        """Returns True if the object was created by this pool."""
+        return obj in self._owned
+
+    def get_active(self):
+        """Returns the list of active objects. The list object stays the same for the life of the pool."""
+        return self._active
+
+    def get_capacity(self):
+        """Returns the number of objects owned by the pool."""
+        return self._capacity
+
+    def get_free_count(self):
+        """Returns the number of objects that can still be acquired."""
+        return len(self._free)
@@ -0,0 +1,143 @@
+from Settings import *
+from time import perf_counter
+import numpy as np
+
+"""
+Frame profiler for the game screen. The game adds the time of each phase and entity type to the current frame
+with add_since(), and end_frame() stores the frame as one row of a preallocated ring buffer. Recording costs a
+perf_counter() call and a list update per measurement, so it stays on all the time; the statistics are only
+computed while the overlay is visible, and only a few times per second.
+"""
+
+# Phases of a game frame (several simulation ticks can run in one frame, their times add up)
+PHASE_TIMERS = 0  # the game scheduler's run_due
+PHASE_SPAWN = 1  # spawn_obstacles_collectibles
+PHASE_PLAYER = 2  # update_player_mechanics
+PHASE_COLLISIONS = 3  # initialize_collision_checks
+PHASE_MUSIC = 4  # update_music_stream
+PHASE_DRAW = 5  # draw_game, which fills the render queue
+PHASE_RENDER = 6  # the render queue's flush
+PHASE_NAMES = ("timers", "spawn", "player", "collisions", "music", "draw", "render")
+
+# Entity types, timed over their update and draw (queueing their draw commands)
+ENTITY_ASTEROIDS = 7
+ENTITY_POWER_UPS = 8
+ENTITY_TREASURE = 9
+ENTITY_STARS = 10
+ENTITY_SHIP = 11  # the spaceship and its lasers
+ENTITY_NAMES = ("asteroids", "power-ups", "treasure", "stars", "ship")
+
+SECTION_COUNT = len(PHASE_NAMES) + len(ENTITY_NAMES)
+PROFILER_HISTORY = 240  # frames kept in the ring buffer
+PROFILER_REFRESH_FRAMES = 15  # frames between two refreshes of the overlay's statistics
+
+
+class FrameProfiler:
+    """
+    Keeps the timings of the last frames in a ring buffer and draws them as an overlay:
+    a frame time graph, frame time percentiles, the mean time of every phase and entity type and live entity counts.
+
+    Attributes:
+    capacity: Number of frames kept
+    """
+
+    def __init__(self, capacity=PROFILER_HISTORY):
+        self._capacity = capacity
+        # Column 0 is the time between two frames, the other columns are the sections
+        self._samples = np.zeros((capacity, SECTION_COUNT + 1))
+        self._frame_count = 0
+        self._current = [0.0] * (SECTION_COUNT + 1)
+        self._empty_frame = [0.0] * (SECTION_COUNT + 1)
+        self._last_frame_end = None
+        self._visible = False
+        self._stats = None  # statistics shown by the overlay, refreshed every PROFILER_REFRESH_FRAMES frames
+
+    def add_since(self, section, start):
+        """
+        Adds the time since start (a perf_counter() value) to a section of the current frame.
+        Returns the current perf_counter() value, so consecutive sections can be timed without another call.
+        """
+        now = perf_counter()
+        self._current[section + 1] += now - start
+        return now
+
+    def end_frame(self):
+        """Stores the current frame in the ring buffer and starts a new one."""
+        now = perf_counter()
+        if self._last_frame_end is not None:
+            self._current[0] = now - self._last_frame_end
+        self._last_frame_end = now
+        self._samples[self._frame_count % self._capacity] = self._current
+        self._current[:] = self._empty_frame
+        self._frame_count += 1
+        if self._visible and self._frame_count % PROFILER_REFRESH_FRAMES == 0:
+            self._stats = None
+
+    def toggle(self):
+        """Shows or hides the overlay."""
+        self._visible = not self._visible
+        self._stats = None
+
+    def is_visible(self):
+        """Returns True if the overlay is shown."""
+        return self._visible
+
+    def get_samples(self):
+        """Returns the recorded frames, oldest first, as an array of seconds (column 0 is the frame time)."""
+        if self._frame_count < self._capacity:
+            return self._samples[: self._frame_count]
+        return np.roll(self._samples, -(self._frame_count % self._capacity), axis=0)
+
+    def get_frame_time_percentiles(self):
+        """Returns the p50, p95 and p99 frame times in milliseconds, or None before two frames were recorded."""
+        # The first frame has no frame time
+        frame_times = self.get_samples()[1:, 0] if self._frame_count <= self._capacity else self.get_samples()[:, 0]
+        if len(frame_times) == 0:
+            return None
+        return tuple((np.percentile(frame_times, (50, 95, 99)) * 1000).tolist())
+
+    def get_section_means(self):
+        """Returns the mean time per frame of every section in milliseconds, in section order."""
+        samples = self.get_samples()
+        if len(samples) == 0:
+            return [0.0] * SECTION_COUNT
+        return (samples[:, 1:].mean(axis=0) * 1000).tolist()
+
+    def draw(self, entity_counts, render_stats=None, x=20, y=160):
+        """
+        Draws the overlay if it's visible. entity_counts maps entity type names to their live counts, and
+        render_stats is the render queue's (commands, groups, seconds) of the frame, see RenderQueue.get_stats().
+        The graph shows one bar per frame, with a line at the 60 FPS frame budget.
+        """
+        if not self._visible:
+            return
+        if self._stats is None:
+            self._stats = (self.get_frame_time_percentiles(), self.get_section_means())
+        percentiles, section_means = self._stats
+
+        graph_height = 100
+        draw_rectangle(x - 10, y - 10, self._capacity * 2 + 20, 572, Color(0, 0, 0, 180))
+        # 16.7 ms is drawn at half the graph's height
+        scale = graph_height / 2 / (1000 / 60)
+        for index, frame_time in enumerate(self.get_samples()[:, 0].tolist()):
+            bar_height = min(graph_height, int(frame_time * 1000 * scale))
+            color = GREEN if frame_time < 1 / 60 else YELLOW if frame_time < 1 / 30 else RED
+            draw_rectangle(x + index * 2, y + graph_height - bar_height, 2, bar_height, color)
+        draw_line(x, y + graph_height // 2, x + self._capacity * 2, y + graph_height // 2, GRAY)
+
+        line_y = y + graph_height + 10
+        if percentiles is not None:
+            draw_text(f"frame p50 {percentiles[0]:.1f}  p95 {percentiles[1]:.1f}  p99 {percentiles[2]:.1f} ms", x, line_y, 20, WHITE)
+        line_y += 30
+        for index, name in enumerate(PHASE_NAMES):
+            draw_text(f"{name:<11}{section_means[index]:6.2f} ms", x, line_y, 20, WHITE)
+            line_y += 22
+        line_y += 8
+        for index, name in enumerate(ENTITY_NAMES):
+            mean = section_means[len(PHASE_NAMES) + index]
+            draw_text(f"{name:<11}{entity_counts.get(name, 0):>6}{mean:8.2f} ms", x, line_y, 20, WHITE)
+            line_y += 22
+        if render_stats is not None:
+            commands, groups = render_stats[:2]
+            line_y += 8
+            draw_text(f"queued {commands} draws in {groups} texture groups", x, line_y, 20, WHITE)
@@ -0,0 +1,107 @@
+from Settings import *
+from time import perf_counter
+
+"""
+Render queue of the game screen. Sprites and the HUD don't draw while the game is drawn: they add draw commands
+with a layer to the queue, and the queue draws everything at the end of the frame, layer by layer. Inside a
+layer, the commands are grouped by texture (the atlas page of a sprite, the font of a text), so raylib's batch
+only flushes when the texture actually changes instead of whenever two sprite types interleave.
+"""
+
+# Layers, drawn in this order
+RENDER_LAYER_BACKGROUND = 0  # stars
+RENDER_LAYER_PICKUPS = 1  # power-ups and treasure
+RENDER_LAYER_ASTEROIDS = 2
+RENDER_LAYER_PLAYER = 3  # the spaceship and its lasers
+RENDER_LAYER_HUD = 4  # hearts, ammo, oxygen, score and clock
+RENDER_LAYER_UI = 5  # pause screen
+RENDER_LAYER_NAMES = ("background", "pickups", "asteroids", "player", "HUD", "UI")
+
+# Scratch structs filled in for every sprite when the queue is drawn
+_dest_rect = Rectangle(0, 0, 0, 0)
+_draw_origin = Vector2(0, 0)
+
+
+def _draw_sprites(texture, commands):
+    """Draws the queued sprites of one texture."""
+    for source, x, y, width, height, origin_x, origin_y, rotation, tint in commands:
+        _dest_rect.x, _dest_rect.y, _dest_rect.width, _dest_rect.height = x, y, width, height
+        _draw_origin.x, _draw_origin.y = origin_x, origin_y
+        DrawTexturePro(texture, source, _dest_rect, _draw_origin, rotation, tint)
+
+
+def _call(function, commands):
+    """Calls a queued function with the arguments of each of its commands."""
+    for args in commands:
+        function(*args)
+
+
+class RenderQueue:
+    """
+    Collects the draw commands of a frame and draws them sorted by layer, then grouped by texture, in flush().
+    Commands with the same layer and key are drawn in the order they were added, and the groups of a layer in
+    the order their first command was added.
+
+    Attributes:
+    layer_count: Number of layers
+    """
+
+    def __init__(self, layer_count=len(RENDER_LAYER_NAMES)):
+        # One dict per layer of key -> (function drawing the group, commands); a sprite's key is its texture,
+        # another command's its function
+        self._layers = [{} for layer in range(layer_count)]
+        self._command_count = 0
+        self._stats = (0, 0, 0.0)  # commands, groups and seconds of the last flush
+
+    def add_sprite(self, layer, region, x, y, width, height, origin_x=0, origin_y=0, rotation=0, tint=WHITE):
+        """
+        Queues a textured quad: the rectangle of region (an AtlasRegion) stretched to width and height at (x, y),
+        rotated by rotation degrees around (origin_x, origin_y).
+        """
+        texture = region.get()
+        group = self._layers[layer].get(texture)
+        if group is None:
+            group = self._layers[layer][texture] = (_draw_sprites, [])
+        group[1].append((region.get_source(), x, y, width, height, origin_x, origin_y, rotation, tint))
+        self._command_count += 1
+
+    def add(self, layer, function, *args):
+        """
+        Queues a call of function(*args), e.g. a draw_text_ex() or an object's own batched draw. Calls of the same
+        function in a layer are drawn together. The arguments are kept as they are, so they must not be changed
+        before the queue is drawn.
+        """
+        group = self._layers[layer].get(function)
+        if group is None:
+            group = self._layers[layer][function] = (_call, [])
+        group[1].append(args)
+        self._command_count += 1
+
+    def flush(self):
+        """Draws and clears the queued commands. Call between begin_drawing() and end_drawing()."""
+        start = perf_counter()
+        groups = 0
+        for commands_by_key in self._layers:
+            for key, (draw_group, commands) in commands_by_key.items():
+                draw_group(key, commands)
+            groups += len(commands_by_key)
+            commands_by_key.clear()
+        self._stats = (self._command_count, groups, perf_counter() - start)
+        self._command_count = 0
+
+    def clear(self):
+        """Drops the queued commands without drawing them."""
+        for commands_by_key in self._layers:
+            commands_by_key.clear()
+        self._command_count = 0
+
+    def get_stats(self):
+        """
+        Returns (commands, groups, seconds) of the last flush. Every group is one texture or function, so the
+        number of groups is an upper bound on the texture switches (and so the draw calls) of the frame.
+        """
+        return self._stats
+
+
+# The queue the game screen is drawn through
+render_queue = RenderQueue()
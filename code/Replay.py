@@ -0,0 +1,150 @@
+import json
+import struct
+import zlib
+
+"""
+Input recording for deterministic replays. A game seeded with a known seed only depends on the player's input,
+so a replay is the seed and game settings plus one byte of input per simulation tick. Keyframes taken every few
+seconds store a summary of the game state, so playback can tell exactly when a replay stopped matching.
+
+File layout: REPLAY_MAGIC, then zlib-compressed data made of the header JSON, the keyframes JSON
+(each prefixed with its length as a 32-bit unsigned int) and the raw input bytes.
+"""
+
+REPLAY_MAGIC = b"ASTREPL1"
+
+# Bits of the per-tick input byte
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+INPUT_UP = 4
+INPUT_DOWN = 8
+INPUT_FIRE = 16
+
+
+def pack_input(move_x, move_y, fire):
+    """Packs a movement direction (-1, 0 or 1 on each axis) and a fire flag into one input byte."""
+    bits = INPUT_LEFT if move_x < 0 else INPUT_RIGHT if move_x > 0 else 0
+    bits |= INPUT_UP if move_y < 0 else INPUT_DOWN if move_y > 0 else 0
+    return bits | (INPUT_FIRE if fire else 0)
+
+
+def unpack_input(bits):
+    """Returns the (move_x, move_y, fire) values packed by pack_input()."""
+    move_x = -1 if bits & INPUT_LEFT else 1 if bits & INPUT_RIGHT else 0
+    move_y = -1 if bits & INPUT_UP else 1 if bits & INPUT_DOWN else 0
+    return move_x, move_y, bool(bits & INPUT_FIRE)
+
+
+class ReplayRecorder:
+    """
+    Records the input of every simulation tick of one game, plus a keyframe every keyframe_interval ticks.
+
+    Attributes:
+    header: dict with everything needed to recreate the game (seed, tick rate, difficulty settings)
+    keyframe_interval: Number of ticks between two keyframes
+    """
+
+    def __init__(self, header, keyframe_interval=600):
+        self._header = dict(header, keyframe_interval=keyframe_interval)
+        self._keyframe_interval = keyframe_interval
+        self._inputs = bytearray()
+        self._keyframes = []
+
+    def get_tick_count(self):
+        """Returns the number of ticks recorded so far."""
+        return len(self._inputs)
+
+    def record_tick(self, bits):
+        """Appends the input byte of the next tick."""
+        self._inputs.append(bits)
+
+    def wants_keyframe(self, tick):
+        """Returns True if a keyframe should be taken after the given tick."""
+        return tick % self._keyframe_interval == 0
+
+    def add_keyframe(self, state):
+        """Stores a game state summary (a JSON-serializable dict holding at least its "tick")."""
+        self._keyframes.append(state)
+
+    def save(self, path):
+        """Writes the recording to path as a compressed replay file."""
+        save_replay(path, self._header, self._keyframes, self._inputs)
+
+
+class Replay:
+    """
+    A loaded replay: the header, the keyframes by tick and the input byte of every tick.
+
+    Attributes:
+    header: dict written by the recorder
+    keyframes: list of game state summaries
+    inputs: bytes, one input byte per tick
+    """
+
+    def __init__(self, header, keyframes, inputs):
+        self._header = header
+        self._keyframes = {keyframe["tick"]: keyframe for keyframe in keyframes}
+        self._inputs = bytes(inputs)
+
+    def get_header(self):
+        """Returns the replay header."""
+        return self._header
+
+    def get_tick_count(self):
+        """Returns the number of recorded ticks."""
+        return len(self._inputs)
+
+    def get_input(self, tick):
+        """Returns the input byte of a tick (ticks are numbered from 1)."""
+        return self._inputs[tick - 1]
+
+    def get_keyframe(self, tick):
+        """Returns the keyframe taken after the given tick, or None."""
+        return self._keyframes.get(tick)
+
+    def get_keyframe_count(self):
+        """Returns the number of keyframes."""
+        return len(self._keyframes)
+
+
+def save_replay(path, header, keyframes, inputs):
+    """Writes a replay file."""
+    header_json = json.dumps(header).encode()
+    keyframes_json = json.dumps(keyframes).encode()
+    payload = struct.pack("<I", len(header_json)) + header_json + struct.pack("<I", len(keyframes_json)) + keyframes_json
+    with open(path, "wb") as file:
+        file.write(REPLAY_MAGIC + zlib.compress(payload + bytes(inputs), 9))
+
+
+def load_replay(path):
+    """Reads a replay file written by save_replay() and returns a Replay."""
+    with open(path, "rb") as file:
+        data = file.read()
+    if not data.startswith(REPLAY_MAGIC):
+        raise ValueError(f"{path} is not a replay file")
+    payload = zlib.decompress(data[len(REPLAY_MAGIC) :])
+    header_size = struct.unpack_from("<I", payload, 0)[0]
+    header = json.loads(payload[4 : 4 + header_size])
+    offset = 4 + header_size
+    keyframes_size = struct.unpack_from("<I", payload, offset)[0]
+    keyframes = json.loads(payload[offset + 4 : offset + 4 + keyframes_size])
+    return Replay(header, keyframes, payload[offset + 4 + keyframes_size :])
+
+
+if __name__ == "__main__":
+    # Play a replay back headless: ASTEROIDS_BACKEND=null python Replay.py recording.replay
+    import sys
+    import time
+    from Game import SpaceGame
+
+    replay = load_replay(sys.argv[1])
+    header = replay.get_header()
+    game = SpaceGame(swarm=header["swarm"], tick_rate=header["tick_rate"])
+    start = time.perf_counter()
+    result = game.run_replay(replay)
+    elapsed = time.perf_counter() - start
+    print(f"{result['ticks']} ticks in {elapsed:.2f}s ({result['ticks'] / header['tick_rate'] / max(elapsed, 1e-9):.0f}x real time)")
+    if result["desync_tick"] is None:
+        print(f"all {replay.get_keyframe_count()} keyframes matched, final score {result['points']}")
+    else:
+        print(f"replay desynced at tick {result['desync_tick']}")
@@ -1,5 +1,6 @@
 from pyray import *
 from raylib import *
+from Backend import *  # replaces raylib functions when a headless backend is selected
 
 
 WINDOW_WIDTH, WINDOW_HEIGHT = 1920, 1080
@@ -11,3 +12,7 @@ FONT_SIZE = 120
 POINTS_FONT_SIZE = 40
 OXYGEN_FONT_SIZE = 70
 MAX_ASTEROID_SPEED = [200, 250]
+SWARM_MAX_ASTEROIDS = 10000
+SIMULATION_TICK_RATE = 120  # fixed game updates per second, independent of the display frame rate
+MAX_SIMULATION_STEPS = 8  # most ticks run in one frame, so a slow frame can't snowball into more slow frames
+FREEZE_TIME_SCALE = 0.75  # game speed while the player is frozen by an icy asteroid (slow motion)
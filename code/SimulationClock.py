@@ -0,0 +1,96 @@
+from Settings import *
+import math
+
+
+class SimulationClock:
+    """
+    The game's simulation time. The simulation runs in fixed ticks; advance() turns the time of a rendered
+    frame into the number of ticks to run, so everything driven by the clock (sprite movement, game timers,
+    difficulty progression) follows the clock's time instead of the wall clock.
+
+    The clock can be paused, which runs no ticks at all, and scaled: a time scale of 0.5 runs half as many
+    ticks per second (slow motion) and 50 runs fifty times as many (fast-forward). Every tick is still the
+    same length, so a game plays out the same at any time scale.
+
+    Attributes:
+    tick_rate: Simulation ticks per simulated second
+    max_steps: Most ticks run in one frame at a time scale of 1, more at higher time scales
+    """
+
+    def __init__(self, tick_rate=SIMULATION_TICK_RATE, max_steps=MAX_SIMULATION_STEPS):
+        self._tick_rate = tick_rate
+        self._timestep = 1 / tick_rate
+        self._max_steps = max_steps
+        self._tick = 0  # ticks run since the clock was reset
+        self._accumulator = 0.0  # scaled frame time not yet consumed by a tick
+        self._time_scale = 1.0
+        self._paused = False
+
+    def get_tick_rate(self):
+        """Returns the number of ticks per simulated second."""
+        return self._tick_rate
+
+    def get_timestep(self):
+        """Returns the length of a tick in simulated seconds."""
+        return self._timestep
+
+    def get_tick(self):
+        """Returns the number of ticks run since the clock was reset."""
+        return self._tick
+
+    def get_time(self):
+        """Returns the simulated seconds since the clock was reset."""
+        # Dividing keeps whole seconds exact, so timers with whole-second periods land exactly on their tick
+        return self._tick / self._tick_rate
+
+    def get_alpha(self):
+        """Returns how far the simulation is between the last tick and the next one (0 to 1), for drawing."""
+        return self._accumulator / self._timestep
+
+    def pause(self):
+        """Stops the simulation, advance() returns 0 until resume() is called."""
+        self._paused = True
+
+    def resume(self):
+        """Restarts a paused simulation."""
+        self._paused = False
+
+    def is_paused(self):
+        """Returns True if the simulation is paused."""
+        return self._paused
+
+    def set_time_scale(self, time_scale):
+        """Sets how many simulated seconds pass per real second."""
+        if time_scale < 0:
+            raise ValueError(f"time_scale must be positive, got {time_scale}")
+        self._time_scale = time_scale
+
+    def get_time_scale(self):
+        """Returns how many simulated seconds pass per real second."""
+        return self._time_scale
+
+    def advance(self, frame_time):
+        """
+        Adds a rendered frame of frame_time real seconds and returns the number of ticks to run for it.
+        The caller calls tick() for each of them.
+        """
+        if self._paused:
+            return 0
+        self._accumulator += frame_time * self._time_scale
+        steps = int(self._accumulator / self._timestep)
+        max_steps = self._max_steps * max(1, math.ceil(self._time_scale))
+        if steps > max_steps:
+            # Too far behind to catch up, drop the leftover time instead of slowing down every following frame
+            self._accumulator %= self._timestep
+            return max_steps
+        self._accumulator -= steps * self._timestep
+        return steps
+
+    def tick(self):
+        """Counts one simulation tick."""
+        self._tick += 1
+
+    def reset(self):
+        """Restarts the simulation time from 0, e.g. when a new game starts."""
+        self._tick = 0
+        self._accumulator = 0.0
@@ -1,80 +1,131 @@
 from Settings import *
 from MyTimer import Timer
-from random import randint
 from Assets import *
+from TextureAtlas import *
+from ObjectPool import ObjectPool
+from RenderQueue import *
+from TextCache import *
 
 
 class Sprite2D:
     """
     represents a 2D sprite, which could be either moving or stationary.
+    Sprites use __slots__ and keep their position, size and direction as plain floats instead of cffi structs,
+    so each sprite is a small fixed-size object with no per-instance __dict__.
+    The position before the last simulation tick is kept too, so drawing can interpolate between ticks.
 
     Attributes:
-    pos: Position, represented by a Vector2 object with x and y specifications
+    pos: Position, given as an (x, y) pair
     speed: Speed, given by an integer
-    size: Size, represented represented by a Vector2 object with x and y specifications
-    direction: Direction, represented by a Vector2 object with x and y specifications
-    texture: Texture, represented by a Texture2D object
+    size: Size, given as a (width, height) pair
+    direction: Direction, given as an (x, y) pair
+    texture: Texture, represented by an AtlasRegion handle (see game_atlas.get_region()), the atlas is built when first drawn
     """
 
+    __slots__ = ("_x", "_y", "_prev_x", "_prev_y", "_speed", "_width", "_height", "_direction_x", "_direction_y", "_sprite_texture")
+    _render_layer = RENDER_LAYER_PICKUPS  # layer of the render queue the sprite is drawn in
+
     def __init__(self, pos, speed, size, direction, texture):
-        self._pos = pos
+        self._x, self._y = float(pos[0]), float(pos[1])
+        self._prev_x, self._prev_y = self._x, self._y
         self._speed = speed
-        self._size = size
-        self._direction = direction
+        self._width, self._height = float(size[0]), float(size[1])
+        self._direction_x, self._direction_y = float(direction[0]), float(direction[1])
         self._sprite_texture = texture
 
+    def get_x(self):
+        """Returns the x coordinate of the sprite."""
+        return self._x
+
+    def get_y(self):
+        """Returns the y coordinate of the sprite."""
+        return self._y
+
+    def get_width(self):
+        """Returns the width of the sprite."""
+        return self._width
+
+    def get_height(self):
+        """Returns the height of the sprite."""
+        return self._height
+
     def get_position(self):
-        """Returns the current position of the sprite."""
-        return self._pos
+        """Returns a new Vector2 holding the current position of the sprite."""
+        return Vector2(self._x, self._y)
 
     def get_speed(self):
         """Returns the current speed of the sprite."""
         return self._speed
 
     def get_size(self):
-        """Returns the current size of the sprite."""
-        return self._size
+        """Returns a new Vector2 holding the current size of the sprite."""
+        return Vector2(self._width, self._height)
 
     def get_direction(self):
-        """Returns the current direction of the sprite."""
-        return self._direction
+        """Returns a new Vector2 holding the current direction of the sprite."""
+        return Vector2(self._direction_x, self._direction_y)
 
     def get_texture(self):
         """Returns the current texture of the sprite."""
         return self._sprite_texture
 
-    def update_pos(self):
+    def update_pos(self, dt):
         """
-        Updates the position of the sprite each frame based on its direction and speed.
-        Uses deltaTime to ensure consistent movement regardless of frame rate.
+        Moves the sprite by one simulation tick based on its direction and speed.
+        dt is the fixed tick length in seconds, so movement doesn't depend on the frame rate.
         """
-        deltatime = (
-            get_frame_time()
-        )  # deltatime (time passed since last frame), used to ensure consistent movement regardless of framerate
-        self._pos.x += self._direction.x * self._speed * deltatime
-        self._pos.y += self._direction.y * self._speed * deltatime
+        self._prev_x, self._prev_y = self._x, self._y
+        self._x += self._direction_x * self._speed * dt
+        self._y += self._direction_y * self._speed * dt
+
+    def respawn(self, x, y, speed):
+        """Moves a pooled sprite to a new spawn point with a new speed."""
+        self.set_position(x, y)
+        self._speed = speed
 
-    def set_direction(self, direction):
+    def set_position(self, x, y):
+        """Set sprite position. The sprite jumps there instead of being interpolated from its old position."""
+        self._x = self._prev_x = float(x)
+        self._y = self._prev_y = float(y)
+
+    def set_direction(self, direction_x, direction_y):
         """Set sprite direction."""
-        self._direction = direction
+        self._direction_x = float(direction_x)
+        self._direction_y = float(direction_y)
 
     def set_texture(self, texture):
         """Set sprite texture."""
         self._sprite_texture = texture
 
-    def movement_update(self, direction_vector, rotation, origin, tint):
+    def draw(self, rotation=0, tint=WHITE, alpha=1.0):
+        """
+        Draws the sprite stretched to its size, through the render queue in the sprite's layer. alpha (0 to 1) is
+        how far the frame is between the previous and the current simulation tick, and the sprite is drawn at
+        the matching in-between position.
+        """
+        x = self._prev_x + (self._x - self._prev_x) * alpha
+        y = self._prev_y + (self._y - self._prev_y) * alpha
+        render_queue.add_sprite(self._render_layer, self._sprite_texture, x, y, self._width, self._height, 0, 0, rotation, tint)
+
+    def draw_at_position(self, tint=WHITE):
         """
-        Updates the sprite's position and draws the sprite based on the updated position and direction.
+        Draws the texture unscaled at the sprite's position right away, not through the render queue (used by HUD
+        sprites such as hearts and ammo, which the HUD compositor draws into its texture).
         """
-        self.set_direction(direction_vector)
-        self.update_pos()
+        region = self._sprite_texture
+        draw_texture_rec(region.get(), region.get_source(), Vector2(self._x, self._y), tint)
 
-        # The source_rect defines the portion of the texture to draw
-        # The dest_rect defines where the sprite will be drawn on the screen
-        source_rect = Rectangle(0, 0, self.get_texture().width, self.get_texture().height)
-        dest_rect = Rectangle(self.get_position().x, self.get_position().y, self._size.x, self._size.y)
+    def get_hud_bounds(self):
+        """Returns the (x, y, width, height) box draw_at_position() draws in."""
+        region = self._sprite_texture
+        return self._x, self._y, region.width, region.height
 
-        draw_texture_pro(self.get_texture(), source_rect, dest_rect, origin, rotation, tint)
+    def movement_update(self, direction_x, direction_y, dt):
+        """
+        Sets the sprite's direction and moves it by one simulation tick.
+        """
+        self.set_direction(direction_x, direction_y)
+        self.update_pos(dt)
 
 
 class Spaceship(Sprite2D):
@@ -83,16 +134,39 @@ class Spaceship(Sprite2D):
     and interactions with game objects (e.g., taking damage from asteroids, collecting power-ups).
     """
 
+    __slots__ = (
+        "_laser_pool",
+        "_laser_projectiles",
+        "_health_display",
+        "_max_health",
+        "_current_health",
+        "_ammo_display",
+        "_current_ammo",
+        "_max_ammo",
+        "_oxygen_meter",
+        "_score_tracker",
+        "_is_frozen",
+        "_unfreeze_player_timer",
+        "_move_x",
+        "_move_y",
+        "_fire_requested",
+        "_hud_elements",
+    )
+    _render_layer = RENDER_LAYER_PLAYER
+
     def __init__(
         self,
-        texture=game_assets.get_asset_texture("green_ship.png"),
-        pos=Vector2(WINDOW_WIDTH / 2 - 50, WINDOW_HEIGHT / 2),
+        texture=game_atlas.get_region("green_ship.png"),
+        pos=(WINDOW_WIDTH / 2 - 50, WINDOW_HEIGHT / 2),
         speed=PLAYER_SPEED,
-        size=Vector2(112, 75),
-        direction=Vector2(),
+        size=(112, 75),
+        direction=(0, 0),
+        scheduler=None,
     ):
         super().__init__(pos, speed, size, direction, texture)
-        self._laser_projectiles = []  # list of laser objects fired
+        # Lasers are reused from a pool; at most 10 lasers can be on screen at once
+        self._laser_pool = ObjectPool(lambda: Laser((0, 0)), 10)
+        self._laser_projectiles = self._laser_pool.get_active()  # list of laser objects fired
         self._health_display = []  # list of heart sprites for HP UI
         self._max_health = 9  # max hp used to fill health bar
         self._current_health = 9  # current hp level
@@ -101,10 +175,17 @@ class Spaceship(Sprite2D):
         self._current_ammo = 6  # current ammo
         self._max_ammo = 6  # max ammo to fill self._ammo_display
         self.generate_ammo()  # fill self._current_ammo bar for ammo UI
-        self._oxygen_meter = OxygenMeter(game_assets.get_asset_font("slkscreb.ttf"))  # Oxygen meter UI
-        self._score_tracker = Points(game_assets.get_asset_font("slkscreb.ttf"))  # Points UI
+        self._oxygen_meter = OxygenMeter(game_assets.get_lazy_font("slkscreb.ttf", OXYGEN_FONT_SIZE), scheduler=scheduler)  # Oxygen meter UI
+        self._score_tracker = Points(
+            game_assets.get_lazy_font("slkscreb.ttf", POINTS_FONT_SIZE), game_assets.get_lazy_font("slkscreb.ttf", POINTS_FONT_SIZE - 5)
+        )  # Points UI
         self._is_frozen = False
-        self._unfreeze_player_timer = Timer(5, False, False, self.unfreeze_player)  # Timer used to unfreeze player
+        self._unfreeze_player_timer = Timer(5, False, False, self.unfreeze_player, scheduler)  # Timer used to unfreeze player
+        # Input sampled once per rendered frame and consumed by the simulation ticks
+        self._move_x, self._move_y = 0, 0
+        self._fire_requested = False
+        # Everything the HUD compositor draws for the player, in drawing order
+        self._hud_elements = (*self._health_display, *self._ammo_display, self._oxygen_meter, self._score_tracker)
 
     def freeze_player(self):
         """
@@ -121,6 +202,10 @@ class Spaceship(Sprite2D):
             set_sound_volume(freeze, 0.2)
             play_sound(freeze)
 
+    def is_frozen(self):
+        """Returns True while the player is frozen by an icy asteroid."""
+        return self._is_frozen
+
     def unfreeze_player(self):
         """Restores the player's speed to its normal value and unfreezes them."""
         if self._is_frozen:
@@ -131,19 +216,20 @@ class Spaceship(Sprite2D):
         """
         Resets the player's state, including health, ammo, oxygen, and position.
         """
-        self._laser_projectiles.clear()
-        self._health_display.clear()
+        self._laser_pool.release_all()
         self._current_health = 9
-        self.generate_health()
-        self._ammo_display.clear()
+        for heart in self._health_display:
+            heart.switch_heart_texture(False)
         self._current_ammo = 6
-        self._max_ammo = 6
-        self.generate_ammo()
+        for ammo in self._ammo_display:
+            ammo.set_shown(True)
         self._oxygen_meter.reset_oxygen()
         self._score_tracker.reset_points()
-        self._pos = Vector2(WINDOW_WIDTH / 2 - 50, WINDOW_HEIGHT / 2)
+        self.set_position(WINDOW_WIDTH / 2 - 50, WINDOW_HEIGHT / 2)
         self._is_frozen = False
+        self._unfreeze_player_timer.deactivate()
         self._speed = PLAYER_SPEED
+        self._fire_requested = False
 
     def get_current_health(self):
         """Returns the current health of the spaceship."""
@@ -157,6 +243,10 @@ class Spaceship(Sprite2D):
         """Returns the list of lasers fired by the spaceship."""
         return self._laser_projectiles
 
+    def remove_laser(self, laser):
+        """Removes a laser from the screen and returns it to the laser pool."""
+        self._laser_pool.release(laser)
+
     def generate_health(self):
         """
         Generates health UI by creating heart sprites for each health point and adding them to the health display list.
@@ -164,17 +254,10 @@ class Spaceship(Sprite2D):
         sprite_offset = 0  # offset to help position heart sprites next to each other in the UI
         for i in range(self.get_current_health()):
             # create a Heart Sprite and add it to the health_display list to be draw later
-            current_heart = HP(Vector2(50 + sprite_offset, 1000))
+            current_heart = HP((50 + sprite_offset, 1000))
             self._health_display += [current_heart]
             # readjust offset each time based on the hearts size
-            sprite_offset += current_heart.get_size().x
-
-    def display_hp(self):
-        """
-        Displays the health UI (hearts) for the spaceship.
-        """
-        for heart in self._health_display:
-            heart.draw_heart()
+            sprite_offset += current_heart.get_width()
 
     def take_damage(self):
         """
@@ -202,136 +285,125 @@ class Spaceship(Sprite2D):
 
     def generate_ammo(self):
         """
-        Generates the ammo UI by creating ammo sprites for each ammo and adding them to the ammo display list.
+        Generates the ammo UI by creating an ammo sprite for each ammo slot up to the max ammo and adding them
+        to the ammo display list. The sprites are kept, and shown or hidden as ammo is used and picked up.
         """
-        # reset the previous ammo ui display
-        self._ammo_display.clear()
         # use the offset to position ammo in the UI next to each other
         sprite_offset = 0
-        for i in range(self._current_ammo):
+        for i in range(self._max_ammo):
             # create a ammo Sprite and add it to the ammo_display list to be draw later
-            current_ammo = Ammo(Vector2(60 + sprite_offset, 870))
+            current_ammo = Ammo((60 + sprite_offset, 870), is_shown=i < self._current_ammo)
             self._ammo_display += [current_ammo]
-            sprite_offset += current_ammo.get_size().x
+            sprite_offset += current_ammo.get_width()
 
     def increase_ammo(self):
         """
         Increases the spaceship's ammo by 1 and updates the ammo UI.
         """
         if self.get_current_ammo() < self._max_ammo:
+            self._ammo_display[self._current_ammo].set_shown(True)
             self._current_ammo += 1
-            self.generate_ammo()
 
     def remove_ammo(self):
         """
         Removes one ammo from the spaceship's ammo count and updates the ammo UI.
         """
         if self._current_ammo > 0:
-            self._ammo_display.remove(self._ammo_display[-1])
             self._current_ammo -= 1
-        else:
-            self._ammo_display.remove(self._ammo_display[-1])
-
-    def display_ammo(self):
-        """
-        Displays the ammo UI (ammo sprites) for the spaceship.
-        """
-        for ammo in self._ammo_display:
-            ammo.draw_laser_ammo()
+            self._ammo_display[self._current_ammo].set_shown(False)
 
     def get_oxygen_meter(self):
         """Returns the oxygen meter UI for the spaceship."""
         return self._oxygen_meter
 
-    def drain_spaceship_oxygen(self):
-        """
-        Starts depleting the spaceship's oxygen and updates the oxygen meter.
-        """
-        self.get_oxygen_meter().run_oxygen_depletion_clock()
-
     def get_player_points(self):
         """Returns the points tracker for the spaceship."""
         return self._score_tracker
 
-    def draw_player_points(self):
-        """
-        Draws the player's points and multiplier on the screen.
-        """
-        self.get_player_points().draw_points()
-        self.get_player_points().draw_multiplier()
+    def get_hud_elements(self):
+        """Returns the HUD elements of the player (hearts, ammo, oxygen meter and points) for the HUD compositor."""
+        return self._hud_elements
 
     def check_window_boundaries(self):
         """
         Checks if the spaceship is within the window boundaries.
         If the spaceship goes out of bounds, it is repositioned to stay within the screen.
         """
-        x_margin = self.get_texture().width
-        y_margin = self.get_texture().height
-        if self.get_position().x < 0:  # Left edge
-            self._pos.x = 0
-        elif self.get_position().x + x_margin > WINDOW_WIDTH:  # Right edge
-            self._pos.x = WINDOW_WIDTH - x_margin
-        if self.get_position().y < 0:  # Top edge
-            self._pos.y = 0
-        elif self.get_position().y + y_margin > WINDOW_HEIGHT:  # Bottom edge
-            self._pos.y = WINDOW_HEIGHT - y_margin
+        x_margin = self._width
+        y_margin = self._height
+        if self._x < 0:  # Left edge
+            self._x = 0.0
+        elif self._x + x_margin > WINDOW_WIDTH:  # Right edge
+            self._x = float(WINDOW_WIDTH - x_margin)
+        if self._y < 0:  # Top edge
+            self._y = 0.0
+        elif self._y + y_margin > WINDOW_HEIGHT:  # Bottom edge
+            self._y = float(WINDOW_HEIGHT - y_margin)
+
+    def poll_input(self):
+        """
+        Reads the keyboard once per rendered frame. A key press is kept until a simulation tick uses it,
+        so presses aren't lost on frames without a tick or repeated on frames with several ticks.
+        """
+        self._move_x = int(is_key_down(KEY_RIGHT)) - int(is_key_down(KEY_LEFT))
+        self._move_y = int(is_key_down(KEY_DOWN)) - int(is_key_down(KEY_UP))
+        if is_key_pressed(KEY_SPACE):
+            self._fire_requested = True
+
+    def get_input_state(self):
+        """Returns the input the next simulation tick will use as (move_x, move_y, fire)."""
+        return self._move_x, self._move_y, self._fire_requested
+
+    def set_input_state(self, move_x, move_y, fire):
+        """Replaces the sampled input, used to play back recorded input."""
+        self._move_x, self._move_y = move_x, move_y
+        self._fire_requested = fire
 
-    def shoot_laser(self):
+    def shoot_laser(self, dt):
         """
         Handles the laser shooting mechanics. The laser is fired when the spacebar is pressed, and ammo is deducted.
         Plays a laser sound effect and adds lasers to the projectiles list.
         """
-        if is_key_pressed(KEY_SPACE) and len(self.get_lasers()) < 10:
+        if self._fire_requested and self._laser_pool.get_free_count() > 0:
             if self._current_ammo > 0:
                 beam = game_assets.get_asset_sound("laser.wav")
                 set_sound_volume(beam, 0.5)
                 play_sound(beam)
-                # create a laser object aligned with the position of the player
-                laser_align_pos = Vector2(self.get_position().x + self.get_texture().width / 2 - 3, self.get_position().y - 30)
-                current_laser = Laser(laser_align_pos)
-                self._laser_projectiles += [current_laser]  # laser is added to the current list of lasers on screen
+                # reuse a laser from the pool (adding it to the lasers on screen), aligned with the position of the player
+                current_laser = self._laser_pool.acquire()
+                current_laser.respawn(self._x + self._width / 2 - 3, self._y - 30, LASER_SPEED)
                 self.remove_ammo()  # ammo is removed from the UI
+        self._fire_requested = False
 
         # update the position of each laser on the screen and remove them as they go off screen
-        for laser in self.get_lasers()[:]:
-            laser.movement_update(laser.get_direction(), 0, Vector2(0, 0), WHITE)
-            if laser.get_position().y < 0:
-                self._laser_projectiles.remove(laser)
+        # walk backwards since removing a laser swaps the last laser into its place
+        lasers = self.get_lasers()
+        for index in range(len(lasers) - 1, -1, -1):
+            laser = lasers[index]
+            laser.update_pos(dt)
+            if laser.get_y() < 0:
+                self.remove_laser(laser)
 
-    def initialize_player_mechanics(self):
+    def update_player_mechanics(self, dt):
         """
-        Initializes player mechanics such as movement, shooting, and UI updates (health, ammo, points).
-        Updates the spaceship's position and handles frozen state.
+        Runs one simulation tick of the player mechanics: movement from the sampled input,
+        shooting and the window boundaries. Oxygen depletion and unfreezing run on the scheduler.
         """
-        if self._is_frozen:
-            # start the player timer to be unfreezed
-            self._unfreeze_player_timer.update()
-            # update the ship position based on input; spaceship is tinted blue while frozen
-            self.movement_update(
-                Vector2(
-                    int(is_key_down(KEY_RIGHT)) - int(is_key_down(KEY_LEFT)), int(is_key_down(KEY_DOWN)) - int(is_key_down(KEY_UP))
-                ),
-                0,
-                Vector2(),
-                SKYBLUE,
-            )
-        else:
-            # update ship position based on input
-            self.movement_update(
-                Vector2(
-                    int(is_key_down(KEY_RIGHT)) - int(is_key_down(KEY_LEFT)), int(is_key_down(KEY_DOWN)) - int(is_key_down(KEY_UP))
-                ),
-                0,
-                Vector2(),
-                WHITE,
-            )
-        # turn on laser shooting, draw ammo and health UI, display draining oxygen, and check window boundaries
-        self.shoot_laser()
-        self.display_hp()
-        self.drain_spaceship_oxygen()
-        self.draw_player_points()
-        self.display_ammo()
+        # update ship position based on input
+        self.movement_update(self._move_x, self._move_y, dt)
         self.check_window_boundaries()
+        self.shoot_laser(dt)
+
+    def draw_player_mechanics(self, alpha):
+        """
+        Draws the spaceship and its lasers. The player UI (health, ammo, oxygen, points) is drawn by the HUD
+        compositor, see get_hud_elements().
+        alpha is how far the frame is between the last two simulation ticks.
+        """
+        # spaceship is tinted blue while frozen
+        self.draw(0, SKYBLUE if self._is_frozen else WHITE, alpha)
+        for laser in self.get_lasers():
+            laser.draw(0, WHITE, alpha)
 
 
 class Laser(Sprite2D):
@@ -339,63 +411,30 @@ class Laser(Sprite2D):
     Represents a laser shot by the player.
     """
 
+    __slots__ = ()
+    _render_layer = RENDER_LAYER_PLAYER
+
     def __init__(
         self,
-        pos=Vector2(0, 0),
+        pos=(0, 0),
         speed=LASER_SPEED,
-        size=Vector2(9, 54),
-        direction=Vector2(0, -1),
-        texture=game_assets.get_asset_texture("green_laser.png"),
+        size=(9, 54),
+        direction=(0, -1),
+        texture=game_atlas.get_region("green_laser.png"),
     ):
         super().__init__(pos, speed, size, direction, texture)
 
 
-class Asteroid(Sprite2D):
-    """
-    Represents an asteroid in the game, which moves and rotates dynamically
-    """
-
-    def __init__(self, pos, speed, direction, size=Vector2(101, 84), texture=game_assets.get_asset_texture("meteor.png")):
-        super().__init__(pos, speed, size, direction, texture)
-        # each asteroid starts with a different rotation
-        self._rotation = randint(0, 90)
-
-    def dynamically_rotate(self):
-        """
-        Rotates the asteroid dynamically at a constant speed, independent of the frame rate.
-        This ensures smooth rotation at the same speed regardless of the game's frame rate.
-        """
-        dt = get_frame_time()
-        rotation_speed = 100
-        if self._rotation > 360:
-            self._rotation -= 360
-        else:
-            self._rotation += dt * rotation_speed
-
-    def get_rotation(self):
-        """Returns the current rotation of the asteroid."""
-        return self._rotation
-
-    def project_asteroid(self):
-        """
-        Updates the position of the asteroid and draws it on the screen with its current rotation.
-        """
-        self.update_pos()
-        #
-        asteroid_source = Rectangle(0, 0, self.get_texture().width, self.get_texture().height)
-        asteroid_dest = Rectangle(self.get_position().x, self.get_position().y, self.get_texture().width, self.get_texture().height)
-        asteroid_center = Vector2(self.get_texture().width / 2, self.get_texture().height / 2)
-        draw_texture_pro(self.get_texture(), asteroid_source, asteroid_dest, asteroid_center, self._rotation, WHITE)
-
-
 class O2_PowerUP(Sprite2D):
     """
     Represents an Oxygen Power-Up that replenishes the player's oxygen level.
     O2_PowerUps are sprites that change their appearance depending on whether or not they are unlocked
     """
 
+    __slots__ = ("_is_locked",)
+
     def __init__(
-        self, pos, speed, direction, size=Vector2(65, 65), texture=game_assets.get_asset_texture("water_tank.png"), is_locked=True
+        self, pos, speed, direction, size=(65, 65), texture=game_atlas.get_region("water_tank.png"), is_locked=True
     ):
         super().__init__(pos, speed, size, direction, texture)
         self._is_locked = is_locked
@@ -403,10 +442,10 @@ class O2_PowerUP(Sprite2D):
     def change_lock_status(self, update_bool):
         if update_bool:
             self._is_locked = True
-            self._sprite_texture = game_assets.get_asset_texture("water_tank.png")
+            self._sprite_texture = game_atlas.get_region("water_tank.png")
         else:
             self._is_locked = False
-            self._sprite_texture = game_assets.get_asset_texture("water.png")
+            self._sprite_texture = game_atlas.get_region("water.png")
 
     def get_lock_status(self):
         """
@@ -418,37 +457,54 @@ class O2_PowerUP(Sprite2D):
 class Ammo_PowerUP(Sprite2D):
     """Represents an ammo power-up that replenishes the player's ammo."""
 
-    def __init__(self, pos, speed, direction, size=Vector2(65, 65), texture=game_assets.get_asset_texture("laser_powerup.png")):
+    __slots__ = ()
+
+    def __init__(self, pos, speed, direction, size=(65, 65), texture=game_atlas.get_region("laser_powerup.png")):
         super().__init__(pos, speed, size, direction, texture)
 
 
 class HeartCapsule_PowerUP(Sprite2D):
     """Represents a heart capsule power-up that restores the player's health."""
 
-    def __init__(self, pos, speed, direction, size=Vector2(65, 65), texture=game_assets.get_asset_texture("health_power_up.png")):
+    __slots__ = ()
+
+    def __init__(self, pos, speed, direction, size=(65, 65), texture=game_atlas.get_region("health_power_up.png")):
         super().__init__(pos, speed, size, direction, texture)
 
 
 class Treasure(Sprite2D):
     """Represents a treasure (typically a diamond) that can be collected by the player."""
 
-    def __init__(self, pos, speed, direction, size=Vector2(61, 63), texture=game_assets.get_asset_texture("diamond.png")):
+    __slots__ = ()
+
+    def __init__(self, pos, speed, direction, size=(61, 63), texture=game_atlas.get_region("diamond.png")):
         super().__init__(pos, speed, size, direction, texture)
 
 
 class Clock(Sprite2D):
     """Represents a clock that tracks the time in the game."""
 
-    def __init__(self, font, texture=None, pos=Vector2(WINDOW_WIDTH / 2 - 37, 0), speed=0, size=Vector2(0, 0), direction=Vector2()):
+    __slots__ = ("_current_time", "_time", "_font")
+
+    def __init__(
+        self,
+        font,
+        texture=None,
+        pos=(WINDOW_WIDTH / 2 - 37, 0),
+        speed=0,
+        size=(0, 0),
+        direction=(0, 0),
+        scheduler=None,
+    ):
         super().__init__(pos, speed, size, direction, texture)
         self._current_time = 0  # time to be displayed on screen
-        self._time = Timer(1, True, False, self.count_up)  # timer used to count up
-        self._font = font
+        self._time = Timer(1, True, True, self.count_up, scheduler)  # timer used to count up, from the scheduler's time 0
+        self._font = font  # LazyAsset handle of the font
 
     def reset_time(self):
-        """Resets the clock to 0 and restarts the timer."""
+        """Resets the clock to 0 and restarts the timer from the scheduler's current time."""
         self._current_time = 0
-        self._time = Timer(1, True, False, self.count_up)
+        self._time.activate()
 
     def get_current_time(self):
         """Returns the current time displayed on the clock."""
@@ -458,28 +514,35 @@ class Clock(Sprite2D):
         """Increments the current time by 1 every second."""
         self._current_time += 1
 
-    def draw_time(self):
+    def get_time_position(self):
         """
-        Draws the current time on the screen, adjusting the position based on the number of digits.
+        Returns the position of the time text, adjusting the position based on the number of digits.
         """
         pos_offset = 0
         if self.get_current_time() > 99:
             pos_offset = 85
         elif self.get_current_time() > 9 and self.get_current_time() <= 99:
             pos_offset = 50
-        draw_text_ex(
-            self._font,
-            str(self.get_current_time()),
-            Vector2(self.get_position().x - pos_offset, self.get_position().y),
-            FONT_SIZE,
-            10.0,
-            WHITE,
-        )
-
-    def run_clock(self):
-        """Starts the game clock and updates the time display."""
-        self._time.active = True
-        self._time.update()
+        return Vector2(self._x - pos_offset, self._y)
+
+    def draw_time(self):
+        """
+        Draws the current time on the screen right away.
+        """
+        draw_font_text(self._font.get(), str(self.get_current_time()), self.get_time_position(), FONT_SIZE, 10.0, WHITE)
+
+    def get_hud_state(self):
+        """Returns the time shown, so the HUD compositor only redraws the clock when it changes."""
+        return self._current_time
+
+    def get_hud_bounds(self):
+        """Returns the (x, y, width, height) box the time is drawn in."""
+        pos = self.get_time_position()
+        size = text_cache.measure(self._font.get(), str(self.get_current_time()), FONT_SIZE, 10.0)
+        return pos.x, pos.y, size.x, size.y
+
+    def draw_hud(self):
+        """Draws the clock into the HUD."""
         self.draw_time()
 
 
@@ -488,34 +551,49 @@ class OxygenMeter(Sprite2D):
     Represents the player's oxygen meter, which depletes over time and can be replenished.
     """
 
-    def __init__(self, font, texture=None, pos=Vector2(50, 930), speed=0, size=Vector2(), direction=Vector2()):
+    __slots__ = ("_current_oxygen_level", "_oxygen_clock", "_font")
+
+    def __init__(self, font, texture=None, pos=(50, 930), speed=0, size=(0, 0), direction=(0, 0), scheduler=None):
         super().__init__(pos, speed, size, direction, texture)
         # oxygen level to be drawn on the screen
         self._current_oxygen_level = 100
         # timer to deplete oxygen over time
-        self._oxygen_clock = Timer(OXYGEN_DEPLETION_RATE, True, False, self.deplete_oxygen)
-        self._font = font
+        self._oxygen_clock = Timer(OXYGEN_DEPLETION_RATE, True, True, self.deplete_oxygen, scheduler)
+        self._font = font  # LazyAsset handle of the font
 
     def reset_oxygen(self):
         """
         Resets the oxygen meter to full oxygen (100) and restarts the depletion timer.
         """
         self._current_oxygen_level = 100
-        self._oxygen_clock = Timer(OXYGEN_DEPLETION_RATE, True, False, self.deplete_oxygen)
+        self._oxygen_clock.activate()
 
     def get_current_oxygen_level(self):
         """Returns the current oxygen level of the player."""
         return self._current_oxygen_level
 
     def draw_oxygen_level(self):
-        """Draws the current oxygen level on the screen, changing the color based on the level."""
+        """Draws the current oxygen level on the screen right away, changing the color based on the level."""
         if self.get_current_oxygen_level() >= 65:
             color = WHITE
         elif self.get_current_oxygen_level() >= 35:
             color = YELLOW
         elif self.get_current_oxygen_level() < 35:
             color = RED
-        draw_text_ex(self._font, str(self.get_current_oxygen_level()), self.get_position(), OXYGEN_FONT_SIZE, 10, color)
+        draw_font_text(self._font.get(), str(self.get_current_oxygen_level()), self.get_position(), OXYGEN_FONT_SIZE, 10, color)
+
+    def get_hud_state(self):
+        """Returns the oxygen level shown (which also gives its color), so the HUD compositor only redraws it when it changes."""
+        return self._current_oxygen_level
+
+    def get_hud_bounds(self):
+        """Returns the (x, y, width, height) box the oxygen level is drawn in."""
+        size = text_cache.measure(self._font.get(), str(self.get_current_oxygen_level()), OXYGEN_FONT_SIZE, 10)
+        return self._x, self._y, size.x, size.y
+
+    def draw_hud(self):
+        """Draws the oxygen level into the HUD."""
+        self.draw_oxygen_level()
 
     def deplete_oxygen(self):
         """Depletes the oxygen level by 5 units over time, until it reaches 0."""
@@ -529,22 +607,20 @@ class OxygenMeter(Sprite2D):
         else:
             self._current_oxygen_level += 30
 
-    def run_oxygen_depletion_clock(self):
-        """Starts the oxygen depletion timer and updates the oxygen level display."""
-        self._oxygen_clock.active = True
-        self._oxygen_clock.update()
-        self.draw_oxygen_level()
-
 
 class Points(Sprite2D):
     """
     Represents the player's points system, including the current points and score multiplier.
     """
 
-    def __init__(self, font, texture=None, pos=Vector2(50, 50), speed=0, size=Vector2(), direction=Vector2()):
+    __slots__ = ("_current_points", "_font", "_multiplier_font", "_multiplier")
+
+    def __init__(self, font, multiplier_font=None, texture=None, pos=(50, 50), speed=0, size=(0, 0), direction=(0, 0)):
         super().__init__(pos, speed, size, direction, texture)
         self._current_points = 0
-        self._font = font
+        self._font = font  # LazyAsset handle of the font
+        # LazyAsset handle of the smaller multiplier font, the points font if None
+        self._multiplier_font = font if multiplier_font is None else multiplier_font
         self._multiplier = 1
 
     def reset_points(self):
@@ -577,13 +653,31 @@ class Points(Sprite2D):
         return self._current_points
 
     def draw_points(self):
-        """Draws the current points on the screen."""
-        draw_text_ex(self._font, "score:" + str(self.get_current_points()), self.get_position(), POINTS_FONT_SIZE, 8.0, YELLOW)
+        """Draws the current points on the screen right away."""
+        draw_font_text(self._font.get(), "score:" + str(self.get_current_points()), self.get_position(), POINTS_FONT_SIZE, 8.0, YELLOW)
 
     def draw_multiplier(self):
-        """Draws the current multiplier on the screen if it's greater than 1."""
+        """Draws the current multiplier on the screen right away if it's greater than 1."""
+        if self.get_multiplier() > 1:
+            draw_font_text(self._multiplier_font.get(), str(self._multiplier) + "x", Vector2(50, 90), POINTS_FONT_SIZE - 5, 8.0, WHITE)
+
+    def get_hud_state(self):
+        """Returns the points and multiplier shown, so the HUD compositor only redraws them when they change."""
+        return self._current_points, self._multiplier
+
+    def get_hud_bounds(self):
+        """Returns the (x, y, width, height) box the points and the multiplier below them are drawn in."""
+        points_size = text_cache.measure(self._font.get(), "score:" + str(self.get_current_points()), POINTS_FONT_SIZE, 8.0)
+        width, height = points_size.x, points_size.y
         if self.get_multiplier() > 1:
-            draw_text_ex(self._font, str(self._multiplier) + "x", Vector2(50, 90), POINTS_FONT_SIZE - 5, 8.0, WHITE)
+            multiplier_size = text_cache.measure(self._multiplier_font.get(), str(self._multiplier) + "x", POINTS_FONT_SIZE - 5, 8.0)
+            width, height = max(width, multiplier_size.x), max(height, 90 - self._y + multiplier_size.y)
+        return self._x, self._y, width, height
+
+    def draw_hud(self):
+        """Draws the points and the multiplier into the HUD."""
+        self.draw_points()
+        self.draw_multiplier()
 
     def decrease_points(self, amt):
         """Decreases the current points by the given amount."""
@@ -599,13 +693,17 @@ class Points(Sprite2D):
 class Star(Sprite2D):
     """Represents a star that grows and shrinks over time."""
 
-    def __init__(self, texture, pos, speed, size, direction):
+    __slots__ = ("_size_variation", "_min_size", "_max_size", "_continue_increasing")
+    _render_layer = RENDER_LAYER_BACKGROUND
+
+    def __init__(self, texture, pos, speed, size, direction, size_variation):
         super().__init__(pos, speed, size, direction, texture)
-        self._size_variation = randint(0, 12)
-        # initializes a random starting size for each star
-        self._size = Vector2(size.x + self._size_variation, size.y + self._size_variation)
-        self._min_size = size.x
-        self._max_size = size.x * 1.8  # maximum size for each star to increase
+        self._size_variation = size_variation
+        # starts each star at its own size
+        self._width += self._size_variation
+        self._height += self._size_variation
+        self._min_size = size[0]
+        self._max_size = size[0] * 1.8  # maximum size for each star to increase
         # used to dynamically grow and shrink star over time based on whether it has reached the max size/min size
         self._continue_increasing = True
         self._sprite_texture = texture
@@ -614,27 +712,26 @@ class Star(Sprite2D):
         """
         Increases the size of the star proportionally based on the given factor.
         """
-        self._size.x += size_factor
-        self._size.y += size_factor
+        self._width += size_factor
+        self._height += size_factor
 
-    def dynamically_grow(self):
+    def dynamically_grow(self, dt):
         """
         Makes the star grow or shrink over time, alternating between increasing and decreasing its size.
         The size of the star fluctuates within a range between _min_size and _max_size.
         The growth is seamless.
         """
-        dt = get_frame_time()
         growth_speed = 12
 
         # If the star is still increasing in size and hasn't reached its max size, grow it
-        if self._continue_increasing and (self.get_size().x) < self._max_size:
+        if self._continue_increasing and self._width < self._max_size:
             self.proportionally_increase_size(dt * growth_speed)
         # If the star has reached the max size, stop increasing and start decreasing
-        elif self.get_size().x >= self._max_size:
+        elif self._width >= self._max_size:
             self._continue_increasing = False
             self.proportionally_increase_size(-dt * growth_speed)
         # If the star has started shrinking and hasn't reached the min size, shrink it
-        elif not self._continue_increasing and (self.get_size().x) > self._min_size:
+        elif not self._continue_increasing and self._width > self._min_size:
             self.proportionally_increase_size(-dt * growth_speed)
         # If the star has reached the minimum size, reverse the shrinking and start growing again
         else:
@@ -649,13 +746,15 @@ class HP(Sprite2D):
     and the texture can change based on the state.
     """
 
+    __slots__ = ("_is_empty",)
+
     def __init__(
         self,
         pos,
         speed=0,
-        direction=Vector2(),
-        size=Vector2(30, 70),
-        texture=game_assets.get_asset_texture("heart_container.png"),
+        direction=(0, 0),
+        size=(30, 70),
+        texture=game_atlas.get_region("heart_container.png"),
         is_empty=False,
     ):
         super().__init__(pos, speed, size, direction, texture)
@@ -665,7 +764,7 @@ class HP(Sprite2D):
         """
         Draws the heart container on the screen using the current texture.
         """
-        draw_texture_v(self.get_texture(), self.get_position(), WHITE)
+        self.draw_at_position()
 
     def switch_heart_texture(self, update_bool):
         """
@@ -673,20 +772,48 @@ class HP(Sprite2D):
         """
         if update_bool:
             self._is_empty = True
-            self._sprite_texture = game_assets.get_asset_texture("empty_heart_container.png")
+            self._sprite_texture = game_atlas.get_region("empty_heart_container.png")
         else:
-            self._sprite_texture = game_assets.get_asset_texture("heart_container.png")
+            self._sprite_texture = game_atlas.get_region("heart_container.png")
             self._is_empty = False
 
+    def get_hud_state(self):
+        """Returns whether the heart is empty, so the HUD compositor only redraws it when it's toggled."""
+        return self._is_empty
+
+    def draw_hud(self):
+        """Draws the heart into the HUD."""
+        self.draw_heart()
+
 
 class Ammo(Sprite2D):
-    """Represents a laser ammo item in the game."""
+    """Represents a laser ammo item in the game, shown while the player has that ammo."""
+
+    __slots__ = ("_is_shown",)
 
     def __init__(
-        self, pos, speed=0, direction=Vector2(), size=Vector2(20, 60), texture=game_assets.get_asset_texture("green_laser.png")
+        self, pos, speed=0, direction=(0, 0), size=(20, 60), texture=game_atlas.get_region("green_laser.png"), is_shown=True
     ):
         super().__init__(pos, speed, size, direction, texture)
+        self._is_shown = is_shown
+
+    def set_shown(self, is_shown):
+        """Shows or hides the ammo, when it's picked up or used."""
+        self._is_shown = is_shown
+
+    def is_shown(self):
+        """Returns True if the ammo is shown."""
+        return self._is_shown
 
     def draw_laser_ammo(self):
-        """Draws the laser ammo on the screen."""
-        draw_texture_v(self.get_texture(), self.get_position(), WHITE)
+        """Draws the laser ammo on the screen, if it's shown."""
+        if self._is_shown:
+            self.draw_at_position()
+
+    def get_hud_state(self):
+        """Returns whether the ammo is shown, so the HUD compositor only redraws it when it changes."""
+        return self._is_shown
+
+    def draw_hud(self):
+        """Draws the ammo into the HUD."""
+        self.draw_laser_ammo()
@@ -0,0 +1,48 @@
+"""
+Assets used by every game state, recorded by AssetProfiler.py. Generated file: play through the new
+state or asset with ASTEROIDS_BACKEND=null python AssetProfiler.py (or python Game.py --profile-assets)
+instead of editing it.
+"""
+
+STATE_ASSET_MANIFESTS = {
+    "death_menu": {
+        "fonts": ("slkscreb.ttf@sdf",),
+        "sounds": ("button_hover.wav", "game_over.wav"),
+    },
+    "leaderboard": {
+        "fonts": ("slkscreb.ttf@sdf",),
+        "sounds": ("button_click.wav", "button_hover.wav"),
+    },
+    "loading_screen": {
+        "textures": ("loading_screen.png",),
+        "sounds": ("button_click.wav",),
+    },
+    "main_menu": {
+        "fonts": ("slkscreb.ttf@45", "slkscreb.ttf@sdf"),
+        "sounds": ("button_click.wav", "button_hover.wav"),
+    },
+    "options": {
+        "fonts": ("slkscr.ttf@40", "slkscreb.ttf@20", "slkscreb.ttf@45", "slkscreb.ttf@sdf"),
+        "sounds": ("button_click.wav", "button_hover.wav"),
+    },
+    "start_game": {
+        "fonts": (
+            "slkscr.ttf@40",
+            "slkscr.ttf@sdf",
+            "slkscreb.ttf@20",
+            "slkscreb.ttf@35",
+            "slkscreb.ttf@40",
+            "slkscreb.ttf@sdf",
+        ),
+        "sounds": (
+            "ammo_collect.wav",
+            "bubble.wav",
+            "crash.wav",
+            "explosion.wav",
+            "freeze_sfx.wav",
+            "heart_collect.wav",
+            "laser.wav",
+            "treasure_collect.wav",
+        ),
+    },
+}
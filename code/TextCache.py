@@ -0,0 +1,54 @@
+from Settings import *
+from collections import OrderedDict
+
+"""
+Cache of measured text. Laying out a string with measure_text_ex() walks its glyphs every time, although the HUD,
+the clock and the menus measure the same few strings every frame to center or align them. The cache keeps the
+size of every string it measured, and evicts the least recently used strings once there are more than the cache
+size.
+"""
+
+TEXT_CACHE_SIZE = 256  # strings kept
+
+
+class TextCache:
+    """
+    Measures text through a cache keyed by (font, font size, spacing, string), see the module docstring.
+    The fonts are the loaded Font structs, e.g. from a LazyAsset font handle's get().
+
+    Attributes:
+    size: Number of strings kept
+    """
+
+    def __init__(self, size=TEXT_CACHE_SIZE):
+        # (font, font size, spacing, string) -> size Vector2, least recently used first
+        self._entries = OrderedDict()
+        self._size = size
+        self._hits = 0
+        self._misses = 0
+
+    def measure(self, font, text, font_size, spacing):
+        """Returns the size of the string like measure_text_ex(). The Vector2 is shared and must not be changed."""
+        key = (font, font_size, spacing, text)
+        size = self._entries.get(key)
+        if size is None:
+            self._misses += 1
+            size = self._entries[key] = measure_text_ex(font, text, font_size, spacing)
+            if len(self._entries) > self._size:
+                self._entries.popitem(last=False)
+        else:
+            self._hits += 1
+            self._entries.move_to_end(key)
+        return size
+
+    def get_stats(self):
+        """Returns (cached strings, cache hits, cache misses) since the cache was created."""
+        return len(self._entries), self._hits, self._misses
+
+    def clear(self):
+        """Forgets every string, e.g. after the fonts were unloaded."""
+        self._entries.clear()
+
+
+# The cache the HUD and the menus measure their text through
+text_cache = TextCache()
@@ -0,0 +1,188 @@
+from Settings import *
+from Assets import *
+
+"""
+Runtime texture atlas. The sprite images are packed into a few large textures (pages) when the atlas is first
+used, and every sprite draws a source rectangle of a page instead of a texture of its own, so consecutive
+sprite draws use the same texture and raylib can batch them instead of switching textures between draws.
+"""
+
+ATLAS_PAGE_SIZE = 512  # width and height of an atlas page in pixels
+ATLAS_PADDING = 2  # transparent pixels around every image, so filtering never picks up a neighbouring image
+
+# Every sprite image of the game. The frames of images/explosion aren't drawn anywhere, so they aren't packed
+SPRITE_ATLAS_TEXTURES = (
+    "diamond.png",
+    "emerald.png",
+    "empty_heart_container.png",
+    "fiery_meteor.png",
+    "green_laser.png",
+    "green_ship.png",
+    "health_power_up.png",
+    "heart_container.png",
+    "icy_meteor.png",
+    "iron.png",
+    "laser_powerup.png",
+    "meteor.png",
+    "ruby.png",
+    "star.png",
+    "water_tank.png",
+    "water.png",
+)
+
+
+def pack_rectangles(sizes, page_size=ATLAS_PAGE_SIZE, padding=ATLAS_PADDING):
+    """
+    Places rectangles on square pages, filling each page in rows (shelves) of rectangles sorted by height.
+    sizes maps names to (width, height). Returns a dict of name to (page, x, y) and the number of pages.
+    """
+    placements = {}
+    page, x, y, shelf_height = 0, padding, padding, 0
+    for name in sorted(sizes, key=lambda name: (-sizes[name][1], -sizes[name][0], name)):
+        width, height = sizes[name]
+        if width + 2 * padding > page_size or height + 2 * padding > page_size:
+            raise ValueError(f"{name} ({width}x{height}) doesn't fit on a {page_size}x{page_size} atlas page")
+        if x + width + padding > page_size:
+            # Next shelf
+            x, y, shelf_height = padding, y + shelf_height + padding, 0
+        if y + height + padding > page_size:
+            # Next page
+            page, x, y, shelf_height = page + 1, padding, padding, 0
+        placements[name] = (page, x, y)
+        x += width + padding
+        shelf_height = max(shelf_height, height)
+    return placements, page + 1 if placements else 0
+
+
+class AtlasRegion:
+    """
+    Handle on an image of a TextureAtlas: get() returns the atlas page texture holding it, and get_source()
+    its rectangle on that page. Like a LazyAsset texture handle, the atlas is only built when a region is
+    first used, and width and height give the size of the image. Reading any of them builds the atlas, which
+    needs the window's GL context, so only drawing code does; game logic uses the sprites' own sizes.
+
+    Attributes:
+    atlas: TextureAtlas the image is packed in
+    key: Name of the image file
+    """
+
+    __slots__ = ("_atlas", "_key", "_page", "_source")
+
+    def __init__(self, atlas, key):
+        self._atlas = atlas
+        self._key = key
+        self._page = None  # atlas page texture, set when the atlas is built
+        self._source = Rectangle(0, 0, 0, 0)
+
+    def get(self):
+        """Returns the atlas page texture holding the image, building the atlas on the first call."""
+        if self._page is None:
+            self._atlas.build()
+        return self._page
+
+    def get_source(self):
+        """Returns the rectangle of the image on its atlas page."""
+        if self._page is None:
+            self._atlas.build()
+        return self._source
+
+    def get_key(self):
+        """Returns the name of the image file."""
+        return self._key
+
+    def is_loaded(self):
+        """Returns True if the atlas was built already."""
+        return self._page is not None
+
+    def place(self, page, x, y, width, height):
+        """Called by the atlas when it's built, with the page texture and the image's rectangle on it."""
+        self._page = page
+        self._source.x, self._source.y, self._source.width, self._source.height = x, y, width, height
+
+    @property
+    def width(self):
+        return self.get_source().width
+
+    @property
+    def height(self):
+        return self.get_source().height
+
+
+class TextureAtlas:
+    """
+    Packs images into atlas pages, see the module docstring. The images are decoded through the asset pack
+    of the Assets cache, and the pages are added to that cache, held for as long as the game runs.
+
+    Attributes:
+    assets: Assets cache the images are decoded through
+    name: Name of the atlas, used in the cache keys of its pages
+    keys: Names of the images, from the images folder
+    page_size: Width and height of a page in pixels
+    """
+
+    def __init__(self, assets, name, keys, page_size=ATLAS_PAGE_SIZE):
+        self._assets = assets
+        self._name = name
+        self._keys = tuple(keys)
+        self._page_size = page_size
+        self._regions = {key: AtlasRegion(self, key) for key in self._keys}
+        self._page_count = 0
+        self._built = False
+
+    def get_region(self, key):
+        """Returns the AtlasRegion handle of an image. The image has to be one of the atlas' keys."""
+        return self._regions[key]
+
+    def is_built(self):
+        """Returns True once the pages are uploaded."""
+        return self._built
+
+    def get_page_count(self):
+        """Returns the number of pages, 0 until the atlas is built."""
+        return self._page_count
+
+    def build(self):
+        """Decodes the images, packs them on pages and uploads the pages. Does nothing if already built."""
+        if self._built:
+            return
+        self._assets.open_devices()
+        pack = self._assets.get_pack()
+        images = {key: pack.load_image(key, get_asset_path("textures", key)) for key in self._keys}
+        placements, self._page_count = pack_rectangles(
+            {key: (image.width, image.height) for key, (image, from_pack) in images.items()}, self._page_size
+        )
+
+        pages = [gen_image_color(self._page_size, self._page_size, BLANK) for page in range(self._page_count)]
+        for key, (page, x, y) in placements.items():
+            image = images[key][0]
+            image_draw(pages[page], image, Rectangle(0, 0, image.width, image.height), Rectangle(x, y, image.width, image.height), WHITE)
+        for image, from_pack in images.values():
+            pack.free_image(image, from_pack)
+
+        textures = []
+        for page, page_image in enumerate(pages):
+            texture = load_texture_from_image(page_image)
+            unload_image(page_image)
+            # Held by the atlas, so the cache never evicts a page
+            self._assets.add_asset(f"{self._name}-atlas-{page}", texture, "textures", references=1)
+            textures.append(texture)
+        for key, (page, x, y) in placements.items():
+            image = images[key][0]
+            self._regions[key].place(textures[page], x, y, image.width, image.height)
+        self._built = True
+
+
+# The atlas every sprite draws from
+game_atlas = TextureAtlas(game_assets, "sprites", SPRITE_ATLAS_TEXTURES)
+
+
+if __name__ == "__main__":
+    # python TextureAtlas.py: shows the atlas pages and the packed images
+    game_atlas.build()
+    while not window_should_close():
+        begin_drawing()
+        clear_background(DARKGRAY)
+        for page in range(game_atlas.get_page_count()):
+            draw_texture(game_assets.get_asset_texture(f"sprites-atlas-{page}"), 20 + page * (ATLAS_PAGE_SIZE + 20), 20, WHITE)
+        end_drawing()
+    close_window()
@@ -0,0 +1,234 @@
+from Settings import *
+from Broadphase import SpatialGrid
+import numpy as np
+
+"""
+Retained UI toolkit of the menus. The widgets of a screen (buttons, the city input box) are registered once in a
+WidgetTree instead of being checked by hand every frame. Each frame, the input is read once into an
+InputSnapshot, the tree finds the widget under the mouse with a hit-test index and dispatches the hover change,
+the click and the keyboard input to it. The cost of a frame is one index query, however many widgets and
+screens there are.
+
+The tree holds the layout (where each widget is, which ones are shown) and the click handlers, not the widgets,
+so a widget can be on several screens, e.g. the "MAIN MENU" button, with a different place and handler on each.
+"""
+
+WIDGET_GRID_LAYER = 1  # the hit-test grid of a tree only holds widgets
+
+
+class InputSnapshot:
+    """
+    Mouse and keyboard input of the frame, read once by take() and shared by every widget.
+
+    Attributes:
+    mouse_x: X position of the mouse
+    mouse_y: Y position of the mouse
+    clicked: True if the left mouse button was pressed this frame
+    character: Character typed this frame, or "" if none
+    backspace_pressed: True if backspace was pressed this frame
+    enter_pressed: True if enter was pressed this frame
+    """
+
+    def __init__(self):
+        self.mouse_x, self.mouse_y = 0.0, 0.0
+        self.clicked = False
+        self.character = ""
+        self.backspace_pressed = False
+        self.enter_pressed = False
+
+    def take(self):
+        """Reads the input of the current frame. Call once per frame, before the widgets are dispatched to."""
+        mouse_position = get_mouse_position()
+        self.mouse_x, self.mouse_y = mouse_position.x, mouse_position.y
+        self.clicked = is_mouse_button_pressed(MOUSE_BUTTON_LEFT)
+        character = get_char_pressed()
+        self.character = chr(character) if character else ""
+        self.backspace_pressed = is_key_pressed(KEY_BACKSPACE)
+        self.enter_pressed = is_key_pressed(KEY_ENTER)
+
+
+class Widget:
+    """
+    Something on screen that can be hovered and take input, registered in WidgetTrees. Subclasses give their
+    rectangle with get_rectangle() (a widget without one only groups its children in a tree) and override the
+    methods below they need. draw() and get_draw_state() make a widget drawable on the menu canvas.
+    """
+
+    def __init__(self):
+        self._hovered = False
+
+    def get_rectangle(self):
+        """Returns the Rectangle the widget covers, or None if it can't be hovered."""
+        return None
+
+    def reposition(self, pos):
+        """Moves the widget to a position (Vector2), e.g. to where the shown screen has it."""
+
+    def is_hovered(self):
+        """Returns True if the mouse is over the widget, as of the last dispatch of its tree."""
+        return self._hovered
+
+    def set_hovered(self, hovered):
+        """Called by the tree when the mouse enters or leaves the widget."""
+        if hovered != self._hovered:
+            self._hovered = hovered
+            self.on_hover_changed(hovered)
+
+    def on_hover_changed(self, hovered):
+        """Called when the mouse entered (hovered is True) or left the widget."""
+
+    def handle_input(self, snapshot):
+        """Called every frame the widget is hovered, with the frame's InputSnapshot, e.g. to type text."""
+
+    def get_draw_state(self):
+        """Returns a value that changes whenever the widget would be drawn differently."""
+        return self._hovered
+
+    def draw(self):
+        """Draws the widget."""
+
+
+class WidgetTree:
+    """
+    Widgets of a screen, see the module docstring. Widgets are added with their parent, position and click
+    handler; children are drawn after and hit-tested above their parent, and a hidden widget hides its children.
+
+    The hit-test index is a SpatialGrid of the rectangles of the shown widgets. It's built again on the first
+    dispatch after the layout changed (add(), set_visible() or invalidate()), which also moves every widget to
+    its position in this tree.
+    """
+
+    def __init__(self):
+        self._children = {None: []}  # parent -> child widgets, None being the root
+        self._positions = {}  # widget -> Vector2, for the widgets placed by the tree
+        self._click_handlers = {}  # widget -> function called when it's clicked
+        self._hidden = set()
+        self._grid = SpatialGrid()
+        self._widgets = []  # shown widgets with a rectangle, in drawing order; the index is the id in the grid
+        self._hovered = None
+        self._dirty = True
+        self._reset_hover = True
+        self._hit_position = None  # mouse position of the last hit test
+
+    def add(self, widget, parent=None, pos=None, on_click=None):
+        """
+        Adds a widget under a parent widget (by default the root). pos is where the widget is placed when this
+        tree is shown (by default where it is), and on_click is called without arguments when it's clicked.
+        """
+        self._children[parent].append(widget)
+        self._children.setdefault(widget, [])
+        if pos is not None:
+            self._positions[widget] = pos
+        if on_click is not None:
+            self._click_handlers[widget] = on_click
+        self._dirty = True
+
+    def set_visible(self, widget, visible):
+        """Shows or hides a widget and its children."""
+        if visible == (widget in self._hidden):
+            if visible:
+                self._hidden.discard(widget)
+            else:
+                self._hidden.add(widget)
+            self._dirty = True
+
+    def is_visible(self, widget):
+        """Returns True if the widget isn't hidden."""
+        return widget not in self._hidden
+
+    def invalidate(self):
+        """
+        Places the widgets, builds the hit-test index and tracks the hover from scratch again on the next dispatch.
+        Call when the screen is shown, widgets may have been moved or hovered on another screen.
+        """
+        self._dirty = True
+        self._reset_hover = True
+
+    def get_widgets(self):
+        """
+        Returns the shown widgets with a rectangle in drawing order. The list is replaced, not changed, when the
+        layout changes.
+        """
+        if self._dirty:
+            self._build()
+        return self._widgets
+
+    def _build(self):
+        """Places the widgets, lists the shown ones and builds the hit-test index."""
+        for widget, pos in self._positions.items():
+            widget.reposition(pos)
+        widgets = []
+        pending = list(reversed(self._children[None]))
+        while pending:
+            widget = pending.pop()
+            if widget in self._hidden:
+                continue
+            if widget.get_rectangle() is not None:
+                widgets.append(widget)
+            pending.extend(reversed(self._children[widget]))
+        self._widgets = widgets
+
+        self._grid.clear()
+        if widgets:
+            rectangles = [widget.get_rectangle() for widget in widgets]
+            self._grid.insert(
+                WIDGET_GRID_LAYER,
+                np.arange(len(widgets)),
+                [rectangle.x for rectangle in rectangles],
+                [rectangle.y for rectangle in rectangles],
+                [rectangle.width for rectangle in rectangles],
+                [rectangle.height for rectangle in rectangles],
+            )
+        self._grid.build()
+        if self._reset_hover:
+            for widget in self._children:
+                if widget is not None:
+                    widget.set_hovered(False)
+            self._hovered = None
+            self._reset_hover = False
+        elif self._hovered is not None and self._hovered not in widgets:
+            # Hidden while hovered
+            self._hovered.set_hovered(False)
+            self._hovered = None
+        self._dirty = False
+
+    def hit_test(self, x, y):
+        """Returns the topmost shown widget at a point, or None."""
+        if self._dirty:
+            self._build()
+        ids = self._grid.query_layer(x, y, 0, 0, WIDGET_GRID_LAYER)
+        return self._widgets[int(ids.max())] if len(ids) else None
+
+    def update_hover(self, snapshot):
+        """Updates which widget is hovered from the mouse position of a frame's InputSnapshot and returns it, or None."""
+        position = (snapshot.mouse_x, snapshot.mouse_y)
+        if position == self._hit_position and not self._dirty:
+            # Nothing moved since the last hit test
+            return self._hovered
+        self._hit_position = position
+        hovered = self.hit_test(snapshot.mouse_x, snapshot.mouse_y)
+        if hovered is not self._hovered:
+            if self._hovered is not None:
+                self._hovered.set_hovered(False)
+            if hovered is not None:
+                hovered.set_hovered(True)
+            self._hovered = hovered
+        return hovered
+
+    def dispatch_input(self, snapshot):
+        """Calls the click handler of the hovered widget if the mouse was clicked, and gives it the keyboard input."""
+        hovered = self._hovered
+        if hovered is not None:
+            if snapshot.clicked and hovered in self._click_handlers:
+                self._click_handlers[hovered]()
+            hovered.handle_input(snapshot)
+
+    def dispatch(self, snapshot):
+        """Dispatches the input of a frame: update_hover() then dispatch_input(). Returns the hovered widget or None."""
+        self.update_hover(snapshot)
+        self.dispatch_input(snapshot)
+        return self._hovered
+
+
+# The input of the current frame, shared by every widget tree
+ui_input = InputSnapshot()